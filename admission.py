@@ -0,0 +1,217 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+RATE_LIMITED = 'rate_limited'
+OVERLOADED = 'overloaded'
+QUEUED_TOO_LONG = 'queued_too_long'
+
+
+class Shed(Exception):
+    # Raised instead of running the view; app.py turns it into a 429/503.
+    def __init__(self, lane, reason, status, retry_after):
+        super().__init__(f"{lane}: {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ---------------- Admission Control ----------------
+# Decides, before a view runs, whether this worker should take the request
+# at all. Three checks, cheapest first:
+#
+#   * a token bucket per (lane, client): `rate` requests a second with
+#     bursts of `burst`; over it the client gets 429 and the seconds until
+#     its next token;
+#   * the time the request already spent queued in front of the app
+#     (X-Request-Start from the proxy), past `max_wait` it is 503 at once;
+#   * a concurrency cap per lane, plus one shared by all public lanes. A
+#     request waits at most `max_wait` for a slot, and doesn't wait at all
+#     when recent waits already ran past it; either way it is 503.
+#
+# The admin lane has its own slots and no rate limit, and public lanes
+# together never hold more than `public_slots`, so a promotion can't push
+# the staff pages out of the workers or the connection pool. Everything is
+# per worker, like the pool and the metrics.
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        # Returns 0 when a token was taken, else the seconds until one is due.
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class Lane:
+    def __init__(self, name, slots, max_wait, rate=None, burst=None):
+        self.name = name
+        self.slots = slots
+        self.max_wait = max_wait
+        self.rate = rate
+        self.burst = burst
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._delay = 0.0  # moving average of slot waits, in seconds
+        self._peak = 0
+
+    def acquire(self, deadline=None):
+        # Returns the seconds waited, or None when no slot came free before
+        # the deadline (None: wait as long as it takes).
+        started = time.monotonic()
+        with self._cond:
+            full = self._in_flight >= self.slots
+            if full and self.max_wait is not None and self._delay >= self.max_wait:
+                return None  # the queue is already too slow: don't join it
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.slots:
+                    if deadline is None:
+                        self._cond.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._observe(time.monotonic() - started)
+                        return None
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+            waited = time.monotonic() - started
+            self._observe(waited)
+            return waited
+
+    def _observe(self, waited):
+        self._delay += (waited - self._delay) * 0.2
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'slots': self.slots,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'peak': self._peak,
+                'queue_delay_ms': round(self._delay * 1000, 3),
+            }
+
+
+class AdmissionControl:
+    def __init__(self, slots=8, public_slots=16, admin_slots=4, rate=2.0, burst=10,
+                 max_wait=0.5, max_clients=10000):
+        self.slots = slots
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_clients = max_clients
+        self.public = Lane('public', public_slots, max_wait)
+        self.admin = Lane('admin', admin_slots, max_wait=None)
+        self._lanes = {'admin': self.admin}
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # (lane, client) -> TokenBucket, least recent first
+        self.admitted = metrics.Counter('admission_admitted_total', 'Requests let through, by lane.', ('lane',))
+        self.shed = metrics.Counter('admission_shed_total', 'Requests turned away, by lane and reason.',
+                                    ('lane', 'reason'))
+
+    def lane(self, name):
+        # Public lanes are made on first use with the default settings.
+        with self._lock:
+            lane = self._lanes.get(name)
+            if lane is None:
+                lane = self._lanes[name] = Lane(name, self.slots, self.max_wait, self.rate, self.burst)
+            return lane
+
+    def _rate_check(self, lane, client):
+        now = time.monotonic()
+        key = (lane.name, client)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(lane.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(lane.rate, lane.burst, now)
+
+    def _reject(self, lane, reason, status, retry_after):
+        self.shed.inc(lane.name, reason)
+        raise Shed(lane.name, reason, status, max(1, math.ceil(retry_after)))
+
+    @contextmanager
+    def admit(self, name, client, queued=0.0):
+        # Holds a slot in lane `name` for the body of the with-block, or
+        # raises Shed. `queued`: seconds spent waiting before the app saw it.
+        if name == 'admin':
+            # Never shed: the staff lane only waits for its own slots.
+            self.admin.acquire()
+            self.admitted.inc('admin')
+            try:
+                yield
+            finally:
+                self.admin.release()
+            return
+
+        lane = self.lane(name)
+        wait = lane.rate and self._rate_check(lane, client)
+        if wait:
+            self._reject(lane, RATE_LIMITED, 429, wait)
+        if queued > self.max_wait:
+            self._reject(lane, QUEUED_TOO_LONG, 503, queued)
+        deadline = time.monotonic() + self.max_wait - queued
+        if lane.acquire(deadline) is None:
+            self._reject(lane, OVERLOADED, 503, self.max_wait)
+        try:
+            if self.public.acquire(deadline) is None:
+                self._reject(lane, OVERLOADED, 503, self.max_wait)
+        except Shed:
+            lane.release()
+            raise
+        self.admitted.inc(name)
+        try:
+            yield
+        finally:
+            self.public.release()
+            lane.release()
+
+    def stats(self):
+        with self._lock:
+            lanes = dict(self._lanes)
+            clients = len(self._buckets)
+        shed = {}
+        for (lane, reason), count in self.shed.values().items():
+            shed.setdefault(lane, {})[reason] = count
+        admitted = {lane: count for (lane,), count in self.admitted.values().items()}
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'max_wait': self.max_wait,
+            'clients_tracked': clients,
+            'public': self.public.stats(),
+            'lanes': {name: dict(lane.stats(), admitted=admitted.get(name, 0), shed=shed.get(name, {}))
+                      for name, lane in sorted(lanes.items())},
+        }
+
+    def metric_lines(self):
+        lines = self.admitted.render() + self.shed.render()
+        lines += metrics.gauge_lines('admission_public_in_flight', 'Requests holding a public slot.',
+                                     self.public.stats()['in_flight'])
+        return lines
@@ -1,34 +1,117 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response
-from flask_mysqldb import MySQL
-import MySQLdb.cursors
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, session, flash, jsonify, Response, send_file
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
-from datetime import datetime
-from functools import wraps
+import re
+import json
+import time
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from functools import partial, wraps
 import logging
-from io import BytesIO 
-from reportlab.lib.pagesizes import letter 
-from reportlab.pdfgen import canvas
+import click
+import concurrent.futures
+import config
+from menu_cache import MenuCatalog
+from search_index import MenuSearchIndex
+from db_pool import MySQLPool, PoolTimeout, DictCursor
+import repository
+import coupons
+from coupons import CouponBook, PriceTable, money
+import migrate
+import rollups
+import archive
+import menu_import
+import exports
+import metrics
+import receipts
+from receipts import ReceiptCache, render_receipts_pdf
+from images import ImageDerivatives
+from assets import AssetManifest
+from page_cache import PageCache
+from order_cache import OrderCache
+import intake
+from intake import IntakeQueue
+import events
+from events import EventBroker, BrokerFull
+from admission import AdmissionControl, Shed
 
 # ---------------- App Setup ----------------
-app = Flask(__name__)
-app.secret_key = os.environ.get('FLASK_SECRET') or os.urandom(24)
-
-app.config['MYSQL_HOST'] = os.environ.get('MYSQL_HOST', 'localhost')
-app.config['MYSQL_USER'] = os.environ.get('MYSQL_USER', 'root')
-app.config['MYSQL_PASSWORD'] = os.environ.get('MYSQL_PASSWORD', '')
-app.config['MYSQL_DB'] = os.environ.get('MYSQL_DB', 'foods')
+# Importing this module builds nothing: routes, hooks and CLI groups live on
+# the `main` blueprint, which create_app() (App Factory, below) registers.
+# The subsystems that depend on configuration are made per app and kept in
+# app.extensions; the module-level names below stand in for the current
+# app's instance.
+bp = Blueprint('main', __name__, cli_group=None)
+
+def app_extension(name):
+    return LocalProxy(lambda: current_app.extensions[name])
+
+def in_app_context(app, f):
+    # For callbacks that run on background threads (the intake drainer).
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        with app.app_context():
+            return f(*args, **kwargs)
+    return wrapped
 
-mysql = MySQL(app)
+mysql = MySQLPool()
 logging.basicConfig(level=logging.INFO)
 
+# ---------------- Admission Control ----------------
+# Load shedding for the endpoints a promotion hammers (see admission.py).
+# Public lanes are per route; admin_required views share the reserved
+# admin lane.
+admission = app_extension('admission')
+
+def request_client():
+    return session.get('username') or request.remote_addr
+
+def request_queue_time():
+    # Seconds since the proxy accepted the request, from X-Request-Start
+    # (nginx: `proxy_set_header X-Request-Start "t=${msec}";`). Seconds,
+    # milliseconds and microseconds since the epoch are all accepted.
+    value = request.headers.get('X-Request-Start', '').strip().removeprefix('t=')
+    try:
+        started = float(value)
+    except ValueError:
+        return 0.0
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, time.time() - started)
+
+def admitted(lane, methods=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if methods and request.method not in methods:
+                return f(*args, **kwargs)
+            with admission.admit(lane, request_client(), request_queue_time()):
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+@bp.app_errorhandler(Shed)
+def request_shed(e):
+    if e.status == 429:
+        message = "Too many requests, please slow down."
+    else:
+        message = "Service busy, please retry."
+    headers = {'Retry-After': str(e.retry_after)}
+    if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+        return jsonify(success=False, message=message, error=message), e.status, headers
+    return Response(message, status=e.status, headers=headers)
+
 # ---------------- Decorators ----------------
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if 'username' not in session:
             flash('Please log in to continue.', 'error')
-            return redirect(url_for('auth'))
+            return redirect(url_for('main.auth'))
         return f(*args, **kwargs)
     return decorated
 
@@ -37,52 +120,425 @@ def admin_required(f):
     def decorated(*args, **kwargs):
         if session.get('login_type') != 'admin':
             flash('Admin access only.', 'error')
-            return redirect(url_for('home'))
-        return f(*args, **kwargs)
-    return login_required(f)
+            return redirect(url_for('main.home'))
+        with admission.admit('admin', session['username']):
+            return f(*args, **kwargs)
+    return login_required(decorated)
 
 # ---------------- Helpers ----------------
+@bp.app_errorhandler(PoolTimeout)
+def pool_exhausted(e):
+    logging.warning("DB pool exhausted: %s", mysql.stats())
+    return Response("Service busy, please retry.", status=503, headers={'Retry-After': '2'})
+
 def get_cursor(dict_cursor=True):
-    return mysql.connection.cursor(MySQLdb.cursors.DictCursor if dict_cursor else None)
+    cursor = mysql.connection.cursor(DictCursor if dict_cursor else None)
+    return metrics.InstrumentedCursor(cursor, current_app.config['SLOW_QUERY_MS'] / 1000)
+
+def load_menu_rows():
+    cur = get_cursor()
+    try:
+        cur.execute("SELECT * FROM food ORDER BY food_id")
+        foods = cur.fetchall()
+        for f in foods:
+            f['discount_percent'] = f.get('discount_percent') or 0
+        return foods
+    finally:
+        cur.close()
+
+menu_catalog = app_extension('menu_catalog')
+search_index = app_extension('search_index')
+
+def search_menu(query, category=None, limit=None):
+    menu_catalog.refresh()  # a stale catalog reloads and re-syncs the index
+    foods = search_index.search(query)
+    if category:
+        foods = [f for f in foods if f.get('category') == category]
+    return foods[:limit] if limit else foods
+
+# ---------------- Coupons & Pricing ----------------
+# Coupon rules come from the coupons table, compiled once per menu version
+# (`flask coupons ...` bumps it). Menu prices are computed for the whole
+# menu at once per (coupon, menu version) and looked up from then on.
+def load_coupon_rows():
+    cur = get_cursor()
+    try:
+        return coupons.load_rules(cur)
+    finally:
+        cur.close()
+
+coupon_book = app_extension('coupon_book')
+price_table = app_extension('price_table')
+
+def active_coupon():
+    # The session only remembers the code: an expired or disabled coupon
+    # stops applying on the next request.
+    data = session.get('coupon')
+    if not data:
+        return None
+    rule = coupon_book.get(data.get('code'))
+    if rule is None:
+        session.pop('coupon', None)
+    return rule
+
+def menu_prices(rule=None):
+    version, foods = menu_catalog.snapshot()
+    return price_table.prices(version, foods, rule)
+
+def apply_prices(foods, rule=None):
+    prices = menu_prices(rule)
+    for f in foods:
+        f['discounted_price'] = prices.get(f['food_id'], money(f.get('price')))
+    return foods
+
+# ---------------- Image Derivatives ----------------
+# Thumbnails and WebP copies live under static/images/derived with
+# content-hashed names; templates render menu photos through picture().
+image_derivatives = app_extension('image_derivatives')
+
+def queue_missing_images(foods):
+    manifest = image_derivatives.manifest()
+    missing = [f['image_url'] for f in foods if f.get('image_url') and f['image_url'] not in manifest]
+    if missing and image_derivatives.available:
+        image_derivatives.process_async(missing)
+
+# ---------------- Static Assets ----------------
+# Templates link CSS/JS through asset_url(), which points at the
+# fingerprinted copies under static/dist; those are served with a year-long
+# immutable Cache-Control and precompressed when the client accepts it.
+static_assets = app_extension('static_assets')
+
+@bp.route('/static/dist/<path:filename>')
+def static_dist(filename):
+    return static_assets.send(filename)
+
+# ---------------- Page Cache ----------------
+# Home and menu are the same HTML for everyone with the same query, coupon
+# and login state, so the rendered page is kept per worker and re-served with
+# an ETag. The key carries the menu, image and asset versions, so an edit
+# shows up on the next request. Requests with pending flash messages are
+# rendered fresh and not stored; nothing per-user beyond "logged in" is
+# allowed in these templates.
+page_cache = app_extension('page_cache')
+
+def cached_page(*arg_names):
+    def decorator(view):
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            if not page_cache.max_bytes or '_flashes' in session:
+                return view(*args, **kwargs)
+            try:
+                version = menu_catalog.version
+                coupon = active_coupon()
+            except Exception:
+                return view(*args, **kwargs)  # database trouble: the view shows its own error
+            key = (request.endpoint,
+                   tuple(request.args.get(name, '').strip() for name in arg_names),
+                   coupon.code if coupon else None, 'username' in session,
+                   version, image_derivatives.version, static_assets.version)
+            page = page_cache.get(key)
+            if page is None:
+                body = view(*args, **kwargs)
+                if not isinstance(body, str) or '_flashes' in session:
+                    return body  # redirects and error pages are not cached
+                page = page_cache.put(key, body.encode())
+            response = Response(page.body, mimetype='text/html')
+            response.set_etag(page.etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response.make_conditional(request)
+        return decorated
+    return decorator
+
+# ---------------- Cart & Order Placement ----------------
+# The cart lives in the session as {food_id: quantity}; prices are never
+# trusted from the client and are computed here, once per checkout.
+MAX_CART_LINES = 30
+MAX_LINE_QUANTITY = 99
+
+def get_cart():
+    cart = {}
+    for food_id, qty in (session.get('cart') or {}).items():
+        try:
+            cart[str(int(food_id))] = int(qty)
+        except (TypeError, ValueError):
+            continue
+    return cart
+
+def save_cart(cart):
+    session['cart'] = {k: min(v, MAX_LINE_QUANTITY) for k, v in list(cart.items())[:MAX_CART_LINES] if v > 0}
+
+def price_cart(cart, coupon=None):
+    prices = menu_prices(coupon)
+    lines = []
+    for food_id, qty in cart.items():
+        food = menu_catalog.get(food_id)
+        if not food or not food.get('available') or qty <= 0:
+            continue
+        unit_price = prices[food['food_id']]
+        lines.append({
+            'food_id': food['food_id'],
+            'food_name': food['food_name'],
+            'image_url': food['image_url'],
+            'quantity': qty,
+            'unit_price': unit_price,
+            'line_total': money(unit_price * qty),
+        })
+    return lines, money(sum(l['line_total'] for l in lines))
+
+def parse_customer(form):
+    delivery = form.get('delivery_option', 'delivery')
+    service = form.get('delivery_service', '').strip()
+    other = form.get('other_service', '').strip()
+    if service == 'other' and other:
+        service = other
+    return {
+        'name': form.get('customer_name', '').strip(),
+        'phone': form.get('phone', '').strip(),
+        'address': form.get('address', '').strip() if delivery == 'delivery' else '',
+        'note': form.get('note', '').strip(),
+        'delivery': delivery,
+        'service': service,
+    }
+
+def place_order(cur, customer, lines, total, order_date, intake_key=None):
+    # Header and line items go in with two statements (executemany becomes
+    # one multi-row INSERT) inside the caller's transaction.
+    cur.execute("""
+        INSERT INTO orders
+        (customer_name, phone, address, note, food_id, quantity, total_price,
+         delivery_option, delivery_service, order_date, intake_key)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (customer['name'], customer['phone'], customer['address'], customer['note'],
+          lines[0]['food_id'], sum(l['quantity'] for l in lines), total,
+          customer['delivery'], customer['service'], order_date, intake_key))
+    order_id = cur.lastrowid
+    cur.executemany("""
+        INSERT INTO order_items (order_id, food_id, food_name, quantity, unit_price, line_total)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [(order_id, l['food_id'], l['food_name'], l['quantity'], l['unit_price'], l['line_total'])
+          for l in lines])
+    rollups.order_added(cur, order_id)
+    return order_id
+
+# ---------------- Order Detail Cache ----------------
+# (order, items) for the checkout and receipt pages, read through a
+# per-worker cache (order_cache.py). Anything that changes an order calls
+# order_cache.invalidate() after its commit.
+order_cache = app_extension('order_cache')
+
+def order_detail(order_id):
+    # (order, items), or (None, None). A hit doesn't touch the database, not
+    # even to borrow a connection. The items are shared: read only.
+    def load():
+        cur = get_cursor()
+        try:
+            order = repository.find_order(cur, order_id)
+            return order and (order, repository.load_order_items(cur, order))
+        finally:
+            cur.close()
+    detail = order_cache.get(order_id, load)
+    if detail is None:
+        return None, None
+    order, items = detail
+    return dict(order), items
+
+receipt_cache = app_extension('receipt_cache')
 
-def calculate_food_price(food, coupon=None):
+def prerender_receipt(order_id):
+    # Queue the PDF right after payment so the download is a cache hit.
     try:
-        price = float(food.get('price', 0))
-        disc = float(food.get('discount_percent', 0))
-        price = price * (1 - disc / 100) if disc > 0 else price
-        if coupon:
-            price *= (1 - float(coupon.get('discount', 0)))
-        return round(price, 2)
-    except:
-        return round(float(food.get('price', 0)), 2)
+        order, items = order_detail(order_id)
+        if order and order['payment_date'] and not receipt_cache.cached(order):
+            receipt_cache.submit(order, items)
+    except Exception as e:
+        logging.exception("Receipt prerender error: %s", e)
+
+# ---------------- Live Order Events ----------------
+# Routes publish after their commit; /orders/stream fans the events out to
+# every open manage-orders and kitchen screen, whichever worker it is on.
+order_events = app_extension('order_events')
+
+def publish_order_created(order_id, customer, lines, total, order_date):
+    order_events.publish(events.ORDER_CREATED, {
+        'order_id': order_id,
+        'customer_name': customer['name'],
+        'phone': customer['phone'],
+        'note': customer['note'],
+        'delivery_option': customer['delivery'],
+        'delivery_service': customer['service'],
+        'total_price': float(total),
+        'order_date': order_date.strftime('%Y-%m-%d %H:%M'),
+        'items': [{'food_name': l['food_name'], 'quantity': l['quantity']} for l in lines],
+    })
+
+# ---------------- Order Intake ----------------
+# order(), checkout() and submit_feedback() validate, append to the local
+# intake journal and answer at once; the drainer writes to the database in
+# batches (see intake.py). Forms carry an idempotency key so a double click
+# or a resubmitted page maps to the entry the first click created. Keys are
+# stored scoped to the user who sent them: the same key from someone else
+# is a different entry, and nobody can look up another user's order by key.
+INTAKE_KEY = re.compile(r'[\w-]{8,64}')
+
+def new_intake_key():
+    return uuid.uuid4().hex
+
+def request_intake_key(form):
+    # Hidden form field, or the Idempotency-Key header for API clients; a
+    # fresh key (no dedupe) when neither is usable.
+    key = (request.headers.get('Idempotency-Key') or form.get('idempotency_key') or '').strip()
+    return key if INTAKE_KEY.fullmatch(key) else new_intake_key()
+
+def scoped_intake_key(key):
+    # The key as stored in the journal and in orders/feedback.intake_key
+    # (VARCHAR(64): a sha256 hexdigest fits whatever the username).
+    return hashlib.sha256(f"{session['username']}\0{key}".encode()).hexdigest()
+
+def submit_order(key, customer, lines, total, rule):
+    # The order is dated when the customer sent it, not when it is drained.
+    intake_queue.submit('order', scoped_intake_key(key), {
+        'customer': customer, 'lines': lines, 'total': total,
+        'coupon': rule.code if rule else None,
+        'submitted_at': datetime.now().replace(microsecond=0).isoformat(sep=' ')})
+
+def submitted_at(payload):
+    # Entries journaled before submitted_at was recorded are dated on drain.
+    stamp = payload.get('submitted_at')
+    return datetime.fromisoformat(stamp) if stamp else datetime.now().replace(microsecond=0)
+
+def drain_order(cur, key, payload):
+    cur.execute("SELECT order_id FROM orders WHERE intake_key = %s", (key,))
+    row = cur.fetchone()
+    if row:
+        return row[0]  # inserted by a drain that died before marking it done
+    lines = [dict(l, unit_price=money(l['unit_price']), line_total=money(l['line_total']))
+             for l in payload['lines']]
+    code = payload.get('coupon')
+    if code and not coupons.redeem(cur, code):
+        # The customer was already shown the discounted price.
+        logging.warning("Coupon %s was used up before order %s was written; keeping its price", code, key)
+    return place_order(cur, payload['customer'], lines, money(payload['total']),
+                       submitted_at(payload), intake_key=key)
+
+def drain_feedback(cur, key, payload):
+    cur.execute("SELECT feedback_id FROM feedback WHERE intake_key = %s", (key,))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+    cur.execute("INSERT INTO feedback (name, email, message, intake_key) VALUES (%s, %s, %s, %s)",
+                (payload['name'], payload['email'], payload['message'], key))
+    return cur.lastrowid
+
+def intake_done(kind, payload, result):
+    if kind == 'order':
+        publish_order_created(result, payload['customer'], payload['lines'], payload['total'],
+                              submitted_at(payload))
+
+intake_queue = app_extension('intake_queue')
+
+@bp.before_app_request
+def start_intake_drainer():
+    # Picks up entries left in the journal by a previous run or worker.
+    intake_queue.start()
+
+# ---------------- Order Pagination ----------------
+# Keyset pagination on (order_date, order_id): every page is an index range
+# scan from the cursor, so page cost does not grow with the table.
+ORDER_CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+MAX_ORDERS_PAGE_SIZE = 100
+
+def encode_order_cursor(order):
+    return f"{order['order_date'].strftime(ORDER_CURSOR_FORMAT)}_{order['order_id']}"
+
+def decode_order_cursor(token):
+    try:
+        stamp, order_id = token.rsplit('_', 1)
+        return datetime.strptime(stamp, ORDER_CURSOR_FORMAT), int(order_id)
+    except (AttributeError, ValueError):
+        return None
+
+def parse_order_filters(args):
+    filters = {}
+    status = args.get('status', '').strip()
+    if status:
+        filters['status'] = status
+    for key in ('date_from', 'date_to'):
+        value = args.get(key, '').strip()
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            filters[key] = value
+        except ValueError:
+            pass
+    return filters
+
+def order_filter_clauses(filters):
+    where, params = [], []
+    if 'status' in filters:
+        where.append("o.delivery_option = %s")
+        params.append(filters['status'])
+    if 'date_from' in filters:
+        where.append("o.order_date >= %s")
+        params.append(datetime.strptime(filters['date_from'], '%Y-%m-%d'))
+    if 'date_to' in filters:
+        where.append("o.order_date < %s")
+        params.append(datetime.strptime(filters['date_to'], '%Y-%m-%d') + timedelta(days=1))
+    return where, params
+
+def fetch_orders_page(cur, args):
+    filters = parse_order_filters(args)
+    try:
+        size = int(args.get('per_page') or current_app.config['ORDERS_PAGE_SIZE'])
+    except ValueError:
+        size = current_app.config['ORDERS_PAGE_SIZE']
+    size = max(1, min(size, MAX_ORDERS_PAGE_SIZE))
+
+    where, params = order_filter_clauses(filters)
+
+    after = decode_order_cursor(args.get('after'))
+    before = None if after else decode_order_cursor(args.get('before'))
+    if after:
+        where.append("(o.order_date < %s OR (o.order_date = %s AND o.order_id < %s))")
+        params.extend([after[0], after[0], after[1]])
+        order_by = "o.order_date DESC, o.order_id DESC"
+    elif before:
+        where.append("(o.order_date > %s OR (o.order_date = %s AND o.order_id > %s))")
+        params.extend([before[0], before[0], before[1]])
+        order_by = "o.order_date ASC, o.order_id ASC"
+    else:
+        order_by = "o.order_date DESC, o.order_id DESC"
+
+    orders = repository.select_orders(cur, where, params, order_by, limit=size + 1)
+
+    more = len(orders) > size
+    orders = orders[:size]
+    if before:
+        orders.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after is not None, more
+
+    return {
+        'orders': orders,
+        'filters': filters,
+        'next': encode_order_cursor(orders[-1]) if orders and has_next else None,
+        'prev': encode_order_cursor(orders[0]) if orders and has_prev else None,
+    }
 
 # ---------------- Routes ----------------
-@app.route('/')
+@bp.route('/')
+@cached_page()
 def home():
     foods = []
-    cur = get_cursor()
     try:
-        cur.execute("""
-            SELECT 
-                food_id, food_name, category, price, image_url,
-                COALESCE(discount_percent, 0) AS discount_percent
-            FROM food 
-            WHERE available = 1 
-            LIMIT 3
-        """)
-        foods = cur.fetchall()
-
-        coupon = session.get('coupon')
-        for f in foods:
-            f['discounted_price'] = calculate_food_price(f, coupon)
+        foods = apply_prices(menu_catalog.available_foods()[:3], active_coupon())
     except Exception as e:
         print("Error:", e)
-    finally:
-        cur.close()
     return render_template('index.html', foods=foods)
 
 # ---------------- Auth ----------------
-@app.route('/auth', methods=['GET', 'POST'])
+@bp.route('/auth', methods=['GET', 'POST'])
 def auth():
     if request.method == 'POST':
         action = request.form.get('action')
@@ -95,13 +551,12 @@ def auth():
         if action == 'login':
             cur = get_cursor()
             try:
-                cur.execute("SELECT * FROM users WHERE username = %s", (username,))
-                user = cur.fetchone()
+                user = repository.find_user(cur, username)
                 if user and check_password_hash(user['password'], password):
                     session['username'] = user['username']
                     session['login_type'] = user['login_type']
                     flash(f"{user['login_type'].title()} login successful!", 'success')
-                    return redirect(url_for('admin_dashboard') if user['login_type'] == 'admin' else url_for('home'))
+                    return redirect(url_for('main.admin_dashboard') if user['login_type'] == 'admin' else url_for('main.home'))
                 flash('Invalid credentials.', 'error')
             except Exception as e:
                 logging.exception("Login error: %s", e)
@@ -119,18 +574,14 @@ def auth():
             else:
                 cur = get_cursor(dict_cursor=False)
                 try:
-                    cur.execute("SELECT 1 FROM users WHERE username = %s", (username,))
-                    if cur.fetchone():
+                    if repository.username_taken(cur, username):
                         flash('Username taken.', 'error')
                     else:
                         hashed = generate_password_hash(password)
-                        cur.execute(
-                            "INSERT INTO users (username, password, email, login_type) VALUES (%s, %s, %s, %s)",
-                            (username, hashed, email, login_type)
-                        )
+                        repository.create_user(cur, username, hashed, email, login_type)
                         mysql.connection.commit()
                         flash('Registered! Please login.', 'success')
-                        return redirect(url_for('auth'))
+                        return redirect(url_for('main.auth'))
                 except Exception as e:
                     mysql.connection.rollback()
                     logging.exception("Register error: %s", e)
@@ -139,7 +590,7 @@ def auth():
                     cur.close()
     return render_template('auth.html')
 
-@app.route('/auth-admin', methods=['GET', 'POST'])
+@bp.route('/auth-admin', methods=['GET', 'POST'])
 def auth_admin():
     if request.method == 'POST':
         action = request.form.get('action')
@@ -151,13 +602,12 @@ def auth_admin():
         if action == 'login':
             cur = get_cursor()
             try:
-                cur.execute("SELECT * FROM users WHERE username = %s AND login_type = 'admin'", (username,))
-                user = cur.fetchone()
+                user = repository.find_user(cur, username, login_type='admin')
                 if user and check_password_hash(user['password'], password):
                     session['username'] = user['username']
                     session['login_type'] = 'admin'
                     flash('Admin login success!', 'success')
-                    return redirect(url_for('admin_dashboard'))
+                    return redirect(url_for('main.admin_dashboard'))
                 flash('Invalid admin login.', 'error')
             finally:
                 cur.close()
@@ -168,18 +618,14 @@ def auth_admin():
             else:
                 cur = get_cursor(dict_cursor=False)
                 try:
-                    cur.execute("SELECT 1 FROM users WHERE username = %s", (username,))
-                    if cur.fetchone():
+                    if repository.username_taken(cur, username):
                         flash('Admin username exists.', 'error')
                     else:
                         hashed = generate_password_hash(password)
-                        cur.execute(
-                            "INSERT INTO users (username, password, email, login_type) VALUES (%s, %s, %s, 'admin')",
-                            (username, hashed, email)
-                        )
+                        repository.create_user(cur, username, hashed, email, 'admin')
                         mysql.connection.commit()
                         flash('Admin registered!', 'success')
-                        return redirect(url_for('auth_admin'))
+                        return redirect(url_for('main.auth_admin'))
                 except Exception as e:
                     mysql.connection.rollback()
                     logging.exception("Admin reg error: %s", e)
@@ -188,210 +634,327 @@ def auth_admin():
                     cur.close()
     return render_template('auth-admin.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
     flash('Logged out.', 'info')
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
 # ---------------- Menu ----------------
-@app.route('/menu')
+@bp.route('/menu')
 @login_required
+@cached_page('search', 'category')
 def menu():
     search = request.args.get('search', '').strip()
     cat = request.args.get('category', '').strip()
-    cur = get_cursor()
+    coupon = None
     foods = []
     categories = []
     try:
-        q = "SELECT * FROM food WHERE available = 1"
-        p = []
+        coupon = active_coupon()
         if search:
-            q += " AND food_name LIKE %s"
-            p.append(f"%{search}%")
-        if cat:
-            q += " AND category = %s"
-            p.append(cat)
-        cur.execute(q, p)
-        foods = cur.fetchall() or []
-
-        coupon = session.get('coupon')
-        for f in foods:
-            f['discounted_price'] = calculate_food_price(f, coupon)
+            foods = search_menu(search, category=cat)
+        else:
+            foods = menu_catalog.available_foods(category=cat)
+        apply_prices(foods, coupon)
 
-        cur.execute("SELECT DISTINCT category FROM food WHERE available = 1")
-        categories = [r['category'] for r in cur.fetchall()]
+        categories = menu_catalog.categories()
     except Exception as e:
         logging.exception("Menu error: %s", e)
         flash('Menu load failed.', 'error')
-    finally:
-        cur.close()
     return render_template('menu.html', foods=foods, categories=categories, coupon=coupon)
 
-# ---------------- Coupon System (FIXED) ----------------
-@app.route('/apply_coupon', methods=['POST'])
+@bp.route('/api/menu/suggest')
+@login_required
+def menu_suggest():
+    q = request.args.get('q', '').strip()
+    if len(q) < 1:
+        return jsonify(results=[])
+    prices = menu_prices(active_coupon())
+    results = [{
+        'food_id': f['food_id'],
+        'food_name': f['food_name'],
+        'category': f['category'],
+        'image_url': f['image_url'],
+        'price': float(prices.get(f['food_id'], 0)),
+    } for f in search_menu(q, limit=8)]
+    return jsonify(results=results)
+
+# ---------------- Menu API ----------------
+# The menu as compact JSON for app.js, which keeps a copy in localStorage,
+# filters it by category and reprices it for a new coupon without asking
+# for the page again. The version is the catalog version plus a tag for the
+# coupon the prices are for; `?since=<version>` returns only the dishes
+# changed (or deleted, or taken off the menu) since then, and a full copy
+# when that version is unknown to this worker or was priced for another
+# coupon. Responses carry an ETag, so an unchanged menu is a 304. Photos
+# come as the same derivative URLs picture() puts in the page; new
+# derivatives change the tag too, so clients pick them up with a full copy.
+MENU_API_FIELDS = ('food_id', 'food_name', 'category', 'price', 'discount_percent', 'final',
+                   'image', 'srcset', 'webp_srcset')
+
+def coupon_tag(rule):
+    # Changes when the coupon does, including an edit to the same code.
+    if rule is None:
+        return ''
+    digest = hashlib.sha1(f"{rule.kind}|{rule.amount}|{rule.category}".encode()).hexdigest()[:8]
+    return f"{rule.code}-{digest}"
+
+def menu_api_tag(rule):
+    images = hashlib.sha1(str(image_derivatives.version).encode()).hexdigest()[:6]
+    return f"{coupon_tag(rule)}-{images}"
+
+def parse_menu_since(value, tag):
+    # The catalog version a client holds, if its prices are for `tag`.
+    version, _, client_tag = value.partition('.')
+    try:
+        version = int(version)
+    except ValueError:
+        return None
+    return version if client_tag == tag else None
+
+def menu_api_row(food, prices):
+    return [food['food_id'], food['food_name'], food['category'], float(money(food['price'])),
+            float(food.get('discount_percent') or 0), float(prices.get(food['food_id'], 0)),
+            *image_derivatives.sources(food.get('image_url'))]
+
+@bp.route('/api/menu')
+@login_required
+def menu_api():
+    rule = active_coupon()
+    tag = menu_api_tag(rule)
+    since = request.args.get('since', '').strip()
+    response = Response(mimetype='application/json')
+    response.set_etag(f"menu-{menu_catalog.version}.{tag}-{since}")
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    if request.if_none_match.contains(response.get_etag()[0]):
+        return response.make_conditional(request)
+
+    known = parse_menu_since(since, tag)
+    changes = menu_catalog.changes_since(known) if known is not None else None
+    if changes is None:
+        version, foods = menu_catalog.snapshot()
+        changed, removed = [f for f in foods if f.get('available')], []
+    else:
+        version, foods, removed = changes
+        changed = [f for f in foods if f.get('available')]
+        removed = sorted(removed + [f['food_id'] for f in foods if not f.get('available')])
+    prices = menu_prices(rule)
+    response.set_data(json.dumps({
+        'version': f"{version}.{tag}",
+        'full': changes is None,
+        'fields': MENU_API_FIELDS,
+        'foods': [menu_api_row(f, prices) for f in changed],
+        'removed': removed,
+        'categories': menu_catalog.categories(),
+        'coupon': rule.session_data() if rule else None,
+    }, separators=(',', ':')))
+    return response.make_conditional(request)
+
+# ---------------- Coupon System ----------------
+@bp.route('/apply_coupon', methods=['POST'])
+@admitted('apply_coupon')
 @login_required
 def apply_coupon():
     code = request.form.get('coupon_code', '').strip().upper()
-    if code == "PNC":
-        coupon = {'code': code, 'discount': 0.20}  # 20% off
-        session['coupon'] = coupon
-        return jsonify(success=True, message="20% off applied!", coupon=coupon)
-    else:
+    rule = coupon_book.get(code)
+    if rule is not None and rule.max_uses is not None:
+        cur = get_cursor()
+        try:
+            if not coupons.uses_left(cur, rule.code):
+                rule = None
+        finally:
+            cur.close()
+    if rule is None:
         session.pop('coupon', None)
         return jsonify(success=False, message="Invalid coupon code.")
+    coupon = rule.session_data()
+    session['coupon'] = coupon
+    return jsonify(success=True, message=f"{rule.label} applied!", coupon=coupon)
 
-@app.route('/coupon', methods=['GET'])
+@bp.route('/coupon', methods=['GET'])
 @login_required
 def get_coupon():
-    coupon = session.get('coupon')
-    return jsonify(coupon=coupon)
+    rule = active_coupon()
+    return jsonify(coupon=rule.session_data() if rule else None)
 
-@app.route('/remove_coupon', methods=['POST'])
+@bp.route('/remove_coupon', methods=['POST'])
 @login_required
 def remove_coupon():
     removed = session.pop('coupon', None) is not None
     return jsonify(success=removed, message="Coupon removed." if removed else "No coupon was active.")
 
 # ---------------- Order ----------------
-@app.route('/order/<int:food_id>', methods=['GET', 'POST'])
+@bp.route('/order/<int:food_id>', methods=['GET', 'POST'])
+@admitted('order', methods=('POST',))
 @login_required
 def order(food_id):
-    cur = get_cursor()
-    try:
-        cur.execute("SELECT * FROM food WHERE food_id = %s", (food_id,))
-        food = cur.fetchone()
-        if not food:
-            flash('Food not found.', 'error')
-            return redirect(url_for('menu'))
-
-        coupon = session.get('coupon')
-        food['discounted_price'] = calculate_food_price(food, coupon)
-
-        if request.method == 'POST':
-            name = request.form.get('customer_name', '').strip()
-            phone = request.form.get('phone', '').strip()
-            qty = request.form.get('quantity', '1')
-            delivery = request.form.get('delivery_option', 'delivery')
-            service = request.form.get('delivery_service', '').strip()
-            other = request.form.get('other_service', '').strip()
-            address = request.form.get('address', '').strip() if delivery == 'delivery' else ''
-            note = request.form.get('note', '').strip()
+    food = menu_catalog.get(food_id)
+    if not food:
+        flash('Food not found.', 'error')
+        return redirect(url_for('main.menu'))
 
-            try:
-                qty = int(qty)
-                if qty <= 0: raise ValueError
-            except:
-                flash('Invalid quantity.', 'error')
-                return render_template('order_form.html', food=food, coupon=coupon)
+    rule = active_coupon()
+    coupon = rule.session_data() if rule else None
+    food['discounted_price'] = menu_prices(rule).get(food_id, money(food['price']))
 
-            if service == 'other' and other:
-                service = other
+    if request.method == 'POST':
+        customer = parse_customer(request.form)
+        qty = request.form.get('quantity', '1')
 
-            total = round(food['discounted_price'] * qty, 2)
+        try:
+            qty = int(qty)
+            if qty <= 0: raise ValueError
+        except:
+            flash('Invalid quantity.', 'error')
+            return render_template('order_form.html', food=food, coupon=coupon)
 
-            ins = get_cursor(dict_cursor=False)
-            try:
-                ins.execute("""
-                    INSERT INTO orders 
-                    (customer_name, phone, address, note, food_id, quantity, total_price,
-                     delivery_option, delivery_service, order_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """, (name, phone, address, note, food_id, qty, total, delivery, service))
-                mysql.connection.commit()
-                order_id = ins.lastrowid
-            finally:
-                ins.close()
+        unit_price = food['discounted_price']
+        lines = [{'food_id': food_id, 'food_name': food['food_name'], 'quantity': qty,
+                  'unit_price': unit_price, 'line_total': money(unit_price * qty)}]
 
-            return redirect(url_for('order_success', order_id=order_id))
-    finally:
-        cur.close()
+        key = request_intake_key(request.form)
+        try:
+            submit_order(key, customer, lines, lines[0]['line_total'], rule)
+        except Exception as e:
+            logging.exception("Order error: %s", e)
+            flash('Order failed, please try again.', 'error')
+            return render_template('order_form.html', food=food, coupon=coupon)
+        return redirect(url_for('main.order_received', key=key))
 
     return render_template('order_form.html', food=food, coupon=coupon)
 
-@app.route('/order_success/<int:order_id>')
+# ---------------- Cart & Checkout ----------------
+def cart_payload():
+    rule = active_coupon()
+    lines, total = price_cart(get_cart(), rule)
+    for l in lines:
+        l['unit_price'], l['line_total'] = float(l['unit_price']), float(l['line_total'])
+    return jsonify(items=lines, total=float(total), coupon=rule.session_data() if rule else None)
+
+@bp.route('/cart', methods=['GET', 'POST'])
+@login_required
+def cart():
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        current = {} if data.get('replace') else get_cart()
+        items = data.get('items') if isinstance(data.get('items'), list) else [data]
+        for item in items:
+            try:
+                food_id = str(int(item.get('food_id')))
+                qty = int(item.get('quantity', 1))
+            except (TypeError, ValueError):
+                return jsonify(success=False, error="Invalid cart item"), 400
+            current[food_id] = qty
+        save_cart(current)
+    return cart_payload()
+
+@bp.route('/checkout', methods=['GET', 'POST'])
+@login_required
+def checkout():
+    rule = active_coupon()
+    coupon = rule.session_data() if rule else None
+    lines, total = price_cart(get_cart(), rule)
+    if not lines:
+        flash('Your cart is empty.', 'error')
+        return redirect(url_for('main.menu'))
+
+    if request.method == 'POST':
+        customer = parse_customer(request.form)
+        if not customer['name'] or not customer['phone']:
+            flash('Name and phone are required.', 'error')
+            return render_template('checkout.html', lines=lines, total=total, coupon=coupon)
+
+        key = request_intake_key(request.form)
+        try:
+            submit_order(key, customer, lines, total, rule)
+        except Exception as e:
+            logging.exception("Checkout error: %s", e)
+            flash('Checkout failed, please try again.', 'error')
+            return render_template('checkout.html', lines=lines, total=total, coupon=coupon)
+
+        session.pop('cart', None)
+        return redirect(url_for('main.order_received', key=key))
+
+    return render_template('checkout.html', lines=lines, total=total, coupon=coupon)
+
+@bp.route('/order/received/<key>')
+@login_required
+def order_received(key):
+    # Where order() and checkout() land: waits briefly for the drainer, then
+    # either shows the placed order or a page that keeps checking.
+    entry = intake_queue.wait(scoped_intake_key(key), current_app.config['INTAKE_ACK_WAIT'])
+    if entry is None or entry['kind'] != 'order':
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
+    if entry['status'] == intake.DONE:
+        return redirect(url_for('main.order_success', order_id=int(entry['result'])))
+    if entry['status'] == intake.FAILED:
+        flash('We could not place your order. Please call us to confirm it.', 'error')
+        return redirect(url_for('main.menu'))
+    return render_template('order_received.html')
+
+@bp.route('/order_success/<int:order_id>')
 @login_required
 def order_success(order_id):
-    cur = get_cursor()
-    try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url 
-            FROM orders o JOIN food f ON o.food_id = f.food_id 
-            WHERE o.order_id = %s
-        """, (order_id,))
-        order = cur.fetchone()
-        if not order:
-            flash('Order not found.', 'error')
-            return redirect(url_for('order_list'))
-    finally:
-        cur.close()
+    order, _ = order_detail(order_id)
+    if not order:
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
     return render_template('order_success.html', order=order)
 
 # ---------------- Receipt & Payment ----------------
-@app.route('/order/<int:order_id>/receipt')
+@bp.route('/order/<int:order_id>/receipt')
 def view_receipt(order_id):
-    cur = get_cursor()
-    try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url FROM orders o
-            JOIN food f ON o.food_id = f.food_id WHERE o.order_id = %s
-        """, (order_id,))
-        order = cur.fetchone()
-        if not order:
-            flash('Order not found.', 'error')
-            return redirect(url_for('order_list'))
-    finally:
-        cur.close()
-    return render_template('receipt.html', order=order)
+    order, items = order_detail(order_id)
+    if not order:
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
+    return render_template('receipt.html', order=order, items=items)
 
-@app.route('/order/<int:order_id>/pay', methods=['GET', 'POST'])
+@bp.route('/order/<int:order_id>/pay', methods=['GET', 'POST'])
 @login_required
 def pay_order_page(order_id):
-    cur = get_cursor()
-    try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url FROM orders o
-            JOIN food f ON o.food_id = f.food_id WHERE o.order_id = %s
-        """, (order_id,))
-        order = cur.fetchone()
-        if not order:
-            flash('Order not found.', 'error')
-            return redirect(url_for('order_list'))
-
-        if request.method == 'POST':
-            method = request.form.get('payment_method', 'Cash')
-            up = get_cursor(dict_cursor=False)
-            try:
-                up.execute("UPDATE orders SET payment_method=%s, payment_date=NOW() WHERE order_id=%s",
-                           (method, order_id))
-                mysql.connection.commit()
-                flash(f'Paid with {method}!', 'success')
-                return redirect(url_for('payment_success', order_id=order_id))
-            finally:
-                up.close()
-    finally:
-        cur.close()
-    return render_template('pay_order.html', order=order)
+    order, items = order_detail(order_id)
+    if not order or order.get('archived'):
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
 
-@app.route('/payment_success/<int:order_id>')
+    if request.method == 'POST':
+        method = request.form.get('payment_method', 'Cash')
+        up = get_cursor(dict_cursor=False)
+        try:
+            up.execute("SELECT payment_date FROM orders WHERE order_id=%s FOR UPDATE", (order_id,))
+            row = up.fetchone()
+            was_paid = bool(row and row[0])
+            up.execute("UPDATE orders SET payment_method=%s, payment_date=NOW() WHERE order_id=%s",
+                       (method, order_id))
+            if not was_paid:
+                rollups.order_paid(up, order_id)
+            mysql.connection.commit()
+            order_cache.invalidate([order_id])
+            order_events.publish(events.ORDER_PAID, {'order_id': order_id, 'payment_method': method})
+            prerender_receipt(order_id)
+            flash(f'Paid with {method}!', 'success')
+            return redirect(url_for('main.payment_success', order_id=order_id))
+        finally:
+            up.close()
+    return render_template('pay_order.html', order=order, items=items)
+
+@bp.route('/payment_success/<int:order_id>')
 @login_required
 def payment_success(order_id):
-    cur = get_cursor()
-    try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url FROM orders o
-            JOIN food f ON o.food_id = f.food_id WHERE o.order_id = %s
-        """, (order_id,))
-        order = cur.fetchone()
-        if not order:
-            flash('Order not found.', 'error')
-            return redirect(url_for('order_list'))
-    finally:
-        cur.close()
-    return render_template('payment_success.html', order=order)
+    order, items = order_detail(order_id)
+    if not order:
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
+    return render_template('payment_success.html', order=order, items=items)
 
 # ---------------- Feedback ----------------
-@app.route('/submit_feedback', methods=['POST'])
+@bp.route('/submit_feedback', methods=['POST'])
+@admitted('submit_feedback')
 @login_required
 def submit_feedback():
     try:
@@ -402,47 +965,40 @@ def submit_feedback():
         if not all([name, email, message]):
             return jsonify(success=False, error="All fields required"), 400
 
-        cur = get_cursor()
-        cur.execute(
-            "INSERT INTO feedback (name, email, message) VALUES (%s, %s, %s)",
-            (name, email, message)
-        )
-        mysql.connection.commit()
-        cur.close()
+        intake_queue.submit('feedback', scoped_intake_key(request_intake_key(request.form)),
+                            {'name': name, 'email': email, 'message': message})
         return jsonify(success=True)
 
     except Exception as e:
-        print("Feedback DB Error:", str(e))
+        logging.exception("Feedback error: %s", e)
         return jsonify(success=False, error="Database error"), 500
 
 # ---------------- User Order List ----------------
-@app.route('/order-list')
+@bp.route('/order-list')
 @login_required
 def order_list():
     cur = get_cursor()
-    orders = []
+    page = {'orders': [], 'filters': parse_order_filters(request.args), 'next': None, 'prev': None}
     try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url 
-            FROM orders o JOIN food f ON o.food_id = f.food_id
-            ORDER BY o.order_date DESC
-        """)
-        orders = cur.fetchall()
+        page = fetch_orders_page(cur, request.args)
     except Exception as e:
         logging.exception("Order list error: %s", e)
         flash('Failed to load orders.', 'error')
     finally:
         cur.close()
-    return render_template('order_list.html', orders=orders)
+    return render_template('order_list.html', orders=page['orders'], page=page)
 
-@app.route('/delete_order/<int:order_id>', methods=['POST'])
+@bp.route('/delete_order/<int:order_id>', methods=['POST'])
 @login_required
 def delete_order(order_id):
     cur = get_cursor(dict_cursor=False)
     try:
+        rollups.order_removed(cur, order_id)
         cur.execute("DELETE FROM orders WHERE order_id = %s", (order_id,))
         if cur.rowcount:
             mysql.connection.commit()
+            order_cache.invalidate([order_id])
+            order_events.publish(events.ORDER_DELETED, {'order_id': order_id})
             flash('Order deleted.', 'success')
         else:
             flash('Order not found.', 'warning')
@@ -452,39 +1008,108 @@ def delete_order(order_id):
         flash('Delete failed.', 'error')
     finally:
         cur.close()
-    return redirect(url_for('order_list'))
+    return redirect(url_for('main.order_list'))
 
 # ---------------- Admin Dashboard ----------------
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @admin_required
 def admin_dashboard():
+    range_key = request.args.get('range', rollups.DEFAULT_RANGE)
+    if range_key not in rollups.RANGES:
+        range_key = rollups.DEFAULT_RANGE
     cur = get_cursor()
     try:
-        cur.execute("SELECT COUNT(*) AS total FROM orders"); total_orders = cur.fetchone()['total']
-        cur.execute("SELECT COALESCE(SUM(total_price),0) AS revenue FROM orders"); total_revenue = cur.fetchone()['revenue']
-        cur.execute("SELECT COUNT(*) AS pending FROM orders WHERE delivery_option = 'Pending'"); pending_orders = cur.fetchone()['pending']
-        cur.execute("SELECT order_id, customer_name, total_price, order_date, delivery_option FROM orders ORDER BY order_date DESC LIMIT 5")
-        recent = cur.fetchall()
+        totals = rollups.summary(cur, range_key)
+        total_orders = totals['total_orders']
+        total_revenue = totals['total_revenue']
+        pending_orders = totals['pending_orders']
+        paid_revenue = totals['paid_revenue']
+        categories = rollups.by_category(cur, range_key)
+        recent = repository.recent_orders(cur)
     except Exception as e:
         logging.exception("Dashboard error: %s", e)
-        total_orders = total_revenue = pending_orders = 0
-        recent = []
+        total_orders = total_revenue = pending_orders = paid_revenue = 0
+        categories = recent = []
     finally:
         cur.close()
     return render_template('dashboard.html',
                            total_orders=total_orders,
                            total_revenue=total_revenue,
                            pending_orders=pending_orders,
+                           paid_revenue=paid_revenue,
+                           category_totals=categories,
+                           ranges=list(rollups.RANGES),
+                           range_key=range_key,
                            recent_orders=recent)
 
+# ---------------- Bulk Admin Actions ----------------
+# Multi-select actions on manage-orders run as one set-based statement per
+# table inside the request's transaction, whatever the selection size.
+ORDER_STATUSES = ('Pending', 'Preparing', 'Completed')
+MAX_BULK_ORDERS = 500
+
+def parse_bulk_ids(values):
+    ids = []
+    for value in values:
+        try:
+            order_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if order_id not in ids:
+            ids.append(order_id)
+    return ids[:MAX_BULK_ORDERS]
+
+def in_clause(ids):
+    return ', '.join(['%s'] * len(ids))
+
+def bulk_update_order_status(cur, order_ids, status):
+    rollups.orders_removed(cur, order_ids)
+    cur.execute(f"UPDATE orders SET delivery_option = %s WHERE order_id IN ({in_clause(order_ids)})",
+                [status] + order_ids)
+    count = cur.rowcount
+    rollups.orders_added(cur, order_ids)
+    return count
+
+def bulk_delete_orders(cur, order_ids):
+    rollups.orders_removed(cur, order_ids)
+    cur.execute(f"DELETE FROM orders WHERE order_id IN ({in_clause(order_ids)})", order_ids)
+    return cur.rowcount
+
+# One row per order line; the order's own fields repeat on each of its lines.
+ORDER_EXPORT_COLUMNS = ('order_id', 'order_date', 'customer_name', 'phone', 'address', 'note',
+                        'order_item_id', 'food_name', 'quantity', 'unit_price', 'line_total',
+                        'total_price', 'delivery_option', 'delivery_service',
+                        'payment_method', 'payment_date')
+
+def order_export_select(source, where):
+    # Lines of orders (or orders_archive, whose dish name was copied in).
+    # Orders from before order_items existed are exported as their single
+    # header line.
+    items, name = {'orders': ('order_items', 'f.food_name'),
+                   'orders_archive': ('order_items_archive', 'o.food_name')}[source]
+    return f"""
+        SELECT o.order_id AS order_id, o.order_date AS order_date,
+               o.customer_name, o.phone, o.address, o.note,
+               i.order_item_id AS order_item_id,
+               COALESCE(i.food_name, {name}) AS food_name,
+               COALESCE(i.quantity, o.quantity) AS quantity,
+               COALESCE(i.unit_price, o.total_price / o.quantity) AS unit_price,
+               COALESCE(i.line_total, o.total_price) AS line_total,
+               o.total_price, o.delivery_option, o.delivery_service, o.payment_method, o.payment_date
+        FROM {source} o
+        LEFT JOIN {items} i ON i.order_id = o.order_id
+        LEFT JOIN food f ON o.food_id = f.food_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+    """
+
 # ---------------- Manage Menu ----------------
-@app.route('/manage-menu', methods=['GET', 'POST'])
+@bp.route('/manage-menu', methods=['GET', 'POST'])
 @admin_required
 def manage_menu():
-    cursor = get_cursor()
     foods = []
 
     if request.method == 'POST':
+        cursor = get_cursor()
         action = request.form.get('action')
         food_id = request.form.get('food_id')
         name = request.form.get('food_name')
@@ -503,35 +1128,95 @@ def manage_menu():
                 flash('Item added!', 'success')
 
             elif action == 'edit' and food_id:
+                cursor.execute("SELECT category FROM food WHERE food_id=%s FOR UPDATE", (food_id,))
+                row = cursor.fetchone()
+                moved = row is not None and row['category'] != category
+                if moved:
+                    rollups.food_removed(cursor, food_id)
                 cursor.execute("""
                     UPDATE food SET food_name=%s, category=%s, price=%s, 
                     discount_percent=%s, image_url=%s, available=%s WHERE food_id=%s
                 """, (name, category, price, discount, image_url or None, available, food_id))
+                if moved:
+                    rollups.food_added(cursor, food_id)
                 flash('Item updated!', 'success')
 
             elif action == 'delete' and food_id:
+                rollups.food_removed(cursor, food_id)
                 cursor.execute("DELETE FROM food WHERE food_id=%s", (food_id,))
+                rollups.food_added(cursor, food_id)  # orders that keep a line of it
                 flash('Item deleted!', 'warning')
 
             mysql.connection.commit()
+            if action in ('add', 'edit', 'delete'):
+                menu_catalog.bump_version()
+            if action in ('add', 'edit') and image_url:
+                image_derivatives.process_async([image_url])
         except Exception as e:
             mysql.connection.rollback()
             logging.exception("Menu CRUD error: %s", e)
             flash('Operation failed.', 'error')
+        finally:
+            cursor.close()
 
     try:
-        cursor.execute("SELECT * FROM food ORDER BY food_id")
-        foods = cursor.fetchall()
+        foods = menu_catalog.all_foods()
     except Exception as e:
         logging.exception("Load menu error: %s", e)
         flash('Failed to load menu.', 'error')
-    finally:
-        cursor.close()
 
     return render_template('manage_menu.html', foods=foods)
 
+@bp.route('/manage-menu/import', methods=['POST'])
+@admin_required
+def import_menu():
+    # Accepts an uploaded CSV/JSON file from the manage-menu page, or a JSON
+    # list of items posted directly (answered with a JSON report).
+    wants_json = request.is_json
+    report = {'written': 0, 'errors': []}
+    try:
+        if wants_json:
+            rows = menu_import.parse('import.json', request.get_data())
+        else:
+            upload = request.files.get('menu_file')
+            if not upload or not upload.filename:
+                flash('Choose a CSV or JSON file to import.', 'error')
+                return redirect(url_for('main.manage_menu'))
+            rows = menu_import.parse(upload.filename, upload.read())
+    except ValueError as e:
+        if wants_json:
+            return jsonify(success=False, error=str(e)), 400
+        flash(f'Import failed: {e}', 'error')
+        return redirect(url_for('main.manage_menu'))
+
+    clean, errors = menu_import.validate(rows)
+    cur = get_cursor(dict_cursor=False)
+    try:
+        written, db_errors = menu_import.upsert(cur, clean)
+        mysql.connection.commit()
+        report = {'written': written, 'errors': sorted(errors + db_errors)}
+        if written:
+            menu_catalog.bump_version()
+            image_derivatives.process_async({row['image_url'] for _, row in clean if row['image_url']})
+    except Exception as e:
+        mysql.connection.rollback()
+        logging.exception("Menu import error: %s", e)
+        if wants_json:
+            return jsonify(success=False, error="Import failed."), 500
+        flash('Import failed.', 'error')
+        return redirect(url_for('main.manage_menu'))
+    finally:
+        cur.close()
+
+    if wants_json:
+        return jsonify(success=True, written=report['written'],
+                       errors=[{'row': line, 'error': msg} for line, msg in report['errors']])
+    flash(f"Imported {report['written']} item(s), {len(report['errors'])} row(s) skipped.",
+          'success' if not report['errors'] else 'warning')
+    return render_template('manage_menu.html', foods=menu_catalog.all_foods(), import_errors=report['errors'])
+
 # ---------------- Manage Orders (Admin) ----------------
-@app.route('/manage-orders', methods=['GET', 'POST'])
+@bp.route('/manage-orders', methods=['GET', 'POST'])
 @admin_required
 def manage_orders():
     cursor = get_cursor()
@@ -541,130 +1226,567 @@ def manage_orders():
         status = request.form.get('status')
         action = request.form.get('action')
 
+        published = []
         try:
             if action == 'delete' and order_id:
+                rollups.order_removed(cursor, order_id)
                 cursor.execute("DELETE FROM orders WHERE order_id = %s", (order_id,))
+                published.append((events.ORDER_DELETED, {'order_id': int(order_id)}))
                 flash('Order deleted.', 'warning')
 
+            elif action in ('bulk_status', 'bulk_delete'):
+                order_ids = parse_bulk_ids(request.form.getlist('order_ids'))
+                if not order_ids:
+                    flash('No orders selected.', 'warning')
+                elif action == 'bulk_delete':
+                    count = bulk_delete_orders(cursor, order_ids)
+                    published += [(events.ORDER_DELETED, {'order_id': i}) for i in order_ids]
+                    flash(f'{count} orders deleted.', 'warning')
+                elif status in ORDER_STATUSES:
+                    count = bulk_update_order_status(cursor, order_ids, status)
+                    published += [(events.ORDER_STATUS, {'order_id': i, 'status': status}) for i in order_ids]
+                    flash(f'{count} orders set to {status}.', 'success')
+                else:
+                    flash('Choose a status for the selected orders.', 'warning')
+
             elif status and order_id:
+                rollups.order_removed(cursor, order_id)
                 cursor.execute("UPDATE orders SET delivery_option = %s WHERE order_id = %s", (status, order_id))
+                rollups.order_added(cursor, order_id)
+                published.append((events.ORDER_STATUS, {'order_id': int(order_id), 'status': status}))
                 flash(f'Status updated to {status}.', 'success')
 
             mysql.connection.commit()
+            order_cache.invalidate([data['order_id'] for _, data in published])
+            for event in published:
+                order_events.publish(*event)
         except Exception as e:
             mysql.connection.rollback()
             logging.exception("Manage orders error: %s", e)
             flash('Operation failed.', 'error')
         finally:
             cursor.close()
-            return redirect(url_for('manage_orders'))
+            return redirect(url_for('main.manage_orders', **request.args))
 
+    page = {'orders': [], 'filters': parse_order_filters(request.args), 'next': None, 'prev': None}
     try:
-        cursor.execute("""
-            SELECT o.*, f.food_name, f.image_url 
-            FROM orders o JOIN food f ON o.food_id = f.food_id 
-            ORDER BY o.order_date DESC
-        """)
-        orders = cursor.fetchall()
+        page = fetch_orders_page(cursor, request.args)
     except Exception as e:
         logging.exception("Load orders error: %s", e)
         flash('Failed to load orders.', 'error')
-        orders = []
     finally:
         cursor.close()
 
-    return render_template('manage_orders.html', orders=orders)
+    return render_template('manage_orders.html', orders=page['orders'], page=page)
+
+@bp.route('/orders/stream')
+@admin_required
+def order_stream():
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_id = None
+    try:
+        sub = order_events.subscribe(last_id)
+    except BrokerFull:
+        return Response("Too many live screens.", status=503, headers={'Retry-After': '30'})
+    response = Response(order_events.stream(sub), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    response.call_on_close(sub.close)
+    return response
+
+@bp.route('/kitchen')
+@admin_required
+def kitchen_display():
+    cur = get_cursor()
+    orders = []
+    try:
+        orders = repository.open_orders(cur, current_app.config['KITCHEN_ORDERS_LIMIT'])
+        items = repository.load_items_for_orders(cur, orders)
+        for order in orders:
+            order['items'] = items[order['order_id']]
+    except Exception as e:
+        logging.exception("Kitchen display error: %s", e)
+        flash('Failed to load orders.', 'error')
+    finally:
+        cur.close()
+    return render_template('kitchen.html', orders=orders)
+
+@bp.route('/admin/orders/export')
+@admin_required
+def export_orders():
+    # /admin/orders/export?format=csv|ndjson&status=&date_from=&date_to=[&gzip=1]
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify(success=False, error="format must be csv or ndjson"), 400
+    filters = parse_order_filters(request.args)
+    where, params = order_filter_clauses(filters)
+    sql = order_export_select('orders', where)
+    # `flask archive run` moves orders older than ARCHIVE_AFTER_DAYS; a
+    # range reaching back that far reads the archive too.
+    cutoff = datetime.now() - timedelta(days=current_app.config['ARCHIVE_AFTER_DAYS'])
+    if 'date_from' not in filters or datetime.strptime(filters['date_from'], '%Y-%m-%d') < cutoff:
+        sql += " UNION ALL " + order_export_select('orders_archive', where)
+        params = params * 2
+    sql += " ORDER BY order_date, order_id, order_item_id"
+    # The rows are read while the response streams, after the app context is gone.
+    connect = partial(mysql.connect, current_app._get_current_object())
+    body = exports.stream_query(connect, sql, params, fmt,
+                                columns=ORDER_EXPORT_COLUMNS if fmt == 'csv' else None)
+    filename = f"orders_{filters.get('date_from', 'all')}_{filters.get('date_to', 'now')}.{fmt}"
+    headers = {}
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if request.args.get('gzip') == '1':
+        # Explicit .gz download.
+        body, mimetype, filename = exports.gzip_stream(body), 'application/gzip', filename + '.gz'
+    elif request.accept_encodings['gzip']:
+        # Compressed on the wire, decompressed by the client.
+        body = exports.gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    headers['X-Accel-Buffering'] = 'no'
+    return Response(body, mimetype=mimetype, headers=headers)
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    # Scrapers authenticate with METRICS_TOKEN; without one configured the
+    # page is for logged-in admins only.
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    elif session.get('login_type') != 'admin':
+        return Response("Forbidden\n", status=403, mimetype='text/plain')
+    pool = mysql.stats()
+    live = order_events.stats()
+    extra = []
+    for key in ('size', 'idle', 'in_use', 'waiting'):
+        extra += metrics.gauge_lines(f'db_pool_{key}', f'Connection pool {key.replace("_", " ")}.', pool[key])
+    extra += metrics.counter_lines('db_pool_timeouts_total', 'Checkouts that timed out.', pool['timeouts'])
+    extra += metrics.gauge_lines('order_stream_clients', 'Open live order screens.', live['clients'])
+    pages = page_cache.stats()
+    extra += metrics.gauge_lines('page_cache_bytes', 'Rendered pages held in memory.', pages['bytes'])
+    extra += metrics.counter_lines('page_cache_hits_total', 'Page cache hits.', pages['hits'])
+    extra += metrics.counter_lines('page_cache_misses_total', 'Page cache misses.', pages['misses'])
+    queue = intake_queue.stats()
+    extra += metrics.gauge_lines('intake_depth', 'Journaled orders/feedback not yet written.', queue['depth'])
+    extra += metrics.gauge_lines('intake_lag_seconds', 'Age of the oldest entry waiting to be written.', queue['lag_seconds'])
+    extra += metrics.gauge_lines('intake_failed', 'Entries that gave up after max attempts.', queue['failed'])
+    details = order_cache.stats()
+    extra += metrics.gauge_lines('order_cache_entries', 'Order detail records held in memory.', details['entries'])
+    extra += metrics.counter_lines('order_cache_hits_total', 'Order detail cache hits.', details['hits'])
+    extra += metrics.counter_lines('order_cache_misses_total', 'Order detail cache misses.', details['misses'])
+    extra += admission.metric_lines()
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/admin/pool-stats')
+@admin_required
+def pool_stats():
+    return jsonify(mysql.stats())
+
+@bp.route('/admin/intake-stats')
+@admin_required
+def intake_stats():
+    return jsonify(intake_queue.stats())
+
+@bp.route('/admin/order-cache-stats')
+@admin_required
+def order_cache_stats():
+    return jsonify(order_cache.stats())
+
+@bp.route('/admin/admission-stats')
+@admin_required
+def admission_stats():
+    return jsonify(admission.stats())
 
 # ✅ NEW PDF DOWNLOAD ROUTE
-@app.route('/order/<int:order_id>/payment/pdf')
+@bp.route('/order/<int:order_id>/payment/pdf')
 @login_required
 def download_payment_pdf(order_id):
-    from flask import make_response  # ensure imported at top
+    order, items = order_detail(order_id)
+    if not order:
+        flash('Order not found.', 'error')
+        return redirect(url_for('main.order_list'))
+    if not order['payment_date']:
+        flash('This order has not been paid yet.', 'error')
+        return redirect(url_for('main.pay_order_page', order_id=order_id))
+
+    path = receipt_cache.cached(order)
+    if not path:
+        future = receipt_cache.submit(order, items)
+        try:
+            path = future.result(timeout=current_app.config['RECEIPT_RENDER_WAIT'])
+        except concurrent.futures.TimeoutError:
+            return Response("Your receipt is being prepared, please wait...", status=202,
+                            headers={'Retry-After': '2', 'Refresh': '2'})
+
+    response = send_file(path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f'payment_receipt_{order_id}.pdf',
+                         etag=receipt_cache.etag(order), conditional=True)
+    response.cache_control.private = True
+    return response
 
-    cur = get_cursor()
+@bp.route('/admin/receipts/export')
+@admin_required
+def export_receipts():
+    day = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    fmt = request.args.get('format', 'zip')
     try:
-        cur.execute("""
-            SELECT o.*, f.food_name, f.image_url
-            FROM orders o
-            JOIN food f ON o.food_id = f.food_id
-            WHERE o.order_id = %s
-        """, (order_id,))
-        order = cur.fetchone()
-
-        if not order:
-            flash('Order not found.', 'error')
-            return redirect(url_for('order_list'))
+        start = datetime.strptime(day, '%Y-%m-%d')
+    except ValueError:
+        flash('Invalid date.', 'error')
+        return redirect(url_for('main.admin_dashboard'))
 
+    cur = get_cursor()
+    try:
+        orders = repository.paid_orders_between(cur, start, start + timedelta(days=1))
+        items = repository.load_items_for_orders(cur, orders)
     finally:
         cur.close()
 
-    # Create PDF in memory
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    pdf.setTitle(f"Payment Receipt #{order['order_id']}")
-
-    # Header
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawCentredString(300, 750, "✅ Payment Successful!")
-    pdf.setFont("Helvetica", 12)
-
-    y = 710
-    pdf.drawString(50, y, f"Order ID: {order['order_id']}")
-    y -= 20
-    pdf.drawString(50, y, f"Customer: {order['customer_name']}")
-    y -= 20
-    pdf.drawString(50, y, f"Phone: {order['phone']}")
-    y -= 20
-    pdf.drawString(50, y, f"Address: {order['address']}")
-    y -= 20
-    pdf.drawString(50, y, f"Delivery: {order['delivery_option']} via {order['delivery_service']}")
-
-    # Divider
-    y -= 30
-    pdf.line(50, y, 550, y)
-    y -= 30
-
-    # Table Header
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(50, y, "Food")
-    pdf.drawString(250, y, "Qty")
-    pdf.drawString(350, y, "Price")
-    pdf.drawString(450, y, "Total")
-    y -= 20
-
-    # Table Content
-    pdf.setFont("Helvetica", 12)
-    unit_price = order['total_price'] / order['quantity']
-    pdf.drawString(50, y, order['food_name'])
-    pdf.drawString(250, y, str(order['quantity']))
-    pdf.drawString(350, y, f"${unit_price:.2f}")
-    pdf.drawString(450, y, f"${order['total_price']:.2f}")
-
-    # Payment Info
-    y -= 40
-    pdf.line(50, y, 550, y)
-    y -= 30
-    pdf.drawString(50, y, f"Paid By: {order['payment_method']}")
-    y -= 20
-    pdf.drawString(50, y, f"Payment Date: {order['payment_date'].strftime('%Y-%m-%d %H:%M')}")
-
-    # Footer
-    pdf.setFont("Helvetica-Oblique", 12)
-    pdf.drawCentredString(300, 100, "Thank you for your payment! 🍕 Enjoy your meal!")
-
-    pdf.showPage()
-    pdf.save()
-
-    # Send file to user
-    pdf_out = buffer.getvalue()
-    buffer.close()
-
-    response = make_response(pdf_out)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=payment_receipt_{order_id}.pdf'
+    if not orders:
+        flash(f'No paid orders on {day}.', 'info')
+        return redirect(url_for('main.admin_dashboard'))
 
-    return response
+    receipts = [(o, items[o['order_id']]) for o in orders]
+    if fmt == 'pdf':
+        data = render_receipts_pdf(receipts, f"Receipts {day}")
+        mimetype, filename = 'application/pdf', f'receipts_{day}.pdf'
+    else:
+        data = receipt_cache.export_zip(receipts)
+        mimetype, filename = 'application/zip', f'receipts_{day}.zip'
+    return Response(data, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+# ---------------- App Factory ----------------
+def create_app(profile=None, **overrides):
+    """Build the app for a config profile (production, development, testing).
+
+    profile defaults to APP_PROFILE, then production; keyword arguments
+    override single settings. Every app gets its own subsystems (in
+    app.extensions), so several can live in one process, e.g. in tests.
+    """
+    profile = profile or os.environ.get('APP_PROFILE') or 'production'
+    if profile not in config.PROFILES:
+        raise ValueError(f"unknown profile {profile!r}; expected one of {', '.join(config.PROFILES)}")
+    app = Flask(__name__)
+    app.config.from_object(config.PROFILES[profile])
+    app.config.update(overrides)
+    for key, filename in config.INSTANCE_FILES.items():
+        if not app.config.get(key):
+            app.config[key] = os.path.join(app.instance_path, filename)
+    app.secret_key = app.config['SECRET_KEY'] or os.urandom(24)
+
+    mysql.init_app(app)
+    metrics.init_app(app)
+    app.register_blueprint(bp)
+
+    catalog = MenuCatalog(load_menu_rows, app.config['MENU_VERSION_FILE'])
+    index = MenuSearchIndex()
+    catalog.on_reload(index.sync)
+    catalog.on_reload(queue_missing_images)
+
+    images = ImageDerivatives(app.static_folder)
+    assets = AssetManifest(app.static_folder)
+    app.jinja_env.globals.update(picture=images.picture, srcset=images.srcset,
+                                 asset_url=assets.url, new_intake_key=new_intake_key)
+
+    admin_slots = app.config['ADMISSION_ADMIN_SLOTS']
+    app.extensions.update(
+        menu_catalog=catalog,
+        search_index=index,
+        coupon_book=CouponBook(load_coupon_rows, lambda: catalog.version),
+        price_table=PriceTable(),
+        image_derivatives=images,
+        static_assets=assets,
+        page_cache=PageCache(max_bytes=app.config['PAGE_CACHE_MAX_BYTES']),
+        order_cache=OrderCache(app.config['ORDER_CACHE_FILE'], ttl=app.config['ORDER_CACHE_TTL'],
+                               max_entries=app.config['ORDER_CACHE_MAX_ENTRIES']),
+        receipt_cache=ReceiptCache(app.config['RECEIPT_CACHE_DIR'], workers=app.config['RECEIPT_WORKERS'],
+                                   export_processes=app.config['RECEIPT_EXPORT_PROCESSES']),
+        order_events=EventBroker(app.config['ORDER_EVENTS_JOURNAL'],
+                                 buffer_size=app.config['ORDER_EVENTS_BUFFER'],
+                                 max_clients=app.config['ORDER_EVENTS_MAX_CLIENTS'],
+                                 poll_interval=app.config['ORDER_EVENTS_POLL']),
+        intake_queue=IntakeQueue(app.config['INTAKE_JOURNAL'], partial(mysql.connect, app),
+                                 {'order': drain_order, 'feedback': drain_feedback},
+                                 on_done=in_app_context(app, intake_done),
+                                 batch_size=app.config['INTAKE_BATCH_SIZE'],
+                                 max_attempts=app.config['INTAKE_MAX_ATTEMPTS']),
+        admission=AdmissionControl(
+            slots=app.config['ADMISSION_ROUTE_SLOTS'],
+            # By default public lanes leave admin_slots pool connections free.
+            public_slots=app.config['ADMISSION_PUBLIC_SLOTS'] or max(1, app.config['MYSQL_POOL_MAX'] - admin_slots),
+            admin_slots=admin_slots,
+            rate=app.config['ADMISSION_RATE'],
+            burst=app.config['ADMISSION_BURST'],
+            max_wait=app.config['ADMISSION_MAX_WAIT']),
+    )
+
+    if app.config['IMAGE_BUILD_ON_STARTUP'] and images.available:
+        images.process_async(images.source_urls())
+    if app.config['ASSET_BUILD_ON_STARTUP']:
+        try:
+            assets.build()
+        except OSError as e:
+            logging.warning("Static asset build skipped: %s", e)
+    return app
+
+def warmup(app):
+    # Loads what each worker would otherwise load on its first requests:
+    # compiled templates, the menu (and search index), coupon rules, the
+    # default price table and the PDF renderer. Run in a gunicorn master
+    # with preload_app (see gunicorn.conf.py) so the forked workers share
+    # these pages copy-on-write. Database connections must not cross the
+    # fork: the ones used here are closed again, and each worker fills its
+    # own pool (warm_pool) after forking.
+    started = time.perf_counter()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    receipts.preload()
+    with app.app_context():
+        static_assets.manifest()
+        image_derivatives.manifest()
+        try:
+            menu_prices()
+            coupon_book.rules()
+        except Exception as e:
+            logging.warning("Warmup could not load the menu: %s", e)
+    # After the context is torn down, so its connection is back in the pool.
+    app.extensions['mysql'].close()
+    logging.info("Warmup done in %.0f ms", (time.perf_counter() - started) * 1000)
+
+def warm_pool(app):
+    # Open MYSQL_POOL_MIN connections now rather than on the first requests.
+    try:
+        app.extensions['mysql'].fill()
+    except Exception as e:
+        logging.warning("Could not pre-open database connections: %s", e)
+
+def __getattr__(name):
+    # `app:app` (gunicorn, flask --app app, bench) keeps working: the default
+    # app is built on first access instead of at import.
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---------------- CLI ----------------
+@bp.cli.group()
+def db():
+    """Database schema migrations."""
+
+@db.command('upgrade')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this migration version.')
+def db_upgrade(target):
+    """Apply pending migrations from migrations/."""
+    conn = mysql.connect()
+    try:
+        applied = migrate.upgrade(conn, target)
+    finally:
+        conn.close()
+    for m in applied:
+        click.echo(f"Applied {m['version']:04d}_{m['name']}")
+    click.echo("Schema is up to date." if not applied else f"{len(applied)} migration(s) applied.")
+
+@db.command('status')
+def db_status():
+    """List migrations that have not been applied yet."""
+    conn = mysql.connect()
+    try:
+        todo = migrate.pending(conn)
+    finally:
+        conn.close()
+    for m in todo:
+        click.echo(f"Pending {m['version']:04d}_{m['name']}")
+    if not todo:
+        click.echo("Schema is up to date.")
+
+@db.command('explain')
+def db_explain():
+    """EXPLAIN the hot queries; exit 1 if one skips its index."""
+    conn = mysql.connect()
+    try:
+        results = migrate.check_plans(conn)
+    finally:
+        conn.close()
+    failed = False
+    for label, index, plan, ok in results:
+        keys = ', '.join(str(row.get('key')) for row in plan)
+        click.echo(f"{'OK  ' if ok else 'FAIL'} {label}: expected {index}, used {keys}")
+        failed = failed or not ok
+    if failed:
+        raise SystemExit(1)
+
+@bp.cli.group('rollups')
+def rollups_cli():
+    """Dashboard rollup tables."""
+
+@rollups_cli.command('backfill')
+def rollups_backfill():
+    """Rebuild the hourly/daily rollups from the orders table."""
+    conn = mysql.connect()
+    try:
+        rollups.backfill(conn)
+    finally:
+        conn.close()
+    click.echo("Order rollups rebuilt.")
+
+@bp.cli.group('archive')
+def archive_cli():
+    """Move old, finished orders out of the hot tables."""
+
+@archive_cli.command('run')
+@click.option('--days', type=click.IntRange(1), default=None,
+              help='Archive orders older than this many days (default ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=click.IntRange(1), default=None, help='Orders per transaction.')
+@click.option('--pause', type=click.FloatRange(0), default=0.1, help='Seconds between batches.')
+@click.option('--dry-run', is_flag=True, help='Only report what would be moved.')
+def archive_run(days, batch_size, pause, dry_run):
+    """Archive paid, completed orders past the horizon (safe to run from cron)."""
+    before = datetime.now() - timedelta(days=days or current_app.config['ARCHIVE_AFTER_DAYS'])
+    conn = mysql.connect()
+    try:
+        if dry_run:
+            cur = conn.cursor()
+            count, oldest = archive.eligible(cur, before)
+            cur.close()
+            click.echo(f"{count} order(s) before {before:%Y-%m-%d %H:%M} would be archived (oldest {oldest or '-'}).")
+            return
+        moved = archive.run(conn, before, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'], pause)
+    finally:
+        conn.close()
+    click.echo(f"{moved} order(s) archived.")
+
+@archive_cli.command('status')
+def archive_status():
+    """Show hot and archived order counts."""
+    before = datetime.now() - timedelta(days=current_app.config['ARCHIVE_AFTER_DAYS'])
+    conn = mysql.connect()
+    try:
+        cur = conn.cursor()
+        hot, archived = archive.counts(cur)
+        due, _ = archive.eligible(cur, before)
+        cur.close()
+    finally:
+        conn.close()
+    click.echo(f"{hot} order(s) in orders ({due} due for archiving), {archived} archived.")
+
+@bp.cli.group('coupons')
+def coupons_cli():
+    """Coupon codes and their rules."""
+
+@coupons_cli.command('add')
+@click.argument('code')
+@click.option('--percent', type=click.FloatRange(0, 100), help='Percent off.')
+@click.option('--fixed', type=click.FloatRange(0), help='Amount off each item.')
+@click.option('--category', help='Only dishes in this menu category.')
+@click.option('--starts', type=click.DateTime(), help='Usable from (YYYY-MM-DD[ HH:MM:SS]).')
+@click.option('--ends', type=click.DateTime(), help='Usable until, exclusive.')
+@click.option('--max-uses', type=click.IntRange(1), help='Cap on redemptions.')
+def coupons_add(code, percent, fixed, category, starts, ends, max_uses):
+    """Create a coupon."""
+    if (percent is None) == (fixed is None):
+        raise click.UsageError("Give exactly one of --percent or --fixed.")
+    kind, amount = ('percent', percent) if percent is not None else ('fixed', fixed)
+    conn = mysql.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO coupons (code, kind, amount, category, starts_at, ends_at, max_uses)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (code.strip().upper(), kind, money(amount), category, starts, ends, max_uses))
+        conn.commit()
+    finally:
+        conn.close()
+    menu_catalog.bump_version()  # every worker recompiles its rules
+    click.echo(f"Coupon {code.strip().upper()} added.")
+
+@coupons_cli.command('disable')
+@click.argument('code')
+def coupons_disable(code):
+    """Stop a coupon from applying (existing orders keep their prices)."""
+    conn = mysql.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE coupons SET active = 0 WHERE code = %s", (code.strip().upper(),))
+        found = cur.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    if not found:
+        raise click.ClickException(f"No coupon {code}.")
+    menu_catalog.bump_version()
+    click.echo(f"Coupon {code.strip().upper()} disabled.")
+
+@coupons_cli.command('list')
+def coupons_list():
+    """Show every coupon with its usage."""
+    conn = mysql.connect()
+    try:
+        cur = conn.cursor(DictCursor)
+        cur.execute(f"SELECT {coupons.COLUMNS}, used_count FROM coupons ORDER BY code")
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+    for row in rows:
+        rule = coupons.CouponRule(row)
+        window = f"{row['starts_at'] or '-'} .. {row['ends_at'] or '-'}"
+        uses = f"{row['used_count']}/{row['max_uses'] or 'unlimited'}"
+        click.echo(f"{rule.code:<12} {rule.label:<24} {window:<42} {uses:<14} {'active' if rule.active else 'disabled'}")
+
+@bp.cli.group('intake')
+def intake_cli():
+    """Order/feedback intake journal."""
+
+@intake_cli.command('status')
+def intake_status():
+    """Show queue depth, lag and failed entries."""
+    stats = intake_queue.stats()
+    click.echo(f"{stats['depth']} pending (oldest {stats['lag_seconds']}s), {stats['failed']} failed, "
+               f"{stats['done']} done and kept for dedupe.")
+
+@intake_cli.command('drain')
+def intake_drain():
+    """Write everything that is due now, without a running server."""
+    total = 0
+    while True:
+        taken = intake_queue.drain_once()
+        total += taken
+        if taken < intake_queue.batch_size:
+            break
+    stats = intake_queue.stats()
+    click.echo(f"{total} entry(ies) processed; {stats['depth']} pending, {stats['failed']} failed.")
+
+@intake_cli.command('retry')
+def intake_retry():
+    """Put failed entries back in the queue."""
+    click.echo(f"{intake_queue.retry_failed()} failed entry(ies) requeued.")
+
+@bp.cli.group('images')
+def images_cli():
+    """Menu image thumbnails and WebP variants."""
+
+@images_cli.command('build')
+def images_build():
+    """Generate derivatives for every image under static/images."""
+    if not image_derivatives.available:
+        raise click.ClickException("Pillow is not installed.")
+    built = image_derivatives.build_all()
+    click.echo(f"{built} image(s) processed, manifest at {image_derivatives.manifest_path}.")
+
+@bp.cli.group('assets')
+def assets_cli():
+    """Fingerprinted CSS/JS."""
+
+@assets_cli.command('build')
+def assets_build():
+    """Hash static/css and static/js into static/dist with gzip/brotli copies."""
+    written = static_assets.build()
+    click.echo(f"{written} asset(s) written, manifest at {static_assets.manifest_path}.")
 
 # ---------------- Run ----------------
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app('development').run()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import re
+import time
+import logging
+
+from migrate import engine_of
+
+ORDER_COLUMNS = ('order_id', 'customer_name', 'phone', 'address', 'note', 'food_id', 'quantity',
+                 'total_price', 'delivery_option', 'delivery_service', 'order_date',
+                 'payment_method', 'payment_date')
+ITEM_COLUMNS = "order_item_id, order_id, food_id, food_name, quantity, unit_price, line_total"
+
+# Finished business: paid and marked Completed on manage-orders.
+ELIGIBLE = "payment_date IS NOT NULL AND delivery_option = 'Completed' AND order_date < %s"
+
+FIRST_PARTITION_YEAR = 2024  # 0008 creates p_old for everything before it
+YEAR_PARTITION = re.compile(r'^p(\d{4})$')
+
+
+# ---------------- Order Archive ----------------
+# Moves old, finished orders (and their line items) from the hot tables to
+# orders_archive / order_items_archive. Each batch is its own short
+# transaction: lock a few hundred eligible orders through the status/date
+# index, copy, delete, commit, pause. Routes never wait long behind it and
+# the run can be stopped at any point.
+#
+# The dashboard rollups are left alone: archived orders still count in the
+# history they summarise (rollups.backfill reads both tables).
+def _in(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def eligible(cur, before):
+    # (count, oldest order_date) of what a run would move.
+    cur.execute(f"SELECT COUNT(*), MIN(order_date) FROM orders WHERE {ELIGIBLE}", (before,))
+    return tuple(cur.fetchone())
+
+
+def counts(cur):
+    cur.execute("SELECT COUNT(*) FROM orders")
+    hot = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM orders_archive")
+    return hot, cur.fetchone()[0]
+
+
+def ensure_partitions(cur, last_year):
+    # Split a pYYYY partition off p_future for every year up to last_year
+    # that doesn't have one yet. p_future stays empty, so the split only
+    # rewrites metadata. MySQL only; a table created without partitions is
+    # left as it is.
+    cur.execute("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'orders_archive'
+    """)
+    names = {row[0] for row in cur.fetchall()}
+    if 'p_future' not in names:
+        return []
+    years = [int(m.group(1)) for m in map(YEAR_PARTITION.match, names) if m]
+    added = []
+    for year in range(max(years) + 1 if years else FIRST_PARTITION_YEAR, last_year + 1):
+        cur.execute(f"""
+            ALTER TABLE orders_archive REORGANIZE PARTITION p_future INTO (
+                PARTITION p{year} VALUES LESS THAN ({year + 1}),
+                PARTITION p_future VALUES LESS THAN MAXVALUE)
+        """)
+        added.append(f"p{year}")
+    return added
+
+
+def archive_batch(conn, before, batch_size):
+    # Moves up to batch_size orders; returns how many it moved.
+    cur = conn.cursor()
+    try:
+        # Walks idx_orders_status_date in order, so the scan (and the row
+        # locks) stop after batch_size matches.
+        cur.execute(f"""
+            SELECT order_id FROM orders WHERE {ELIGIBLE}
+            ORDER BY order_date, order_id LIMIT %s FOR UPDATE
+        """, (before, batch_size))
+        ids = [row[0] for row in cur.fetchall()]
+        if not ids:
+            conn.rollback()
+            return 0
+        where = f"order_id IN ({_in(ids)})"
+        cur.execute(f"""
+            INSERT INTO orders_archive ({', '.join(ORDER_COLUMNS)}, food_name)
+            SELECT {', '.join('o.' + c for c in ORDER_COLUMNS)}, f.food_name
+            FROM orders o LEFT JOIN food f ON o.food_id = f.food_id
+            WHERE o.{where}
+        """, ids)
+        cur.execute(f"INSERT INTO order_items_archive ({ITEM_COLUMNS}) "
+                    f"SELECT {ITEM_COLUMNS} FROM order_items WHERE {where}", ids)
+        cur.execute(f"DELETE FROM order_items WHERE {where}", ids)
+        cur.execute(f"DELETE FROM orders WHERE {where}", ids)
+        conn.commit()
+        return len(ids)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def run(conn, before, batch_size=500, pause=0.1):
+    # Archives everything eligible before `before`; returns the total moved.
+    if engine_of(conn) == 'mysql':
+        cur = conn.cursor()
+        try:
+            for name in ensure_partitions(cur, before.year):
+                logging.info("Added archive partition %s", name)
+        finally:
+            cur.close()
+    total = 0
+    while True:
+        moved = archive_batch(conn, before, batch_size)
+        total += moved
+        if moved:
+            logging.info("Archived %s orders (%s so far)", moved, total)
+        if moved < batch_size:
+            return total
+        time.sleep(pause)
@@ -0,0 +1,120 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+import threading
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip siblings are written
+    brotli = None
+
+SOURCES = ('css', 'js')
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+ONE_YEAR = 365 * 24 * 3600
+
+
+# ---------------- Static Assets ----------------
+# build() copies every stylesheet and script to static/dist under a name that
+# contains a hash of its content, next to .gz and .br siblings, and records
+# the mapping in a manifest. A changed file gets a new name, so the hashed
+# copies can be cached by browsers for a year without revalidation.
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+class AssetManifest:
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.out_dir = os.path.join(static_folder, DIST_DIR)
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST)
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._manifest_mtime = None
+
+    # ---------- Manifest ----------
+    def manifest(self):
+        # Re-read when another worker (or the CLI) rewrote the file.
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            try:
+                with open(self.manifest_path) as fh:
+                    self._manifest = json.load(fh)
+                self._manifest_mtime = mtime
+            except (OSError, ValueError):
+                logging.warning("Unreadable asset manifest %s", self.manifest_path)
+        return self._manifest
+
+    @property
+    def version(self):
+        # Manifest mtime: a new value after every build.
+        self.manifest()
+        return self._manifest_mtime
+
+    # ---------- Build ----------
+    def build(self):
+        # Returns the number of files that got a new hashed copy.
+        manifest = {}
+        written = 0
+        with self._lock:
+            for source in SOURCES:
+                src_dir = os.path.join(self.static_folder, source)
+                if not os.path.isdir(src_dir):
+                    continue
+                os.makedirs(os.path.join(self.out_dir, source), exist_ok=True)
+                for name in sorted(os.listdir(src_dir)):
+                    with open(os.path.join(src_dir, name), 'rb') as fh:
+                        data = fh.read()
+                    stem, ext = os.path.splitext(name)
+                    digest = hashlib.sha256(data).hexdigest()[:10]
+                    hashed = f"{source}/{stem}.{digest}{ext}"
+                    target = os.path.join(self.out_dir, hashed)
+                    if not os.path.exists(target):
+                        # Siblings first: a reader that sees the plain file
+                        # can rely on the compressed ones being there too.
+                        _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                        if brotli is not None:
+                            _write(target + '.br', brotli.compress(data, quality=11))
+                        _write(target, data)
+                        written += 1
+                    manifest[f"{source}/{name}"] = f"{DIST_DIR}/{hashed}"
+            os.makedirs(self.out_dir, exist_ok=True)
+            _write(self.manifest_path, json.dumps(manifest, indent=1, sort_keys=True).encode())
+            self._manifest = manifest
+        return written
+
+    # ---------- Template Helper ----------
+    def url(self, filename, **values):
+        # Drop-in for url_for('static', filename=...): the hashed copy when
+        # one has been built, the original file otherwise.
+        return url_for('static', filename=self.manifest().get(filename, filename), **values)
+
+    # ---------- Serving ----------
+    def send(self, filename):
+        # Serve a hashed file, or its precompressed sibling when the client
+        # accepts one. Hashed names never change content, hence immutable.
+        accepted = request.accept_encodings
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[candidate] and os.path.isfile(os.path.join(self.out_dir, filename + suffix)):
+                encoding, filename = candidate, filename + suffix
+                break
+        response = send_from_directory(self.out_dir, filename, mimetype=mimetype, max_age=ONE_YEAR)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,49 @@
+"""Print two or more bench/run.py result files side by side.
+
+    python bench/compare.py bench-sync.json bench-async.json
+
+Shows requests/s and p95 per scenario for each run, with the change of the
+last run against the first.
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path) as fh:
+        data = json.load(fh)
+    meta = data.get('meta', {})
+    return meta.get('label') or path, data['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args(argv)
+    if len(args.files) < 2:
+        sys.exit("Give at least two result files.")
+
+    runs = [load(path) for path in args.files]
+    scenarios = []
+    for _, results in runs:
+        scenarios += [name for name in results if name not in scenarios]
+
+    header = f"{'scenario':<15}"
+    for label, _ in runs:
+        header += f" {label[:12] + ' req/s':>18} {'p95 ms':>8}"
+    header += f" {'req/s':>8} {'p95':>8}"
+    print(header)
+    for name in scenarios:
+        line = f"{name:<15}"
+        for _, results in runs:
+            r = results.get(name)
+            line += f" {r['rps'] if r else '-':>18} {r['p95_ms'] if r else '-':>8}"
+        first, last = runs[0][1].get(name), runs[-1][1].get(name)
+        if first and last and first['rps'] and first['p95_ms']:
+            line += f" {(last['rps'] / first['rps'] - 1) * 100:>+7.0f}% {(last['p95_ms'] / first['p95_ms'] - 1) * 100:>+7.0f}%"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
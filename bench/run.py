@@ -0,0 +1,221 @@
+"""Drive the app's main routes with concurrent clients and report latency.
+
+    python bench/run.py                                  # in-process, Flask test client
+    python bench/run.py --url http://127.0.0.1:8000      # against a running server
+    python bench/run.py --json out.json --baseline last.json --max-regression 20
+
+Seed the database first (bench/seed.py). Each scenario runs for --duration
+seconds with --concurrency clients; the report lists requests/s and
+p50/p95/p99 latency per scenario. With --baseline the run fails (exit 1)
+when any scenario's p95 is more than --max-regression percent slower.
+
+Every client is the same seeded admin, so the per-user rate limit is
+turned off (ADMISSION_RATE=0); start a server for --url the same way.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.cookiejar
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('IMAGE_BUILD_ON_STARTUP', '0')
+os.environ.setdefault('ADMISSION_RATE', '0')
+
+from app import app, mysql
+from seed import BENCH_PASSWORD
+
+SEARCH_TERMS = ['rice', 'coffee', 'chick', 'noodle', 'mango', 'lemn', 'tea', 'curry', 'beef', 'cake']
+
+
+# ---------------- Clients ----------------
+# Both clients expose request(method, path, data) -> status code, and start
+# out logged in as the seeded admin (admin can reach every route).
+class TestClient:
+    def __init__(self):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['username'] = 'bench_admin'
+            session['login_type'] = 'admin'
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+
+class HTTPClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect)
+        self.request('POST', '/auth-admin', {'action': 'login', 'username': 'bench_admin',
+                                             'password': BENCH_PASSWORD})
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time the route itself, not the page it redirects to.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# ---------------- Scenarios ----------------
+def load_fixtures():
+    conn = mysql.connect(app)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT food_id FROM food WHERE available = 1")
+        foods = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT order_id FROM orders WHERE payment_date IS NOT NULL ORDER BY order_id DESC LIMIT 2000")
+        paid = [r[0] for r in cur.fetchall()]
+        cur.close()
+    finally:
+        conn.close()
+    if not foods or not paid:
+        sys.exit("No foods or paid orders found: run bench/seed.py first.")
+    return {'foods': foods, 'paid_orders': paid}
+
+
+def scenarios(fixtures):
+    foods, paid = fixtures['foods'], fixtures['paid_orders']
+    return {
+        'menu_search': lambda c, rng: c.request('GET', '/menu?search=' + rng.choice(SEARCH_TERMS)),
+        'order_post': lambda c, rng: c.request('POST', f"/order/{rng.choice(foods)}", {
+            'customer_name': 'Bench Customer', 'phone': '012345678', 'quantity': rng.randint(1, 3),
+            'delivery_option': 'pickup'}),
+        'order_list': lambda c, rng: c.request('GET', '/order-list'),
+        'feedback_post': lambda c, rng: c.request('POST', '/submit_feedback', {
+            'name': 'Bench Customer', 'email': 'bench@bench.local', 'message': 'Great food!'}),
+        'dashboard': lambda c, rng: c.request('GET', '/dashboard?range=' + rng.choice(['today', '7d', '30d', 'all'])),
+        'manage_orders': lambda c, rng: c.request('GET', '/manage-orders'),
+        'receipt_pdf': lambda c, rng: c.request('GET', f"/order/{rng.choice(paid)}/payment/pdf"),
+    }
+
+
+# ---------------- Runner ----------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_scenario(name, action, make_client, concurrency, duration, warmup, seed):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + warmup + duration
+    record_from = time.perf_counter() + warmup
+
+    def worker(n):
+        client = make_client()
+        rng = random.Random(seed * 1000 + n)
+        local, local_errors = [], 0
+        while True:
+            start = time.perf_counter()
+            if start >= stop_at:
+                break
+            try:
+                status = action(client, rng)
+                ok = status < 400
+            except Exception:
+                ok = False
+            end = time.perf_counter()
+            if start >= record_from:
+                local.append(end - start)
+                local_errors += 0 if ok else 1
+        with lock:
+            latencies.extend(local)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(ms, 50), 2),
+        'p95_ms': round(percentile(ms, 95), 2),
+        'p99_ms': round(percentile(ms, 99), 2),
+    }
+
+
+def compare(results, baseline, max_regression):
+    failures = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p95_ms'):
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        if change > max_regression:
+            failures.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms (+{change:.0f}%)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="benchmark a running server instead of the in-process test client")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds measured per scenario")
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds run before measuring")
+    parser.add_argument('--only', action='append', help="run just this scenario (repeatable)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--label', default='', help="name for this run in --json output (e.g. sync, async)")
+    parser.add_argument('--baseline', help="results file from an earlier run to compare against")
+    parser.add_argument('--max-regression', type=float, default=20.0, help="allowed p95 slowdown in percent")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures()
+    make_client = (lambda: HTTPClient(args.url)) if args.url else TestClient
+    selected = {k: v for k, v in scenarios(fixtures).items() if not args.only or k in args.only}
+
+    print(f"{'scenario':<15} {'reqs':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    results = {}
+    for name, action in selected.items():
+        result = run_scenario(name, action, make_client, args.concurrency, args.duration, args.warmup, args.seed)
+        results[name] = result
+        print(f"{name:<15} {result['requests']:>7} {result['errors']:>6} {result['rps']:>8} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}")
+
+    meta = {'target': args.url or 'test-client', 'label': args.label, 'concurrency': args.concurrency,
+            'duration': args.duration, 'at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'meta': meta, 'results': results}, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            failures = compare(results, json.load(fh)['results'], args.max_regression)
+        for failure in failures:
+            print("REGRESSION", failure)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
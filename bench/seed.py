@@ -0,0 +1,172 @@
+"""Fill a local MySQL database with synthetic data for benchmarking.
+
+    python bench/seed.py --foods 50 --users 100000 --orders 5000000
+
+Connection settings come from the same MYSQL_* variables as the app. Point
+them at a throwaway database: --reset empties the tables first. The run is
+deterministic for a given --seed.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('IMAGE_BUILD_ON_STARTUP', '0')
+os.environ.setdefault('ASSET_BUILD_ON_STARTUP', '0')
+
+from werkzeug.security import generate_password_hash
+
+from app import app, mysql, menu_catalog
+import migrate
+import rollups
+
+CATEGORIES = {
+    'Main': ['Fried Rice', 'Beef Lok Lak', 'Fish Amok', 'Chicken Curry', 'Kuy Teav', 'Num Banh Chok',
+             'Grilled Pork Rice', 'Fried Noodles', 'Omelette Rice', 'Beef Burger', 'Club Sandwich'],
+    'Snacks': ['French Fries', 'Chicken Wings', 'BBQ Chicken Wings', 'Spring Rolls', 'Grilled Squid'],
+    'Salads': ['Caesar Salad', 'Green Mango Salad', 'Papaya Salad'],
+    'Desserts': ['Mango Sticky Rice', 'Chocolate Cake', 'Banana Pancake', 'Num Kachhay', 'Num Plae Ay'],
+    'Drinks': ['Iced Coffee', 'Hot Coffee', 'Lemon Tea', 'Milk Tea', 'Coconut Water', 'Sugarcane Juice'],
+}
+STATUSES = ['delivery', 'pickup', 'Pending', 'Preparing', 'Completed']
+STATUS_WEIGHTS = [10, 5, 10, 5, 70]
+PAYMENT_METHODS = ['Cash', 'ABA', 'ACLEDA', 'Visa', 'Mastercard']
+SERVICES = ['Grab', 'Nham24', 'FoodPanda', 'WeFood', '']
+BENCH_PASSWORD = 'bench-password'
+
+
+def chunks(total, size):
+    start = 0
+    while start < total:
+        yield start, min(size, total - start)
+        start += size
+
+
+def reset(cur):
+    for table in ('order_items', 'orders', 'order_rollup_hourly', 'order_rollup_daily', 'food', 'users'):
+        cur.execute(f"DELETE FROM {table}")
+
+
+def seed_foods(cur, rng, count):
+    images = sorted(f for f in os.listdir(os.path.join(app.static_folder, 'images')) if f.endswith('.jpg'))
+    names = [(cat, name) for cat, items in CATEGORIES.items() for name in items]
+    rows = []
+    for i in range(count):
+        category, name = names[i % len(names)]
+        if i >= len(names):
+            name = f"{name} #{i // len(names) + 1}"
+        rows.append((name, category, round(rng.uniform(1, 12), 2),
+                     rng.choice([0, 0, 0, 5, 10, 15]),
+                     f"A freshly made {name.lower()}.",
+                     f"/static/images/{images[i % len(images)]}" if images else None,
+                     0 if rng.random() < 0.05 else 1))
+    cur.executemany("""
+        INSERT INTO food (food_name, category, price, discount_percent, description, image_url, available)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, rows)
+    cur.execute("SELECT food_id, food_name, price FROM food ORDER BY food_id")
+    return cur.fetchall()
+
+
+def seed_users(conn, cur, count, batch):
+    # One hash for everybody: hashing 100k passwords would take longer
+    # than the rest of the seed.
+    hashed = generate_password_hash(BENCH_PASSWORD)
+    rows = [('bench_admin', hashed, 'admin@bench.local', 'admin')]
+    cur.executemany("INSERT IGNORE INTO users (username, password, email, login_type) VALUES (%s, %s, %s, %s)", rows)
+    for start, size in chunks(count, batch):
+        cur.executemany(
+            "INSERT IGNORE INTO users (username, password, email, login_type) VALUES (%s, %s, %s, 'user')",
+            [(f"user{n}", hashed, f"user{n}@bench.local") for n in range(start, start + size)])
+        conn.commit()
+
+
+def seed_orders(conn, cur, rng, foods, count, days, batch):
+    cur.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders")
+    next_id = cur.fetchone()[0] + 1
+    now = datetime.now().replace(microsecond=0)
+    span = days * 86400
+    started = time.time()
+    for start, size in chunks(count, batch):
+        orders, items = [], []
+        for order_id in range(next_id + start, next_id + start + size):
+            lines = rng.choices(foods, k=rng.choice([1, 1, 1, 2, 3]))
+            total = 0
+            for food_id, food_name, price in lines:
+                qty = rng.randint(1, 4)
+                line_total = round(float(price) * qty, 2)
+                total += line_total
+                items.append((order_id, food_id, food_name, qty, price, line_total))
+            ordered = now - timedelta(seconds=rng.randrange(span))
+            paid = rng.random() < 0.6
+            orders.append((
+                order_id, f"Customer {rng.randrange(100000)}", f"0{rng.randrange(10**8, 10**9)}",
+                f"{rng.randint(1, 300)} Street {rng.randint(1, 600)}", '',
+                lines[0][0], sum(i[3] for i in items[-len(lines):]), round(total, 2),
+                rng.choices(STATUSES, STATUS_WEIGHTS)[0], rng.choice(SERVICES), ordered,
+                rng.choice(PAYMENT_METHODS) if paid else None,
+                ordered + timedelta(minutes=rng.randint(1, 90)) if paid else None,
+            ))
+        cur.executemany("""
+            INSERT INTO orders (order_id, customer_name, phone, address, note, food_id, quantity, total_price,
+                                delivery_option, delivery_service, order_date, payment_method, payment_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, orders)
+        cur.executemany("""
+            INSERT INTO order_items (order_id, food_id, food_name, quantity, unit_price, line_total)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, items)
+        conn.commit()
+        done = start + size
+        rate = done / max(time.time() - started, 1e-6)
+        print(f"\r  orders: {done:,}/{count:,} ({rate:,.0f}/s)", end='', flush=True)
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--foods', type=int, default=50)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=365, help="spread order dates over this many days")
+    parser.add_argument('--batch', type=int, default=5000, help="rows per INSERT batch")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help="delete existing rows first")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    conn = mysql.connect(app)
+    try:
+        print("Applying migrations...")
+        migrate.upgrade(conn)
+        cur = conn.cursor()
+        # Bulk load: skip per-row FK and unique checks; the data is generated
+        # consistent.
+        cur.execute("SET SESSION foreign_key_checks = 0")
+        cur.execute("SET SESSION unique_checks = 0")
+        if args.reset:
+            print("Emptying tables...")
+            reset(cur)
+            conn.commit()
+        print(f"Seeding {args.foods} foods, {args.users:,} users, {args.orders:,} orders...")
+        foods = seed_foods(cur, rng, args.foods)
+        conn.commit()
+        seed_users(conn, cur, args.users, args.batch)
+        seed_orders(conn, cur, rng, foods, args.orders, args.days, args.batch)
+        cur.execute("SET SESSION foreign_key_checks = 1")
+        cur.execute("SET SESSION unique_checks = 1")
+        cur.close()
+        print("Rebuilding rollups...")
+        rollups.backfill(conn)
+    finally:
+        conn.close()
+    with app.app_context():
+        menu_catalog.bump_version()
+    print(f"Done. Admin login: bench_admin / {BENCH_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
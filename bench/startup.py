@@ -0,0 +1,111 @@
+"""Measure cold start: import, create_app() and the first requests.
+
+    python bench/startup.py                         # 5 fresh processes, GET /
+    python bench/startup.py --path /menu --runs 10
+    python bench/startup.py --warmup                # call app.warmup() first
+    python bench/startup.py --json startup.json
+
+Every run is a new interpreter, so nothing is cached in memory between
+runs (the OS file cache still is: the first run is usually the slowest and
+is reported separately). The report shows the median of each phase and
+which optional heavy modules the process had imported by the end.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('reportlab', 'PIL')
+
+# Runs in the child; prints one JSON line of timings in milliseconds.
+CHILD = r"""
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, ROOT)
+import app as appmod
+t1 = time.perf_counter()
+app = appmod.create_app()
+t2 = time.perf_counter()
+if WARMUP:
+    appmod.warmup(app)
+t3 = time.perf_counter()
+client = app.test_client()
+if LOGIN:
+    with client.session_transaction() as session:
+        session['username'] = 'bench_admin'
+        session['login_type'] = 'admin'
+first = client.get(PATH)
+first.get_data()
+t4 = time.perf_counter()
+second = client.get(PATH)
+second.get_data()
+t5 = time.perf_counter()
+ms = lambda a, b: round((b - a) * 1000, 2)
+print(json.dumps({
+    'import_ms': ms(t0, t1), 'create_app_ms': ms(t1, t2), 'warmup_ms': ms(t2, t3),
+    'first_request_ms': ms(t3, t4), 'second_request_ms': ms(t4, t5),
+    'status': first.status_code,
+    'heavy_modules': [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+PHASES = ('process_ms', 'import_ms', 'create_app_ms', 'warmup_ms', 'first_request_ms', 'second_request_ms')
+
+
+def run_once(path, warmup, login):
+    code = (f"ROOT = {ROOT!r}\nPATH = {path!r}\nWARMUP = {warmup!r}\nLOGIN = {login!r}\n"
+            f"HEAVY = {HEAVY_MODULES!r}\n" + CHILD)
+    env = dict(os.environ)
+    env.setdefault('IMAGE_BUILD_ON_STARTUP', '0')
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, cwd=ROOT)
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        sys.exit(f"Startup run failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Interpreter start to second response, as seen from outside.
+    result['process_ms'] = round(elapsed, 2)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/', help="route requested twice after startup")
+    parser.add_argument('--login', action='store_true', help="request as the seeded bench admin")
+    parser.add_argument('--warmup', action='store_true', help="run app.warmup() before the first request")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--label', default='', help="name for this run in --json output")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.path, args.warmup, args.login) for _ in range(args.runs)]
+    statuses = {r['status'] for r in runs}
+    if any(s >= 400 for s in statuses):
+        print(f"warning: {args.path} answered {sorted(statuses)}", file=sys.stderr)
+
+    print(f"{'phase':<20} {'first run':>10} {'median':>10} {'min':>10} {'max':>10}")
+    results = {}
+    for phase in PHASES:
+        values = [r[phase] for r in runs]
+        results[phase] = {'first': values[0], 'median': round(statistics.median(values), 2),
+                          'min': min(values), 'max': max(values)}
+        if phase == 'warmup_ms' and not args.warmup:
+            continue
+        row = results[phase]
+        print(f"{phase:<20} {row['first']:>10} {row['median']:>10} {row['min']:>10} {row['max']:>10}")
+    heavy = sorted({m for r in runs for m in r['heavy_modules']})
+    print(f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'meta': {'label': args.label, 'path': args.path, 'runs': args.runs,
+                                'warmup': args.warmup, 'heavy_modules': heavy},
+                       'startup': results}, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import os
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    if cast is bool:
+        return value == '1'
+    return cast(value)
+
+
+# ---------------- Config Profiles ----------------
+# create_app(profile) loads one of these; APP_PROFILE picks it when no
+# profile is passed. Every setting can still be overridden from the
+# environment, the profile only changes the defaults. Paths left as None
+# default to files under the app's instance folder.
+class Config:
+    SECRET_KEY = os.environ.get('FLASK_SECRET') or None
+
+    DB_ENGINE = _env('DB_ENGINE', 'mysql')
+    SQLITE_PATH = _env('SQLITE_PATH', None)
+    MYSQL_HOST = _env('MYSQL_HOST', 'localhost')
+    MYSQL_USER = _env('MYSQL_USER', 'root')
+    MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')
+    MYSQL_DB = _env('MYSQL_DB', 'foods')
+    MYSQL_POOL_MIN = _env('MYSQL_POOL_MIN', 2, int)
+    MYSQL_POOL_MAX = _env('MYSQL_POOL_MAX', 10, int)
+    MYSQL_POOL_TIMEOUT = _env('MYSQL_POOL_TIMEOUT', 5.0, float)
+
+    ORDERS_PAGE_SIZE = _env('ORDERS_PAGE_SIZE', 25, int)
+    MENU_VERSION_FILE = _env('MENU_VERSION_FILE', None)
+    RECEIPT_CACHE_DIR = _env('RECEIPT_CACHE_DIR', None)
+    RECEIPT_WORKERS = _env('RECEIPT_WORKERS', 2, int)
+    RECEIPT_EXPORT_PROCESSES = _env('RECEIPT_EXPORT_PROCESSES', 2, int)
+    RECEIPT_RENDER_WAIT = _env('RECEIPT_RENDER_WAIT', 3.0, float)
+    IMAGE_BUILD_ON_STARTUP = _env('IMAGE_BUILD_ON_STARTUP', True, bool)
+    ASSET_BUILD_ON_STARTUP = _env('ASSET_BUILD_ON_STARTUP', True, bool)
+    ORDER_EVENTS_BUFFER = _env('ORDER_EVENTS_BUFFER', 100, int)
+    ORDER_EVENTS_MAX_CLIENTS = _env('ORDER_EVENTS_MAX_CLIENTS', 100, int)
+    ORDER_EVENTS_JOURNAL = _env('ORDER_EVENTS_JOURNAL', None)
+    ORDER_EVENTS_POLL = _env('ORDER_EVENTS_POLL', 0.5, float)
+    KITCHEN_ORDERS_LIMIT = _env('KITCHEN_ORDERS_LIMIT', 50, int)
+    SLOW_QUERY_MS = _env('SLOW_QUERY_MS', 200.0, float)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    PAGE_CACHE_MAX_BYTES = _env('PAGE_CACHE_MAX_BYTES', 8 * 1024 * 1024, int)
+    INTAKE_JOURNAL = _env('INTAKE_JOURNAL', None)
+    INTAKE_BATCH_SIZE = _env('INTAKE_BATCH_SIZE', 100, int)
+    INTAKE_MAX_ATTEMPTS = _env('INTAKE_MAX_ATTEMPTS', 20, int)
+    INTAKE_ACK_WAIT = _env('INTAKE_ACK_WAIT', 1.0, float)
+    ARCHIVE_AFTER_DAYS = _env('ARCHIVE_AFTER_DAYS', 180, int)
+    ARCHIVE_BATCH_SIZE = _env('ARCHIVE_BATCH_SIZE', 500, int)
+    ORDER_CACHE_TTL = _env('ORDER_CACHE_TTL', 60.0, float)
+    ORDER_CACHE_MAX_ENTRIES = _env('ORDER_CACHE_MAX_ENTRIES', 1000, int)
+    ORDER_CACHE_FILE = _env('ORDER_CACHE_FILE', None)
+    ADMISSION_RATE = _env('ADMISSION_RATE', 2.0, float)
+    ADMISSION_BURST = _env('ADMISSION_BURST', 10, int)
+    ADMISSION_ROUTE_SLOTS = _env('ADMISSION_ROUTE_SLOTS', 4, int)
+    ADMISSION_PUBLIC_SLOTS = _env('ADMISSION_PUBLIC_SLOTS', None, int)
+    ADMISSION_ADMIN_SLOTS = _env('ADMISSION_ADMIN_SLOTS', 4, int)
+    ADMISSION_MAX_WAIT = _env('ADMISSION_MAX_WAIT', 0.5, float)
+
+
+class ProductionConfig(Config):
+    pass
+
+
+class DevelopmentConfig(Config):
+    # `python app.py`: debugger and template reloading on.
+    DEBUG = True
+    TEMPLATES_AUTO_RELOAD = True
+
+
+class TestingConfig(Config):
+    # No background builds, and an embedded database unless told otherwise.
+    TESTING = True
+    DB_ENGINE = _env('DB_ENGINE', 'sqlite')
+    IMAGE_BUILD_ON_STARTUP = _env('IMAGE_BUILD_ON_STARTUP', False, bool)
+    ASSET_BUILD_ON_STARTUP = _env('ASSET_BUILD_ON_STARTUP', False, bool)
+
+
+PROFILES = {
+    'production': ProductionConfig,
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+}
+
+# Files under app.instance_path for the settings above left as None.
+INSTANCE_FILES = {
+    'SQLITE_PATH': 'restaurant.db',
+    'MENU_VERSION_FILE': 'menu_version',
+    'RECEIPT_CACHE_DIR': 'receipts',
+    'INTAKE_JOURNAL': 'intake.db',
+    'ORDER_CACHE_FILE': 'order_generations',
+    'ORDER_EVENTS_JOURNAL': 'order_events.db',
+}
@@ -0,0 +1,166 @@
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal(100)
+KINDS = ('percent', 'fixed')
+
+COLUMNS = "code, kind, amount, category, starts_at, ends_at, max_uses, active"
+
+
+def money(value):
+    # Exact two-place amount; floats go through str() so 0.1 stays 0.1.
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value or 0))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# ---------------- Coupon Rules ----------------
+# A row of the coupons table compiled once into a rule: percent coupons take
+# that share off, fixed coupons take that amount off each item's unit price
+# (never below zero). A category limits the coupon to dishes in it.
+class CouponRule:
+    def __init__(self, row):
+        self.code = row['code'].strip().upper()
+        self.kind = row['kind']
+        if self.kind not in KINDS:
+            raise ValueError(f"coupon {self.code}: unknown kind {self.kind!r}")
+        self.amount = Decimal(str(row['amount']))
+        self.category = row.get('category') or None
+        self.starts_at = row.get('starts_at')
+        self.ends_at = row.get('ends_at')
+        self.max_uses = row.get('max_uses')
+        self.active = bool(row.get('active', 1))
+        self._factor = 1 - self.amount / HUNDRED
+
+    def usable_at(self, now):
+        return (self.active
+                and (self.starts_at is None or self.starts_at <= now)
+                and (self.ends_at is None or now < self.ends_at))
+
+    def applies_to(self, food):
+        return self.category is None or food.get('category') == self.category
+
+    def apply(self, price):
+        if self.kind == 'percent':
+            return price * self._factor
+        return max(price - self.amount, Decimal(0))
+
+    @property
+    def label(self):
+        off = f"{self.amount.normalize():f}% off" if self.kind == 'percent' else f"${money(self.amount)} off"
+        return f"{off} {self.category}" if self.category else off
+
+    def session_data(self):
+        # What the browser sees (/coupon, /apply_coupon, /api/menu). discount
+        # is the fraction the cart popup can take off its subtotal; 0 for
+        # coupons it can't estimate (fixed or category-scoped), whose price
+        # shows at checkout. kind/amount/category let the menu page reprice
+        # its dishes the way price_menu() does.
+        flat = self.kind == 'percent' and self.category is None
+        return {'code': self.code, 'label': self.label,
+                'discount': float(self.amount / HUNDRED) if flat else 0.0,
+                'kind': self.kind, 'amount': float(self.amount), 'category': self.category}
+
+
+class CouponBook:
+    # The compiled rule set. version() is the menu catalog version: coupon
+    # edits bump it, and the rules are reloaded when it moves.
+    def __init__(self, loader, version):
+        self.loader = loader
+        self.version = version
+        self._lock = threading.Lock()
+        self._rules = {}
+        self._version = None
+
+    def rules(self):
+        version = self.version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    compiled = {}
+                    for row in self.loader():
+                        try:
+                            rule = CouponRule(row)
+                        except (ValueError, ArithmeticError) as e:
+                            logging.warning("Skipping coupon: %s", e)
+                            continue
+                        compiled[rule.code] = rule
+                    self._rules = compiled
+                    self._version = version
+        return self._rules
+
+    def get(self, code, now=None):
+        # The rule for a code that can be used right now, else None.
+        rule = self.rules().get((code or '').strip().upper())
+        if rule is None or not rule.usable_at(now or datetime.now()):
+            return None
+        return rule
+
+
+# ---------------- Pricing ----------------
+def price_menu(foods, rule=None):
+    # {food_id: final unit price} for a whole menu in one pass: the dish's
+    # own discount first, then the coupon, rounded once at the end.
+    prices = {}
+    for food in foods:
+        price = Decimal(str(food.get('price') or 0))
+        discount = Decimal(str(food.get('discount_percent') or 0))
+        if discount > 0:
+            price = price * (1 - discount / HUNDRED)
+        if rule is not None and rule.applies_to(food):
+            price = rule.apply(price)
+        prices[food['food_id']] = money(price)
+    return prices
+
+
+class PriceTable:
+    # price_menu() results per (coupon, menu version): listing pages look
+    # prices up instead of recomputing them. Old versions age out LRU.
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tables = OrderedDict()
+
+    def prices(self, version, foods, rule=None):
+        key = (rule.code if rule else None, version)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        table = price_menu(foods, rule)
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return table
+
+
+# ---------------- Storage ----------------
+def load_rules(cur):
+    cur.execute(f"SELECT {COLUMNS} FROM coupons")
+    return cur.fetchall()
+
+
+def uses_left(cur, code):
+    cur.execute("SELECT max_uses, used_count FROM coupons WHERE code = %s", (code,))
+    row = cur.fetchone()
+    if row is None:
+        return False
+    max_uses, used = (row['max_uses'], row['used_count']) if isinstance(row, dict) else row
+    return max_uses is None or used < max_uses
+
+
+def redeem(cur, code):
+    # Count one use inside the order's transaction. False when the cap was
+    # reached by someone else first; the order still goes through at the
+    # price the customer was quoted, and the caller only logs it.
+    cur.execute("""
+        UPDATE coupons SET used_count = used_count + 1
+        WHERE code = %s AND (max_uses IS NULL OR used_count < max_uses)
+    """, (code,))
+    return cur.rowcount == 1
@@ -0,0 +1,281 @@
+import os
+import time
+import threading
+import logging
+import functools
+from collections import deque
+
+from flask import current_app, g
+
+import db_sqlite
+
+try:
+    import MySQLdb
+    import MySQLdb.cursors
+    DictCursor, SSDictCursor = MySQLdb.cursors.DictCursor, MySQLdb.cursors.SSDictCursor
+    DB_ERRORS = (MySQLdb.Error, db_sqlite.Error)
+except ImportError:  # DB_ENGINE=sqlite needs no MySQL client library
+    MySQLdb = None
+    DictCursor, SSDictCursor = db_sqlite.DictCursor, db_sqlite.SSDictCursor
+    DB_ERRORS = (db_sqlite.Error,)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# ---------------- Connection Pool ----------------
+# Bounded pool of database connections. Connections are pinged when borrowed
+# (and replaced if the server dropped them) and rolled back when returned, so
+# a request that failed half-way can't leak an open transaction to the next
+# one that borrows the connection.
+class ConnectionPool:
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("pool needs 0 <= min_size <= max_size and max_size >= 1")
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        self._filled = False
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _check_fork(self):
+        # Sockets must not be shared with a parent process (gunicorn
+        # preload): drop the inherited connections without closing them.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._size = self._in_use = self._waiting = 0
+            self._filled = False
+
+    def _open(self):
+        try:
+            return self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def fill(self):
+        # Opens up to min_size connections. If the server is down part way,
+        # the slots not opened are handed back and the next acquire() tries
+        # again, so an outage at startup doesn't shrink the pool for good.
+        with self._cond:
+            self._check_fork()
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        opened = 0
+        try:
+            for _ in range(missing):
+                conn = self.connect()
+                opened += 1
+                with self._cond:
+                    self._idle.append(conn)
+                    self._cond.notify()
+        except Exception:
+            with self._cond:
+                self._size -= missing - opened
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._filled = True
+
+    def acquire(self):
+        if not self._filled or self._pid != os.getpid():
+            self.fill()
+        started = time.monotonic()
+        deadline = started + self.timeout
+        conn = None
+        with self._cond:
+            self._check_fork()
+            self._waiting += 1
+            try:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"no database connection free after {self.timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._size += 1
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            if conn is None:
+                conn = self._open()
+            else:
+                conn = self._ping(conn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _ping(self, conn):
+        try:
+            conn.ping()
+            return conn
+        except DB_ERRORS:
+            logging.warning("Pooled connection went away, reconnecting")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._reconnects += 1
+            try:
+                return self.connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, conn):
+        healthy = True
+        try:
+            conn.rollback()
+        except Exception:
+            healthy = False
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            if healthy:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn = self._idle.pop()
+                self._size -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'checkout_wait_avg_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'checkout_wait_max_ms': round(self._wait_max * 1000, 3),
+            }
+
+
+# ---------------- Flask Integration ----------------
+# Drop-in for flask_mysqldb.MySQL: `mysql.connection` is borrowed from the
+# pool once per app context and handed back on teardown. DB_ENGINE picks the
+# server: 'mysql' (MYSQL_* settings) or 'sqlite', an embedded WAL-mode file at
+# SQLITE_PATH that needs no server at all. Each app keeps its own pool in
+# app.extensions['mysql']; outside an app context pass the app to connect().
+class MySQLPool:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DB_ENGINE', 'mysql')
+        app.config.setdefault('SQLITE_PATH', os.path.join(app.instance_path, 'restaurant.db'))
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_USER', None)
+        app.config.setdefault('MYSQL_PASSWORD', None)
+        app.config.setdefault('MYSQL_DB', None)
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8')
+        app.config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        app.config.setdefault('MYSQL_POOL_MIN', 1)
+        app.config.setdefault('MYSQL_POOL_MAX', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        if app.config['DB_ENGINE'] not in ('mysql', 'sqlite'):
+            raise ValueError(f"DB_ENGINE must be 'mysql' or 'sqlite', not {app.config['DB_ENGINE']!r}")
+        app.extensions['mysql'] = ConnectionPool(
+            functools.partial(self.connect, app),
+            min_size=int(app.config['MYSQL_POOL_MIN']),
+            max_size=int(app.config['MYSQL_POOL_MAX']),
+            timeout=float(app.config['MYSQL_POOL_TIMEOUT']),
+        )
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def pool(self):
+        return current_app.extensions['mysql']
+
+    @property
+    def engine(self):
+        return current_app.config['DB_ENGINE']
+
+    def connect(self, app=None, **overrides):
+        cfg = (app or current_app).config
+        if cfg['DB_ENGINE'] == 'sqlite':
+            path = cfg['SQLITE_PATH']
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            return db_sqlite.connect(path, timeout=float(cfg['MYSQL_POOL_TIMEOUT']))
+        kwargs = {
+            'host': cfg['MYSQL_HOST'],
+            'port': int(cfg['MYSQL_PORT']),
+            'charset': cfg['MYSQL_CHARSET'],
+            'connect_timeout': int(cfg['MYSQL_CONNECT_TIMEOUT']),
+        }
+        if cfg['MYSQL_USER']:
+            kwargs['user'] = cfg['MYSQL_USER']
+        # password/database rather than passwd/db: both mysqlclient and
+        # PyMySQL (serve_async.py) accept these.
+        if cfg['MYSQL_PASSWORD']:
+            kwargs['password'] = cfg['MYSQL_PASSWORD']
+        if cfg['MYSQL_DB']:
+            kwargs['database'] = cfg['MYSQL_DB']
+        kwargs.update(overrides)
+        return MySQLdb.connect(**kwargs)
+
+    @property
+    def connection(self):
+        if 'db_conn' not in g:
+            g.db_conn = self.pool.acquire()
+        return g.db_conn
+
+    def teardown(self, exc):
+        conn = g.pop('db_conn', None)
+        if conn is not None:
+            self.pool.release(conn)
+
+    def stats(self):
+        return self.pool.stats()
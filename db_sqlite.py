@@ -0,0 +1,190 @@
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+engine = 'sqlite'
+Error = sqlite3.Error
+
+
+# ---------------- SQLite Engine ----------------
+# An embedded database for development branches and quick local runs: a
+# MySQLdb-shaped connection over sqlite3, so the pool, the routes and the
+# migration runner use it unchanged. The file runs in WAL mode, which lets
+# readers carry on while one writer commits.
+#
+# The app's SQL is written for MySQL; translate() rewrites the handful of
+# MySQL-only constructs it uses into their SQLite equivalents.
+def _parse_datetime(value):
+    text = value.decode()
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value.decode()[:10])
+    except ValueError:
+        return value.decode()
+
+
+sqlite3.register_adapter(datetime, lambda v: v.strftime('%Y-%m-%d %H:%M:%S.%f' if v.microsecond else '%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('TIMESTAMP', _parse_datetime)
+sqlite3.register_converter('DATE', _parse_date)
+sqlite3.register_converter('DECIMAL', lambda v: Decimal(v.decode()))
+
+NOW = "datetime('now', 'localtime')"
+TODAY = "date('now', 'localtime')"
+
+_REWRITES = [
+    (re.compile(r'DATE_SUB\(NOW\(\), INTERVAL (\d+) HOUR\)', re.I), rf"datetime('now', 'localtime', '-\1 hours')"),
+    (re.compile(r'DATE_SUB\(CURDATE\(\), INTERVAL (\d+) DAY\)', re.I), rf"date('now', 'localtime', '-\1 days')"),
+    (re.compile(r'DATE_ADD\(DATE\(([\w.]+)\), INTERVAL HOUR\(\1\) HOUR\)', re.I), r"strftime('%Y-%m-%d %H:00:00', \1)"),
+    (re.compile(r'\bNOW\(\)', re.I), NOW),
+    (re.compile(r'\bCURDATE\(\)', re.I), TODAY),
+    (re.compile(r'\bINSERT IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'\bSELECT (GET_LOCK|RELEASE_LOCK)\(.*\)', re.I), 'SELECT 1'),
+]
+_FOR_UPDATE = re.compile(r'\s+FOR UPDATE\s*$', re.I)
+_ON_DUPLICATE = re.compile(r'\bON DUPLICATE KEY UPDATE\b', re.I)
+_VALUES_REF = re.compile(r'\bVALUES\((\w+)\)', re.I)
+_NO_OP = re.compile(r'^\s*SET\s+(SESSION\s+)?\w+\s*=', re.I)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def translate(sql):
+    # Returns (sqlite sql, locking) where locking marks a SELECT ... FOR
+    # UPDATE, or (None, False) for MySQL session settings with no SQLite
+    # meaning. Results are memoised: the app issues the same few statements.
+    cached = _cache.get(sql)
+    if cached is not None:
+        return cached
+    if _NO_OP.match(sql):
+        result = (None, False)
+    else:
+        out = sql.replace('%%', '\0').replace('%s', '?').replace('\0', '%')
+        out, locks = _FOR_UPDATE.subn('', out)
+        for pattern, repl in _REWRITES:
+            out = pattern.sub(repl, out)
+        parts = _ON_DUPLICATE.split(out, 1)
+        if len(parts) == 2:
+            # VALUES(col) in the update list is SQLite's excluded.col.
+            out = parts[0] + 'ON CONFLICT DO UPDATE SET' + _VALUES_REF.sub(r'excluded.\1', parts[1])
+        result = (out, bool(locks))
+    with _cache_lock:
+        if len(_cache) > 1000:
+            _cache.clear()
+        _cache[sql] = result
+    return result
+
+
+def _dict_row(cursor, row):
+    return {d[0]: v for d, v in zip(cursor.description, row)}
+
+
+class Cursor:
+    def __init__(self, connection, dict_rows=False):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+        if dict_rows:
+            self._cursor.row_factory = _dict_row
+        self._skipped = False
+
+    def execute(self, sql, params=None):
+        sql, locking = translate(sql)
+        self._skipped = sql is None
+        if self._skipped:
+            return 0
+        if locking and not self.connection._conn.in_transaction:
+            # Take the write lock up front, as InnoDB's row lock would:
+            # otherwise two read-then-write transactions can deadlock.
+            self._cursor.execute("BEGIN IMMEDIATE")
+        self._cursor.execute(sql, tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql, seq):
+        sql, _ = translate(sql)
+        self._skipped = sql is None
+        if self._skipped:
+            return 0
+        self._cursor.executemany(sql, [tuple(p) for p in seq])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return None if self._skipped else self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return [] if self._skipped else self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return [] if self._skipped else self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self.fetchall() if self._skipped else self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+# Stand-ins for MySQLdb.cursors.DictCursor / SSDictCursor; sqlite3 cursors
+# already step through results lazily, so both are the same thing here.
+class DictCursor(Cursor):
+    pass
+
+
+SSDictCursor = DictCursor
+
+
+class Connection:
+    engine = engine
+
+    def __init__(self, path, timeout=5.0):
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")  # durable at checkpoints; safe with WAL
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+
+    def cursor(self, cursorclass=None):
+        # Accepts MySQLdb's cursor classes too, matched by name, so callers
+        # don't care which engine handed them the connection.
+        return Cursor(self, dict_rows=cursorclass is not None and 'Dict' in cursorclass.__name__)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        pass  # a local file can't go away
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path, timeout=5.0):
+    return Connection(path, timeout)
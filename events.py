@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+
+ORDER_CREATED = 'order-created'
+ORDER_STATUS = 'status-changed'
+ORDER_PAID = 'paid'
+ORDER_DELETED = 'deleted'
+
+
+class BrokerFull(Exception):
+    pass
+
+
+# ---------------- Order Event Broker ----------------
+# Fan-out for Server-Sent Events across every gunicorn worker. Routes
+# publish once after their commit by appending the event to a small SQLite
+# journal shared by the workers on the host (like the menu version file);
+# while a worker has open streams it polls the journal for new ids and
+# copies each event to its streams from memory, so a room full of order
+# screens costs one cheap query per worker per poll. The journal ids are
+# the SSE ids, and a reconnecting screen is replayed from it. Each
+# connection has a bounded buffer: a client that stops reading loses its
+# backlog and is told to resync instead of growing the queue without limit.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class Subscription:
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.maxsize = maxsize
+        self.events = deque()
+        self.overflowed = False
+        self.cond = threading.Condition()
+
+    def push(self, event):
+        # Returns False when the buffer was full and the backlog dropped.
+        with self.cond:
+            accepted = len(self.events) < self.maxsize
+            if accepted:
+                self.events.append(event)
+            else:
+                self.events.clear()
+                self.overflowed = True
+            self.cond.notify()
+            return accepted
+
+    def pop_all(self, timeout):
+        # Returns (events, overflowed); waits up to `timeout` for anything.
+        with self.cond:
+            if not self.events and not self.overflowed:
+                self.cond.wait(timeout)
+            events, overflowed = list(self.events), self.overflowed
+            self.events.clear()
+            self.overflowed = False
+            return events, overflowed
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self, path, buffer_size=100, history=1000, max_clients=100, poll_interval=0.5):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.history = history  # journal rows kept for Last-Event-ID replay
+        self.max_clients = max_clients
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last_id = None  # last journal id fanned out in this worker
+        self._thread = None
+        self._pid = None
+        self.published = 0
+        self.dropped = 0
+
+    # ---------- Journal ----------
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _rows(self, after, limit=None):
+        sql = "SELECT id, type, data FROM events WHERE id > ? ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [{'id': row[0], 'type': row[1], 'data': json.loads(row[2])}
+                for row in self._db().execute(sql, (after,))]
+
+    def _max_id(self):
+        return self._db().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def publish(self, event_type, data):
+        # Called after the order is committed: a journal error is logged
+        # rather than failing the request (open screens resync on reload).
+        try:
+            db = self._db()
+            event_id = db.execute(
+                "INSERT INTO events (type, data, created_at) VALUES (?, ?, ?)",
+                (event_type, json.dumps(data, default=str), time.time())).lastrowid
+            db.execute("DELETE FROM events WHERE id <= ?", (event_id - self.history,))
+        except sqlite3.Error:
+            logging.exception("Order event journal write failed")
+            return None
+        with self._lock:
+            self.published += 1
+        # Our own streams hear about it now rather than on the next poll.
+        self.poll()
+        return {'id': event_id, 'type': event_type, 'data': data}
+
+    def poll(self):
+        # Copies journal events this worker hasn't fanned out yet to its
+        # streams. Returns how many there were.
+        with self._lock:
+            if not self._subscribers:
+                return 0
+            events = self._rows(self._last_id)
+            if events:
+                self._last_id = events[-1]['id']
+            subscribers = list(self._subscribers)
+        for event in events:
+            for sub in subscribers:
+                if not sub.push(event):
+                    self.dropped += 1
+        return len(events)
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._subscribers:
+                    # Idle: the next subscribe starts a new poller.
+                    self._thread = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                logging.exception("Order event poll failed")
+
+    # ---------- Subscriptions ----------
+    def subscribe(self, last_event_id=None):
+        sub = Subscription(self, self.buffer_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                raise BrokerFull()
+            if not self._subscribers:
+                # Nobody was listening, so nothing was fanned out: start
+                # from the end of the journal.
+                self._last_id = self._max_id()
+            if last_event_id is not None:
+                missed = self._rows(last_event_id, limit=self.buffer_size + 1)
+                missed = [e for e in missed if e['id'] <= self._last_id]
+                oldest = self._db().execute("SELECT MIN(id) FROM events").fetchone()[0]
+                # Events pruned from the journal (or ids from a journal that
+                # was reset) can't be replayed: tell the client to reload.
+                if last_event_id > self._last_id or len(missed) > self.buffer_size \
+                        or (oldest or self._last_id + 1) > last_event_id + 1:
+                    sub.overflowed = True
+                else:
+                    sub.events.extend(missed)
+            self._subscribers.add(sub)
+            # Threads don't survive a fork; each worker polls for itself.
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='order-events', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'published': self.published,
+                'dropped': self.dropped,
+                'last_event_id': self._max_id(),
+            }
+
+    # ---------- SSE Framing ----------
+    def stream(self, sub, heartbeat=15):
+        # Generator for a text/event-stream response. The comment line keeps
+        # proxies from closing an idle connection and surfaces a client that
+        # went away (the write fails and the generator is closed).
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                events, overflowed = sub.pop_all(heartbeat)
+                if overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                for event in events:
+                    yield (f"id: {event['id']}\nevent: {event['type']}\n"
+                           f"data: {json.dumps(event['data'], default=str)}\n\n")
+                if not events and not overflowed:
+                    yield f": ping {int(time.time())}\n\n"
+        except GeneratorExit:
+            pass
+        except Exception:
+            logging.exception("Order event stream failed")
+        finally:
+            sub.close()
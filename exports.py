@@ -0,0 +1,72 @@
+import io
+import csv
+import json
+import zlib
+import logging
+
+from db_pool import SSDictCursor
+
+FETCH_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+
+
+# ---------------- Streaming Exports ----------------
+# Rows come off an unbuffered server-side cursor FETCH_SIZE at a time and are
+# written out in ~64 KB chunks, so memory stays flat however many rows the
+# query matches. The generator owns its own connection: the request's pooled
+# connection is released when the view returns, long before the download
+# finishes.
+def stream_query(connect, sql, params, fmt='csv', columns=None):
+    conn = connect()
+    try:
+        # A slow client keeps the server waiting to send the next rows;
+        # don't let MySQL abort the query after the default 60 seconds.
+        setup = conn.cursor()
+        setup.execute("SET SESSION net_write_timeout = 3600")
+        setup.close()
+        cur = conn.cursor(SSDictCursor)
+        cur.execute(sql, params)
+        buffer = io.StringIO()
+        writer = None
+        if fmt == 'csv':
+            writer = csv.writer(buffer)
+            if columns:
+                writer.writerow(columns)
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if writer:
+                    writer.writerow([row.get(c) for c in columns] if columns else row.values())
+                else:
+                    buffer.write(json.dumps(row, default=str))
+                    buffer.write('\n')
+                if buffer.tell() >= FLUSH_BYTES:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    except GeneratorExit:
+        logging.info("Export stream closed by client")
+        raise
+    except Exception:
+        logging.exception("Export stream failed")
+        raise
+    finally:
+        # Closing an SSCursor drains unread rows; close the connection
+        # instead of paying for that when the client went away.
+        conn.close()
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        chunks.close()  # release the export's connection if the client left
@@ -0,0 +1,35 @@
+# gunicorn -c gunicorn.conf.py 'app:create_app()'
+#
+# Loads the app once in the master and warms it up (templates, menu, coupon
+# rules, PDF renderer) before forking, so workers start ready and share
+# those pages copy-on-write instead of each loading its own copy on its
+# first requests. WARMUP=0 turns this off (workers then import the app
+# themselves, as without this file).
+#
+# Workers default to 2 x CPUs + 1, each with THREADS threads. A live order
+# screen (/orders/stream) holds a thread for as long as it is open, so
+# unless ORDER_EVENTS_MAX_CLIENTS is set the screens may take at most half
+# of each worker's threads and the rest keep serving pages.
+import os
+import multiprocessing
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('THREADS', 8))
+os.environ.setdefault('ORDER_EVENTS_MAX_CLIENTS', str(max(1, threads // 2)))
+preload_app = os.environ.get('WARMUP', '1') == '1'
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded, before the first fork.
+    if preload_app:
+        import app
+        app.warmup(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    # Database connections are opened per worker, never inherited.
+    if preload_app:
+        import app
+        app.warm_pool(server.app.wsgi())
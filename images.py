@@ -0,0 +1,190 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import importlib.util
+
+from markupsafe import Markup, escape
+
+# Pillow is optional (without it templates serve the originals) and only used
+# while derivatives are built, so it is imported then rather than at startup.
+HAVE_PIL = importlib.util.find_spec('PIL') is not None
+
+WIDTHS = (320, 640, 960)
+# The width menu cards are shown at; app.js (CARD_SIZES) uses the same.
+CARD_SIZES = '(max-width: 600px) 100vw, 350px'
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+STATIC_PREFIX = '/static/'
+DERIVED_DIR = 'images/derived'
+MANIFEST = 'manifest.json'
+
+
+# ---------------- Image Derivatives ----------------
+# Menu photos are multi-megabyte originals. process() writes resized JPEG
+# and WebP copies named after a hash of the source bytes (so they can be
+# cached forever) and records them in a manifest that picture() and srcset()
+# read when templates render.
+def _digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _render(src, out_dir, stem, digest):
+    from PIL import Image
+    variants = {'jpeg': {}, 'webp': {}}
+    with Image.open(src) as im:
+        if im.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no alpha: flatten transparent PNGs onto white.
+            im = im.convert('RGBA')
+            background = Image.new('RGB', im.size, (255, 255, 255))
+            background.paste(im, mask=im.getchannel('A'))
+            im = background
+        else:
+            im = im.convert('RGB')
+        for width in WIDTHS:
+            if width > im.width and width != WIDTHS[0]:
+                break
+            height = round(im.height * min(1.0, width / im.width))
+            resized = im.resize((min(width, im.width), height), Image.LANCZOS)
+            for fmt, ext, options in (('jpeg', 'jpg', {'quality': 80, 'progressive': True, 'optimize': True}),
+                                      ('webp', 'webp', {'quality': 75, 'method': 4})):
+                name = f"{stem}-{digest}-{width}.{ext}"
+                target = os.path.join(out_dir, name)
+                if not os.path.exists(target):
+                    tmp = target + '.tmp'
+                    resized.save(tmp, fmt.upper(), **options)
+                    os.replace(tmp, target)
+                variants[fmt][width] = f"{STATIC_PREFIX}{DERIVED_DIR}/{name}"
+    return variants
+
+
+class ImageDerivatives:
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.out_dir = os.path.join(static_folder, DERIVED_DIR)
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST)
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._manifest_mtime = None
+
+    @property
+    def available(self):
+        return HAVE_PIL
+
+    # ---------- Manifest ----------
+    def manifest(self):
+        # Re-read when another worker (or the CLI) rewrote the file.
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            try:
+                with open(self.manifest_path) as fh:
+                    self._manifest = json.load(fh)
+                self._manifest_mtime = mtime
+            except (OSError, ValueError):
+                logging.warning("Unreadable image manifest %s", self.manifest_path)
+        return self._manifest
+
+    @property
+    def version(self):
+        # Changes whenever the manifest file is rewritten.
+        self.manifest()
+        return self._manifest_mtime
+
+    def _write_manifest(self, manifest):
+        tmp = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(manifest, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    # ---------- Build ----------
+    def _source_path(self, url):
+        if not url or not url.startswith(STATIC_PREFIX) or DERIVED_DIR in url:
+            return None
+        path = os.path.normpath(os.path.join(self.static_folder, url[len(STATIC_PREFIX):]))
+        if not path.startswith(os.path.abspath(self.static_folder)) or not path.lower().endswith(SOURCE_EXTENSIONS):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def process(self, urls):
+        # Build derivatives for the given /static/... URLs; returns the
+        # number of images (re)generated. Unchanged sources are skipped.
+        if not HAVE_PIL:
+            return 0
+        os.makedirs(self.out_dir, exist_ok=True)
+        built = 0
+        with self._lock:
+            manifest = dict(self.manifest())
+            for url in urls:
+                src = self._source_path(url)
+                if not src:
+                    continue
+                stat = os.stat(src)
+                entry = manifest.get(url)
+                if entry and entry.get('mtime') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+                    continue
+                digest = _digest(src)
+                if not entry or entry.get('hash') != digest:
+                    try:
+                        stem = os.path.splitext(os.path.basename(src))[0]
+                        variants = _render(src, self.out_dir, stem, digest)
+                    except Exception:
+                        logging.exception("Image derivative failed for %s", url)
+                        continue
+                    built += 1
+                else:
+                    variants = {'jpeg': entry['jpeg'], 'webp': entry['webp']}
+                manifest[url] = {'hash': digest, 'mtime': stat.st_mtime_ns, 'size': stat.st_size, **variants}
+            self._write_manifest(manifest)
+            self._manifest = manifest
+        return built
+
+    def source_urls(self):
+        images_dir = os.path.join(self.static_folder, 'images')
+        if not os.path.isdir(images_dir):
+            return []
+        return [f"{STATIC_PREFIX}images/{name}" for name in sorted(os.listdir(images_dir))
+                if name.lower().endswith(SOURCE_EXTENSIONS)]
+
+    def build_all(self):
+        return self.process(self.source_urls())
+
+    def process_async(self, urls):
+        threading.Thread(target=self.process, args=(list(urls),), daemon=True).start()
+
+    # ---------- Template Helpers ----------
+    def srcset(self, url, fmt='jpeg'):
+        entry = self.manifest().get(url or '')
+        if not entry:
+            return ''
+        # JSON turns the width keys into strings.
+        return ', '.join(f"{path} {width}w" for width, path in
+                         sorted(entry[fmt].items(), key=lambda kv: int(kv[0])))
+
+    def sources(self, url):
+        # (src, jpeg srcset, webp srcset) for a photo; the srcsets are empty
+        # and src is the original until its derivatives exist. Browsers
+        # without srcset support get the largest derivative rather than the
+        # original. The menu API hands these to app.js for the cards it builds.
+        entry = self.manifest().get(url or '')
+        if not entry:
+            return url or '', '', ''
+        fallback = max(entry['jpeg'].items(), key=lambda kv: int(kv[0]))[1]
+        return fallback, self.srcset(url, 'jpeg'), self.srcset(url, 'webp')
+
+    def picture(self, url, alt='', sizes=CARD_SIZES, **attrs):
+        extra = ''.join(f' {k.rstrip("_").replace("_", "-")}="{escape(v)}"' for k, v in attrs.items())
+        src, srcset, webp = self.sources(url)
+        if not srcset:
+            return Markup(f'<img src="{escape(src)}" alt="{escape(alt)}" loading="lazy"{extra}>')
+        return Markup(
+            f'<picture><source type="image/webp" srcset="{webp}" sizes="{escape(sizes)}">'
+            f'<img src="{src}" alt="{escape(alt)}" loading="lazy"{extra} '
+            f'srcset="{srcset}" sizes="{escape(sizes)}"></picture>'
+        )
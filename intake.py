@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single worker, the thread lock is enough
+    fcntl = None
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intake (
+    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idem_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    result TEXT NULL,
+    error TEXT NULL,
+    created_at REAL NOT NULL,
+    done_at REAL NULL
+);
+CREATE INDEX IF NOT EXISTS idx_intake_status ON intake (status, next_attempt, entry_id);
+"""
+
+
+# ---------------- Order Intake Queue ----------------
+# Orders and feedback are written to a journal on local disk (a SQLite file
+# with a full fsync per commit) and acknowledged straight away; a drainer
+# thread moves them into the database in batches, one transaction per batch.
+# A database hiccup only delays the drain: entries stay in the journal and
+# are retried with backoff until max_attempts, after which they are marked
+# failed for an operator to look at (`flask intake retry`).
+#
+# Every entry carries an idempotency key. Submitting the same key again
+# returns the first entry instead of queueing a second one, and handlers
+# store the key with the row they insert, so an entry drained twice (a
+# crash between the database commit and marking it done) is not inserted
+# twice either.
+class IntakeQueue:
+    def __init__(self, path, connect, handlers, on_done=None, batch_size=100,
+                 poll_interval=0.5, max_attempts=20, retention=24 * 3600):
+        # handlers: {kind: fn(cursor, key, payload) -> result}; they run inside
+        # the batch transaction. on_done(kind, payload, result) runs after the
+        # commit (events, cache updates).
+        self.path = path
+        self.connect = connect
+        self.handlers = handlers
+        self.on_done = on_done
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._target = None
+        self._last_prune = 0
+        self._drained = 0
+        self._last_error = None
+
+    # ---------- Journal ----------
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = FULL")  # an acknowledged entry is on disk
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def submit(self, kind, key, payload):
+        # Returns (entry, created); created is False for a resubmitted key.
+        if kind not in self.handlers:
+            raise ValueError(f"unknown intake kind {kind!r}")
+        db = self._db()
+        cur = db.execute(
+            "INSERT OR IGNORE INTO intake (idem_key, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+            (key, kind, json.dumps(payload, default=str), time.time()))
+        created = cur.rowcount == 1
+        self.start()
+        if created:
+            self._wake.set()
+        return self.lookup(key), created
+
+    def lookup(self, key):
+        row = self._db().execute("SELECT * FROM intake WHERE idem_key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def wait(self, key, timeout):
+        # Poll until the entry leaves pending or the timeout runs out; the
+        # drainer normally takes a few milliseconds.
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = self.lookup(key)
+            if entry is None or entry['status'] != PENDING or time.monotonic() >= deadline:
+                return entry
+            time.sleep(0.05)
+
+    def retry_failed(self):
+        cur = self._db().execute(
+            "UPDATE intake SET status = ?, attempts = 0, next_attempt = 0 WHERE status = ?",
+            (PENDING, FAILED))
+        self._wake.set()
+        return cur.rowcount
+
+    def stats(self):
+        db = self._db()
+        counts = dict(db.execute("SELECT status, COUNT(*) FROM intake GROUP BY status").fetchall())
+        oldest = db.execute("SELECT MIN(created_at) FROM intake WHERE status = ?", (PENDING,)).fetchone()[0]
+        return {
+            'depth': counts.get(PENDING, 0),
+            'failed': counts.get(FAILED, 0),
+            'done': counts.get(DONE, 0),
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'drained': self._drained,
+            'last_error': self._last_error,
+        }
+
+    # ---------- Drainer ----------
+    def start(self):
+        # Threads don't survive a fork; each worker starts its own on first
+        # use. The drain itself is serialised across workers by a file lock.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._target = None
+            self._thread = threading.Thread(target=self._run, name='intake-drainer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                while self.drain_once() == self.batch_size:
+                    pass
+                if time.time() - self._last_prune > 60:
+                    self.prune()
+            except Exception:
+                logging.exception("Intake drain failed")
+
+    def drain_once(self):
+        # Drains one batch; returns how many entries it took.
+        db = self._db()
+        with self._drain_lock, open(self.path + '.lock', 'a') as lock:
+            if fcntl:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return 0  # another worker is draining
+            entries = [dict(r) for r in db.execute(
+                "SELECT * FROM intake WHERE status = ? AND next_attempt <= ? ORDER BY entry_id LIMIT ?",
+                (PENDING, time.time(), self.batch_size)).fetchall()]
+            if entries:
+                self._drain(entries)
+            return len(entries)
+
+    def _drain(self, entries):
+        results, errors = {}, {}
+        conn = cur = None
+        if self._target is not None:
+            try:
+                self._target.ping()
+            except Exception:
+                self._target = None  # dropped while idle; reconnect below
+        try:
+            if self._target is None:
+                self._target = self.connect()
+            conn = self._target
+            cur = conn.cursor()
+            for entry in entries:
+                cur.execute("SAVEPOINT intake_entry")
+                try:
+                    results[entry['entry_id']] = self.handlers[entry['kind']](
+                        cur, entry['idem_key'], json.loads(entry['payload']))
+                except Exception as e:
+                    # A bad entry only loses its own work. If the rollback
+                    # fails too the connection is gone: the batch is retried.
+                    cur.execute("ROLLBACK TO SAVEPOINT intake_entry")
+                    errors[entry['entry_id']] = e
+            conn.commit()
+        except Exception as e:
+            logging.warning("Intake batch of %s failed: %s", len(entries), e)
+            if conn is not None:
+                try:
+                    conn.rollback()
+                    conn.close()
+                except Exception:
+                    pass
+            self._target = cur = None
+            results, errors = {}, {entry['entry_id']: e for entry in entries}
+        finally:
+            if cur is not None:
+                cur.close()
+
+        db = self._db()
+        now = time.time()
+        with db:
+            db.execute("BEGIN")
+            for entry_id, result in results.items():
+                db.execute("UPDATE intake SET status = ?, result = ?, error = NULL, done_at = ? WHERE entry_id = ?",
+                           (DONE, json.dumps(result), now, entry_id))
+            for entry in entries:
+                error = errors.get(entry['entry_id'])
+                if error is None:
+                    continue
+                attempts = entry['attempts'] + 1
+                status = FAILED if attempts >= self.max_attempts else PENDING
+                db.execute("UPDATE intake SET status = ?, attempts = ?, next_attempt = ?, error = ? WHERE entry_id = ?",
+                           (status, attempts, now + min(2 ** attempts, 300), str(error), entry['entry_id']))
+                if status == FAILED:
+                    logging.error("Intake entry %s (%s) gave up after %s attempts: %s",
+                                  entry['entry_id'], entry['kind'], attempts, error)
+        self._drained += len(results)
+        if errors:
+            self._last_error = str(next(iter(errors.values())))
+
+        if self.on_done:
+            for entry in entries:
+                if entry['entry_id'] in results:
+                    try:
+                        self.on_done(entry['kind'], json.loads(entry['payload']), results[entry['entry_id']])
+                    except Exception:
+                        logging.exception("Intake on_done failed for entry %s", entry['entry_id'])
+
+    def prune(self):
+        # Done entries are kept for `retention` seconds: that is the window
+        # in which a resubmitted key is recognised.
+        self._last_prune = time.time()
+        self._db().execute("DELETE FROM intake WHERE status = ? AND done_at < ?",
+                           (DONE, time.time() - self.retention))
@@ -0,0 +1,153 @@
+import os
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: no cross-process lock, single worker anyway
+    fcntl = None
+
+
+# ---------------- Menu Catalog Cache ----------------
+# The food table is small and changes a few times a day, so each worker keeps
+# a full copy in memory. The catalog version lives in a small file shared by
+# every gunicorn worker on the host: manage_menu bumps it after a commit and
+# each worker reloads on its next read once it sees a newer number.
+#
+# Every reload is diffed against the previous copy: each dish remembers the
+# version it last changed in, and deleted dishes leave a tombstone, so
+# changes_since() can tell a client holding an older version what to fetch.
+# That history starts at the worker's first load; older versions get None
+# and the caller sends everything.
+class MenuCatalog:
+    def __init__(self, loader, version_file):
+        self.loader = loader
+        self.version_file = version_file
+        self._lock = threading.Lock()
+        self._version = None
+        self._foods = []
+        self._by_id = {}
+        self._categories = []
+        self._listeners = []
+        self._first_version = None
+        self._changed = {}  # food_id -> version it last changed in
+        self._removed = {}  # food_id -> version it was deleted in
+
+    # ---------- Version file ----------
+    def current_version(self):
+        try:
+            with open(self.version_file) as fh:
+                return int(fh.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump_version(self):
+        os.makedirs(os.path.dirname(self.version_file) or '.', exist_ok=True)
+        with open(self.version_file + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                version = self.current_version() + 1
+                tmp = f"{self.version_file}.{os.getpid()}.tmp"
+                with open(tmp, 'w') as fh:
+                    fh.write(str(version))
+                os.replace(tmp, self.version_file)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        logging.info("Menu catalog bumped to version %s", version)
+        return version
+
+    # ---------- Snapshot ----------
+    def refresh(self):
+        version = self.current_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            # Version is read before loading: a write racing with the load
+            # bumps the file again and the next read reloads.
+            foods = list(self.loader())
+            foods.sort(key=lambda f: f['food_id'])
+            categories = []
+            for f in foods:
+                if f.get('available') and f.get('category') not in categories:
+                    categories.append(f['category'])
+            by_id = {f['food_id']: f for f in foods}
+            if self._first_version is None:
+                self._first_version = version
+            else:
+                for food_id, food in by_id.items():
+                    if self._by_id.get(food_id) != food:
+                        self._changed[food_id] = version
+                        self._removed.pop(food_id, None)
+                for food_id in self._by_id.keys() - by_id.keys():
+                    self._removed[food_id] = version
+                    self._changed.pop(food_id, None)
+            self._foods = foods
+            self._by_id = by_id
+            self._categories = categories
+            self._version = version
+            for listener in self._listeners:
+                try:
+                    listener(foods)
+                except Exception:
+                    logging.exception("Menu catalog listener failed")
+
+    def on_reload(self, listener):
+        # listener(foods) runs after every reload; rows are shared, not copied.
+        self._listeners.append(listener)
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    @property
+    def version(self):
+        self.refresh()
+        return self._version
+
+    def snapshot(self):
+        # (version, rows) from the same load; rows are shared, read only.
+        self.refresh()
+        with self._lock:
+            return self._version, self._foods
+
+    def changes_since(self, version):
+        # (version, changed rows, deleted food_ids) since `version`, or None
+        # when this worker can't tell (older than its first load, or newer
+        # than it knows). Changed rows are shared, read only.
+        self.refresh()
+        with self._lock:
+            if (self._first_version is None or version < self._first_version
+                    or version > self._version):
+                return None
+            changed = [f for f in self._foods if self._changed.get(f['food_id'], -1) > version]
+            removed = [i for i, v in self._removed.items() if v > version]
+            return self._version, changed, removed
+
+    # Rows are copied so routes can annotate them (discounted_price) freely.
+    def all_foods(self):
+        self.refresh()
+        return [dict(f) for f in self._foods]
+
+    def available_foods(self, category=None):
+        self.refresh()
+        foods = []
+        for f in self._foods:
+            if not f.get('available'):
+                continue
+            if category and f.get('category') != category:
+                continue
+            foods.append(dict(f))
+        return foods
+
+    def categories(self):
+        self.refresh()
+        return list(self._categories)
+
+    def get(self, food_id):
+        self.refresh()
+        food = self._by_id.get(int(food_id))
+        return dict(food) if food else None
@@ -0,0 +1,143 @@
+import io
+import csv
+import json
+import logging
+
+import rollups
+
+FIELDS = ('food_id', 'food_name', 'category', 'price', 'discount_percent', 'image_url', 'available')
+MAX_IMPORT_ROWS = 2000
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'n', 'off', '')
+
+UPSERT = """
+    INSERT INTO food (food_id, food_name, category, price, discount_percent, image_url, available)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        food_name = VALUES(food_name),
+        category = VALUES(category),
+        price = VALUES(price),
+        discount_percent = VALUES(discount_percent),
+        image_url = VALUES(image_url),
+        available = VALUES(available)
+"""
+
+
+# ---------------- Menu Import ----------------
+# Bulk create/update of menu items from a CSV (header row with the column
+# names in FIELDS) or a JSON list of objects. Rows with a food_id update that
+# item, rows without one are added. Bad rows are reported by row number and
+# skipped; the rest of the file still goes in.
+def parse(filename, data):
+    # Returns [(row_number, {field: value}), ...]; raises ValueError when the
+    # file itself can't be read.
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("File is not UTF-8 text.")
+    if filename.lower().endswith('.json') or text.lstrip().startswith(('[', '{')):
+        try:
+            payload = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(payload, dict):
+            payload = payload.get('items')
+        if not isinstance(payload, list):
+            raise ValueError("JSON must be a list of menu items.")
+        rows = [(i, item) for i, item in enumerate(payload, start=1)]
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or 'food_name' not in reader.fieldnames:
+            raise ValueError("CSV needs a header row with at least food_name, category and price.")
+        rows = [(i, item) for i, item in enumerate(reader, start=2)]
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS} rows per import.")
+    return rows
+
+
+def validate(rows):
+    # Returns (clean rows, errors) where errors are (row_number, message).
+    clean, errors = [], []
+    for line, item in rows:
+        if not isinstance(item, dict):
+            errors.append((line, "not an object"))
+            continue
+        item = {k: (str(v).strip() if v is not None else '') for k, v in item.items() if k in FIELDS}
+        try:
+            food_id = int(item['food_id']) if item.get('food_id') else None
+            if not item.get('food_name'):
+                raise ValueError("food_name is required")
+            if not item.get('category'):
+                raise ValueError("category is required")
+            try:
+                price = round(float(item.get('price', '')), 2)
+            except ValueError:
+                raise ValueError("price must be a number")
+            if price < 0:
+                raise ValueError("price must not be negative")
+            try:
+                discount = float(item.get('discount_percent') or 0)
+            except ValueError:
+                raise ValueError("discount_percent must be a number")
+            if not 0 <= discount <= 100:
+                raise ValueError("discount_percent must be between 0 and 100")
+            available = item.get('available', '1').lower()
+            if available not in TRUE_VALUES + FALSE_VALUES:
+                raise ValueError("available must be yes/no")
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        clean.append((line, {
+            'food_id': food_id,
+            'food_name': item['food_name'],
+            'category': item['category'],
+            'price': price,
+            'discount_percent': discount,
+            'image_url': item.get('image_url') or None,
+            'available': 1 if available in TRUE_VALUES else 0,
+        }))
+    return clean, errors
+
+
+def _params(row):
+    return tuple(row[f] for f in FIELDS)
+
+
+def upsert(cur, rows):
+    # Writes validated rows inside the caller's transaction. Returns
+    # (rows written, errors). The whole batch goes in with one executemany;
+    # if the database rejects it, the batch is retried row by row so one bad
+    # row is reported instead of failing the import.
+    if not rows:
+        return 0, []
+    ids = sorted({row['food_id'] for _, row in rows if row['food_id'] is not None})
+    current = {}
+    if ids:
+        cur.execute(f"SELECT food_id, category FROM food WHERE food_id IN ({', '.join(['%s'] * len(ids))}) FOR UPDATE",
+                    ids)
+        current = {r[0]: r[1] for r in cur.fetchall()}
+    # Orders of an item that changes category move to another rollup row.
+    moved = sorted({row['food_id'] for _, row in rows
+                    if row['food_id'] in current and current[row['food_id']] != row['category']})
+    rollups.foods_removed(cur, moved)
+
+    errors = []
+    cur.execute("SAVEPOINT menu_import")
+    try:
+        cur.executemany(UPSERT, [_params(row) for _, row in rows])
+        written = len(rows)
+    except Exception:
+        cur.execute("ROLLBACK TO SAVEPOINT menu_import")
+        written = 0
+        for line, row in rows:
+            cur.execute("SAVEPOINT menu_import_row")
+            try:
+                cur.execute(UPSERT, _params(row))
+                written += 1
+            except Exception as e:
+                cur.execute("ROLLBACK TO SAVEPOINT menu_import_row")
+                logging.warning("Menu import row %s rejected: %s", line, e)
+                errors.append((line, str(e.args[-1]) if getattr(e, 'args', None) else str(e)))
+
+    rollups.foods_added(cur, moved)
+    return written, errors
@@ -0,0 +1,191 @@
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+
+from flask import g, request, has_request_context
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+slow_log = logging.getLogger('slow_query')
+
+
+# ---------------- Metrics ----------------
+# Small in-process registry rendered in the Prometheus text format. Each
+# worker keeps its own numbers; the scrape shows the worker that answered.
+class Histogram:
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for label_values, data in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {data[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {data[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {data[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+def gauge_lines(name, help, value):
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def counter_lines(name, help, value):
+    # For totals another object already keeps (pool, caches); `name` ends in _total.
+    return [f"# HELP {name} {help}", f"# TYPE {name} counter", f"{name} {value}"]
+
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Time spent in the view, by route.',
+                            ('route', 'method', 'status'), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram('http_request_sql_queries', 'SQL statements issued per request.',
+                            ('route',), QUERY_COUNT_BUCKETS)
+REQUEST_SQL_TIME = Histogram('http_request_sql_seconds', 'Cumulative SQL time per request.',
+                             ('route',), LATENCY_BUCKETS)
+SLOW_QUERIES = Counter('sql_slow_queries_total', 'Statements slower than SLOW_QUERY_MS.', ('route',))
+
+REGISTRY = [REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_SQL_TIME, SLOW_QUERIES]
+
+
+def render(extra_lines=()):
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------- SQL Instrumentation ----------------
+_PLACEHOLDER_RUN = re.compile(r'%s(\s*,\s*%s)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def redact(sql):
+    # Statement text for logs: whitespace collapsed, IN (%s, %s, ...) runs
+    # folded so the same query always logs the same way. Parameter values
+    # are never logged.
+    return _PLACEHOLDER_RUN.sub('%s, ...', _WHITESPACE.sub(' ', sql).strip())
+
+
+class InstrumentedCursor:
+    # Wraps a DB-API cursor: execute/executemany are timed and added to the
+    # current request's totals; everything else passes through.
+    def __init__(self, cursor, slow_query_seconds):
+        self._cursor = cursor
+        self._slow = slow_query_seconds
+
+    def _timed(self, method, sql, params):
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            elapsed = time.perf_counter() - start
+            if has_request_context():
+                g.sql_count = g.get('sql_count', 0) + 1
+                g.sql_time = g.get('sql_time', 0.0) + elapsed
+            if elapsed >= self._slow:
+                count = len(params) if isinstance(params, (list, tuple)) else (0 if params is None else 1)
+                route = g.get('metrics_route', '-') if has_request_context() else '-'
+                SLOW_QUERIES.inc(route)
+                slow_log.warning("%.1f ms [%s] %s (%d params redacted)",
+                                 elapsed * 1000, route, redact(sql), count)
+
+    def execute(self, sql, params=None):
+        return self._timed(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq):
+        return self._timed(self._cursor.executemany, sql, seq)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ---------------- Request Lifecycle ----------------
+def init_app(app):
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.metrics_route = request_route()
+
+    @app.after_request
+    def record_request(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = g.get('metrics_route') or request_route()
+        REQUEST_LATENCY.observe(elapsed, route, request.method, response.status_code)
+        REQUEST_QUERIES.observe(g.sql_count, route)
+        REQUEST_SQL_TIME.observe(g.sql_time, route)
+        response.headers.add('Server-Timing', f'db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries"')
+        response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}')
+        return response
+
+
+def request_route():
+    # The URL rule, not the path, so /order/7 and /order/8 share a series.
+    return request.url_rule.rule if request.url_rule else 'unmatched'
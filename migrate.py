@@ -0,0 +1,177 @@
+import os
+import re
+import logging
+import importlib.util
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)(?:\.(mysql|sqlite))?\.(sql|py)$')
+LOCK_NAME = 'schema_migrations'
+
+
+# ---------------- Migration Discovery ----------------
+# migrations/NNNN_name.sql is a list of ';'-terminated statements;
+# migrations/NNNN_name.py defines upgrade(cur) for changes SQL alone can't
+# express portably (e.g. "add column if missing"). Where the engines'
+# dialects differ, NNNN_name.sqlite.sql (or .py) is used instead of the plain
+# file on DB_ENGINE=sqlite; both share the version number.
+def engine_of(conn):
+    return getattr(conn, 'engine', 'mysql')
+
+
+def discover(path=MIGRATIONS_DIR, engine='mysql'):
+    found = {}
+    for filename in sorted(os.listdir(path)):
+        m = MIGRATION_FILE.match(filename)
+        if not m or m.group(3) not in (None, engine):
+            continue
+        version = int(m.group(1))
+        specific = m.group(3) is not None
+        if version in found:
+            if found[version]['specific'] == specific:
+                raise RuntimeError(f"Duplicate migration version {version:04d}: {filename}")
+            if not specific:
+                continue
+        found[version] = {
+            'version': version,
+            'name': m.group(2),
+            'kind': m.group(4),
+            'path': os.path.join(path, filename),
+            'specific': specific,
+        }
+    return [found[v] for v in sorted(found)]
+
+
+def split_statements(sql):
+    lines = [l for l in sql.splitlines() if not l.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(lines).split(';') if s.strip()]
+
+
+def _load_module(migration):
+    spec = importlib.util.spec_from_file_location(
+        f"migration_{migration['version']:04d}", migration['path'])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------- Runner ----------------
+def ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cur):
+    ensure_version_table(cur)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def pending(conn, path=MIGRATIONS_DIR):
+    cur = conn.cursor()
+    try:
+        done = applied_versions(cur)
+    finally:
+        cur.close()
+    return [m for m in discover(path, engine_of(conn)) if m['version'] not in done]
+
+
+def apply(conn, migration):
+    # MySQL commits DDL implicitly (and so does sqlite3 outside a
+    # transaction), so a failed migration may be partially applied; the
+    # version row is only written once every statement ran.
+    cur = conn.cursor()
+    try:
+        if migration['kind'] == 'sql':
+            with open(migration['path'], encoding='utf-8') as fh:
+                for statement in split_statements(fh.read()):
+                    cur.execute(statement)
+        else:
+            _load_module(migration).upgrade(cur)
+        cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (migration['version'], migration['name']))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def upgrade(conn, target=None, path=MIGRATIONS_DIR):
+    cur = conn.cursor()
+    # Serialise concurrent deploys: only one process migrates at a time.
+    # (SQLite already allows a single writer.)
+    locking = engine_of(conn) == 'mysql'
+    if locking:
+        cur.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+        if not cur.fetchone()[0]:
+            cur.close()
+            raise RuntimeError("Another process is running migrations")
+    applied = []
+    try:
+        for migration in pending(conn, path):
+            if target is not None and migration['version'] > target:
+                break
+            logging.info("Applying migration %04d_%s", migration['version'], migration['name'])
+            apply(conn, migration)
+            applied.append(migration)
+    finally:
+        if locking:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cur.close()
+    return applied
+
+
+# ---------------- Query Plans ----------------
+# The hot queries and the index each one must use. check_plans() runs
+# EXPLAIN on them so a missing or ignored index fails loudly (CI, deploys).
+HOT_QUERIES = [
+    ('orders by date', "SELECT o.order_id FROM orders o ORDER BY o.order_date DESC, o.order_id DESC LIMIT 25",
+     (), 'idx_orders_date_id'),
+    ('orders by status', "SELECT o.order_id FROM orders o WHERE o.delivery_option = %s "
+     "ORDER BY o.order_date DESC, o.order_id DESC LIMIT 25", ('Pending',), 'idx_orders_status_date'),
+    ('pending count', "SELECT COUNT(*) FROM orders WHERE delivery_option = %s", ('Pending',),
+     'idx_orders_status_date'),
+    ('archive batch', "SELECT order_id FROM orders WHERE payment_date IS NOT NULL AND delivery_option = %s "
+     "AND order_date < %s ORDER BY order_date, order_id LIMIT 500", ('Completed', '2000-01-01'),
+     'idx_orders_status_date'),
+    ('menu by category', "SELECT food_id FROM food WHERE available = 1 AND category = %s", ('Drink',),
+     'idx_food_available_category'),
+]
+
+
+SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def explain(cur, sql, params=(), engine='mysql'):
+    if engine == 'sqlite':
+        # Rows of (id, parent, notused, detail); the index is named in detail.
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+        plan = []
+        for row in cur.fetchall():
+            m = SQLITE_INDEX.search(row[3])
+            plan.append({'detail': row[3], 'key': m.group(1) if m else None})
+        return plan
+    cur.execute("EXPLAIN " + sql, params)
+    columns = [d[0] for d in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def check_plans(conn, queries=HOT_QUERIES):
+    # Returns [(label, expected_index, plan_rows, ok)]. Tiny tables can make
+    # the optimizer prefer a scan, so results matter on realistic data.
+    results = []
+    cur = conn.cursor()
+    try:
+        for label, sql, params, index in queries:
+            plan = explain(cur, sql, params, engine_of(conn))
+            ok = any(row.get('key') == index for row in plan)
+            results.append((label, index, plan, ok))
+    finally:
+        cur.close()
+    return results
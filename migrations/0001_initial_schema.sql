@@ -0,0 +1,48 @@
+-- Baseline schema matching the queries in app.py (MySQL / InnoDB).
+-- Uses IF NOT EXISTS so databases created by hand before migrations
+-- existed can be adopted; 0002 fills in any columns they are missing.
+
+CREATE TABLE IF NOT EXISTS users (
+    username VARCHAR(50) NOT NULL PRIMARY KEY,
+    password VARCHAR(255) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    login_type VARCHAR(10) NOT NULL DEFAULT 'user',   -- 'user' or 'admin'
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS food (
+    food_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    food_name VARCHAR(100) NOT NULL,
+    category VARCHAR(50),
+    price DECIMAL(10, 2) NOT NULL,
+    discount_percent DECIMAL(5, 2) NOT NULL DEFAULT 0,
+    description TEXT,
+    image_url VARCHAR(255),
+    available TINYINT(1) NOT NULL DEFAULT 1,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    customer_name VARCHAR(100) NOT NULL,
+    phone VARCHAR(30),
+    address VARCHAR(255),
+    note TEXT,
+    food_id INT NOT NULL,
+    quantity INT NOT NULL,
+    total_price DECIMAL(10, 2) NOT NULL,
+    delivery_option VARCHAR(20) DEFAULT 'delivery',
+    delivery_service VARCHAR(50),
+    order_date DATETIME NOT NULL,
+    payment_method VARCHAR(30),
+    payment_date DATETIME NULL,
+    CONSTRAINT fk_orders_food FOREIGN KEY (food_id) REFERENCES food (food_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS feedback (
+    feedback_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    message TEXT NOT NULL,
+    submitted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,48 @@
+-- Baseline schema for DB_ENGINE=sqlite: the tables of 0001_initial_schema.sql
+-- in the SQLite dialect database.sql uses. Declared types are kept
+-- (DATETIME, DECIMAL) so values come back as datetime / Decimal like MySQL's.
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT NOT NULL PRIMARY KEY,
+    password TEXT NOT NULL,
+    email TEXT NOT NULL,
+    login_type TEXT NOT NULL DEFAULT 'user',   -- 'user' or 'admin'
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS food (
+    food_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    food_name TEXT NOT NULL,
+    category TEXT,
+    price DECIMAL(10, 2) NOT NULL,
+    discount_percent DECIMAL(5, 2) NOT NULL DEFAULT 0,
+    description TEXT,
+    image_url TEXT,
+    available INTEGER NOT NULL DEFAULT 1,      -- 0 = false, 1 = true
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_name TEXT NOT NULL,
+    phone TEXT,
+    address TEXT,
+    note TEXT,
+    food_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    total_price DECIMAL(10, 2) NOT NULL,
+    delivery_option TEXT DEFAULT 'delivery',
+    delivery_service TEXT,
+    order_date DATETIME NOT NULL,
+    payment_method TEXT,
+    payment_date DATETIME NULL,
+    FOREIGN KEY (food_id) REFERENCES food (food_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    message TEXT NOT NULL,
+    submitted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,20 @@
+# Databases created from the old database.sql (or by hand) lack columns the
+# app has always queried. Add whichever are missing.
+
+COLUMNS = [
+    ('users', 'login_type', "VARCHAR(10) NOT NULL DEFAULT 'user'"),
+    ('users', 'created_at', "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"),
+    ('food', 'description', "TEXT"),
+    ('food', 'created_at', "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"),
+    ('feedback', 'submitted_at', "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"),
+]
+
+
+def upgrade(cur):
+    for table, column, ddl in COLUMNS:
+        cur.execute("""
+            SELECT 1 FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+        if not cur.fetchone():
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
@@ -0,0 +1,25 @@
+# SQLite version of 0002: databases created from database.sql lack columns
+# the app queries. SQLite can't add a column whose default is
+# CURRENT_TIMESTAMP, so those are added nullable and back-filled.
+
+COLUMNS = [
+    ('users', 'login_type', "TEXT NOT NULL DEFAULT 'user'", None),
+    ('users', 'created_at', "DATETIME", "CURRENT_TIMESTAMP"),
+    ('food', 'description', "TEXT", None),
+    ('food', 'created_at', "DATETIME", "CURRENT_TIMESTAMP"),
+    ('feedback', 'submitted_at', "DATETIME", "CURRENT_TIMESTAMP"),
+]
+
+
+def upgrade(cur):
+    for table, column, ddl, fill in COLUMNS:
+        cur.execute(f"PRAGMA table_info({table})")
+        if column in {row[1] for row in cur.fetchall()}:
+            continue
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        if fill:
+            cur.execute(f"UPDATE {table} SET {column} = {fill} WHERE {column} IS NULL")
+    # database.sql flagged admins with is_admin instead of login_type.
+    cur.execute("PRAGMA table_info(users)")
+    if 'is_admin' in {row[1] for row in cur.fetchall()}:
+        cur.execute("UPDATE users SET login_type = 'admin' WHERE is_admin = 1")
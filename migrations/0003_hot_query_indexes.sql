@@ -0,0 +1,12 @@
+-- Indexes for the access paths the routes actually use.
+
+-- order_list / manage_orders / dashboard: ORDER BY order_date DESC with the
+-- (order_date, order_id) keyset cursor.
+CREATE INDEX idx_orders_date_id ON orders (order_date, order_id);
+
+-- Status-filtered listings and the dashboard's pending count
+-- (WHERE delivery_option = 'Pending').
+CREATE INDEX idx_orders_status_date ON orders (delivery_option, order_date, order_id);
+
+-- Menu loads: WHERE available = 1 AND category = %s.
+CREATE INDEX idx_food_available_category ON food (available, category);
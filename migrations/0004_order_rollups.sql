@@ -0,0 +1,25 @@
+-- Pre-aggregated order counts and revenue for the admin dashboard, kept up
+-- to date in the same transaction as every order write (see rollups.py).
+-- One row per (bucket, food category, order status).
+
+CREATE TABLE order_rollup_hourly (
+    bucket_start DATETIME NOT NULL,
+    category VARCHAR(50) NOT NULL DEFAULT '',
+    status VARCHAR(20) NOT NULL DEFAULT '',
+    order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    paid_count INT NOT NULL DEFAULT 0,
+    paid_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, category, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE order_rollup_daily (
+    bucket_start DATE NOT NULL,
+    category VARCHAR(50) NOT NULL DEFAULT '',
+    status VARCHAR(20) NOT NULL DEFAULT '',
+    order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    paid_count INT NOT NULL DEFAULT 0,
+    paid_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, category, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
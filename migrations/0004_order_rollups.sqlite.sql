@@ -0,0 +1,23 @@
+-- SQLite version of 0004_order_rollups.sql (see rollups.py).
+
+CREATE TABLE order_rollup_hourly (
+    bucket_start DATETIME NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    paid_count INTEGER NOT NULL DEFAULT 0,
+    paid_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, category, status)
+);
+
+CREATE TABLE order_rollup_daily (
+    bucket_start DATE NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    paid_count INTEGER NOT NULL DEFAULT 0,
+    paid_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, category, status)
+);
@@ -0,0 +1,16 @@
+-- Line items for multi-dish orders placed through the cart. The orders row
+-- stays the header: food_id is the first line's dish (for list thumbnails),
+-- quantity the total item count and total_price the order total.
+
+CREATE TABLE order_items (
+    order_item_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    order_id INT NOT NULL,
+    food_id INT NOT NULL,
+    food_name VARCHAR(100) NOT NULL,      -- name at order time
+    quantity INT NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,   -- after discount and coupon
+    line_total DECIMAL(10, 2) NOT NULL,
+    KEY idx_order_items_order (order_id),
+    CONSTRAINT fk_order_items_order FOREIGN KEY (order_id) REFERENCES orders (order_id) ON DELETE CASCADE,
+    CONSTRAINT fk_order_items_food FOREIGN KEY (food_id) REFERENCES food (food_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
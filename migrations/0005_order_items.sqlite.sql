@@ -0,0 +1,15 @@
+-- SQLite version of 0005_order_items.sql.
+
+CREATE TABLE order_items (
+    order_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    food_id INTEGER NOT NULL,
+    food_name TEXT NOT NULL,              -- name at order time
+    quantity INTEGER NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,   -- after discount and coupon
+    line_total DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (order_id) REFERENCES orders (order_id) ON DELETE CASCADE,
+    FOREIGN KEY (food_id) REFERENCES food (food_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_order_items_order ON order_items (order_id);
@@ -0,0 +1,22 @@
+-- Coupon rules read by coupons.py. kind 'percent' takes amount % off,
+-- 'fixed' takes amount off each item's unit price. category (optional)
+-- limits the coupon to one menu category; starts_at/ends_at bound when it
+-- can be used and max_uses caps redemptions (NULL = unlimited).
+
+CREATE TABLE coupons (
+    coupon_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    code VARCHAR(30) NOT NULL,
+    kind VARCHAR(10) NOT NULL DEFAULT 'percent',
+    amount DECIMAL(10, 2) NOT NULL,
+    category VARCHAR(50) NULL,
+    starts_at DATETIME NULL,
+    ends_at DATETIME NULL,
+    max_uses INT NULL,
+    used_count INT NOT NULL DEFAULT 0,
+    active TINYINT(1) NOT NULL DEFAULT 1,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_coupons_code (code)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- The code that used to be hardcoded in apply_coupon().
+INSERT IGNORE INTO coupons (code, kind, amount) VALUES ('PNC', 'percent', 20);
@@ -0,0 +1,17 @@
+-- SQLite version of 0006_coupons.sql.
+
+CREATE TABLE coupons (
+    coupon_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL DEFAULT 'percent',
+    amount DECIMAL(10, 2) NOT NULL,
+    category TEXT NULL,
+    starts_at DATETIME NULL,
+    ends_at DATETIME NULL,
+    max_uses INTEGER NULL,
+    used_count INTEGER NOT NULL DEFAULT 0,
+    active INTEGER NOT NULL DEFAULT 1,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO coupons (code, kind, amount) VALUES ('PNC', 'percent', 20);
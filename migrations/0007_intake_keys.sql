@@ -0,0 +1,11 @@
+-- Idempotency keys of rows written by the intake drainer (intake.py). The
+-- unique keys make a drain that is repeated after a crash find the row it
+-- already inserted instead of inserting it again. NULL for older rows.
+
+ALTER TABLE orders
+    ADD COLUMN intake_key VARCHAR(64) NULL,
+    ADD UNIQUE KEY uq_orders_intake_key (intake_key);
+
+ALTER TABLE feedback
+    ADD COLUMN intake_key VARCHAR(64) NULL,
+    ADD UNIQUE KEY uq_feedback_intake_key (intake_key);
@@ -0,0 +1,7 @@
+-- SQLite version of 0007_intake_keys.sql.
+
+ALTER TABLE orders ADD COLUMN intake_key TEXT NULL;
+CREATE UNIQUE INDEX uq_orders_intake_key ON orders (intake_key);
+
+ALTER TABLE feedback ADD COLUMN intake_key TEXT NULL;
+CREATE UNIQUE INDEX uq_feedback_intake_key ON feedback (intake_key);
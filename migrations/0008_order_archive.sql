@@ -0,0 +1,44 @@
+-- Paid, completed orders older than the retention horizon are moved here
+-- by archive.py, keeping orders/order_items small enough to stay in the
+-- buffer pool. orders_archive is partitioned by order year: archive.py adds
+-- the partition for a year before moving its first order, and an old year
+-- can be dropped or exported as a whole. MySQL requires the partitioning
+-- column in every unique key, hence (order_id, order_date).
+--
+-- No foreign keys (partitioned InnoDB tables can't have them, and history
+-- outlives deleted dishes): the dish name is copied in instead.
+
+CREATE TABLE orders_archive (
+    order_id INT NOT NULL,
+    customer_name VARCHAR(100) NOT NULL,
+    phone VARCHAR(30),
+    address VARCHAR(255),
+    note TEXT,
+    food_id INT NOT NULL,
+    food_name VARCHAR(100),
+    quantity INT NOT NULL,
+    total_price DECIMAL(10, 2) NOT NULL,
+    delivery_option VARCHAR(20),
+    delivery_service VARCHAR(50),
+    order_date DATETIME NOT NULL,
+    payment_method VARCHAR(30),
+    payment_date DATETIME NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (order_id, order_date),
+    KEY idx_orders_archive_payment (payment_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY RANGE (YEAR(order_date)) (
+    PARTITION p_old VALUES LESS THAN (2024),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE order_items_archive (
+    order_item_id INT NOT NULL PRIMARY KEY,
+    order_id INT NOT NULL,
+    food_id INT NOT NULL,
+    food_name VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    line_total DECIMAL(10, 2) NOT NULL,
+    KEY idx_order_items_archive_order (order_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
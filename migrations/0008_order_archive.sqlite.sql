@@ -0,0 +1,33 @@
+-- SQLite version of 0008_order_archive.sql (no partitioning).
+
+CREATE TABLE orders_archive (
+    order_id INTEGER NOT NULL PRIMARY KEY,
+    customer_name TEXT NOT NULL,
+    phone TEXT,
+    address TEXT,
+    note TEXT,
+    food_id INTEGER NOT NULL,
+    food_name TEXT,
+    quantity INTEGER NOT NULL,
+    total_price DECIMAL(10, 2) NOT NULL,
+    delivery_option TEXT,
+    delivery_service TEXT,
+    order_date DATETIME NOT NULL,
+    payment_method TEXT,
+    payment_date DATETIME NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_orders_archive_payment ON orders_archive (payment_date);
+
+CREATE TABLE order_items_archive (
+    order_item_id INTEGER NOT NULL PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    food_id INTEGER NOT NULL,
+    food_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    line_total DECIMAL(10, 2) NOT NULL
+);
+
+CREATE INDEX idx_order_items_archive_order ON order_items_archive (order_id);
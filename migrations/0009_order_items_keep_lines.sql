@@ -0,0 +1,7 @@
+-- Deleting a dish cascaded into order_items (0005) and silently removed its
+-- lines from older multi-dish orders, whose headers kept the old totals.
+-- Lines already carry the dish name from order time, so they don't need
+-- the dish to exist: drop the foreign key. The index MySQL created for it
+-- stays and serves lookups by food_id (rollups).
+
+ALTER TABLE order_items DROP FOREIGN KEY fk_order_items_food;
@@ -0,0 +1,22 @@
+-- SQLite version of 0009_order_items_keep_lines.sql: SQLite can't drop a
+-- foreign key, so the table is rebuilt without it.
+
+CREATE TABLE order_items_new (
+    order_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    food_id INTEGER NOT NULL,             -- the dish may since have been deleted
+    food_name TEXT NOT NULL,              -- name at order time
+    quantity INTEGER NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,   -- after discount and coupon
+    line_total DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (order_id) REFERENCES orders (order_id) ON DELETE CASCADE
+);
+
+INSERT INTO order_items_new (order_item_id, order_id, food_id, food_name, quantity, unit_price, line_total)
+SELECT order_item_id, order_id, food_id, food_name, quantity, unit_price, line_total FROM order_items;
+
+DROP TABLE order_items;
+ALTER TABLE order_items_new RENAME TO order_items;
+
+CREATE INDEX idx_order_items_order ON order_items (order_id);
+CREATE INDEX idx_order_items_food ON order_items (food_id);
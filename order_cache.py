@@ -0,0 +1,145 @@
+import os
+import mmap
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single worker, no cross-process lock needed
+    fcntl = None
+
+Entry = namedtuple('Entry', 'value generation expires')
+
+SLOT_SIZE = 8
+
+
+# ---------------- Order Generations ----------------
+# A small file shared by every worker on the host: one counter per slot,
+# order_id picks the slot. A write bumps the counters of the orders it
+# touched after its commit; a cached record remembers the counter it was
+# loaded under and is dropped once the counter moved. Reads are a memory
+# access (the file is mapped), so checking costs nothing per request.
+# Orders sharing a slot invalidate each other now and then, which only
+# costs a reload.
+class GenerationFile:
+    def __init__(self, path, slots=4096):
+        self.path = path
+        self.slots = slots
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _mapped(self):
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        size = self.slots * SLOT_SIZE
+                        if os.fstat(fd).st_size < size:
+                            os.ftruncate(fd, size)
+                        self._map = mmap.mmap(fd, size)
+                    finally:
+                        os.close(fd)
+        return self._map
+
+    def _offset(self, order_id):
+        return (int(order_id) % self.slots) * SLOT_SIZE
+
+    def get(self, order_id):
+        offset = self._offset(order_id)
+        return int.from_bytes(self._mapped()[offset:offset + SLOT_SIZE], 'little')
+
+    def bump(self, order_ids):
+        mapped = self._mapped()
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            for offset in {self._offset(i) for i in order_ids}:
+                value = int.from_bytes(mapped[offset:offset + SLOT_SIZE], 'little') + 1
+                mapped[offset:offset + SLOT_SIZE] = (value % 2 ** 64).to_bytes(SLOT_SIZE, 'little')
+
+
+# ---------------- Order Detail Cache ----------------
+# The checkout walk (order success, pay, payment success, receipt, PDF)
+# reads the same order a handful of times within a minute. Each worker
+# keeps the last few hundred (order, items) records in memory, least
+# recently used out first, each for at most `ttl` seconds. Routes that
+# change an order call invalidate() after their commit; through the
+# generation file that reaches every worker, not just the one that wrote.
+# Misses aren't cached: an order that doesn't exist yet is looked up again.
+class OrderCache:
+    def __init__(self, generation_file, ttl=60, max_entries=1000):
+        self.generations = GenerationFile(generation_file)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, order_id, loader):
+        # The cached record for order_id, else loader()'s (cached unless None).
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return loader()
+        # Read the generation before loading, so a write committed while
+        # the loader runs still invalidates what it returns.
+        generation = self.generations.get(order_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if entry is not None:
+                if entry.generation == generation and entry.expires > now:
+                    self._entries.move_to_end(order_id)
+                    self._hits += 1
+                    return entry.value
+                del self._entries[order_id]
+                if entry.generation != generation:
+                    self._stale += 1
+                else:
+                    self._expired += 1
+            self._misses += 1
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[order_id] = Entry(value, generation, now + self.ttl)
+                self._entries.move_to_end(order_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def invalidate(self, order_ids):
+        order_ids = [int(i) for i in order_ids]
+        if not order_ids:
+            return
+        with self._lock:
+            for order_id in order_ids:
+                self._entries.pop(order_id, None)
+            self._invalidations += len(order_ids)
+        self.generations.bump(order_ids)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0,
+                'stale': self._stale,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
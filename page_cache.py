@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+Page = namedtuple('Page', 'body etag')
+
+
+# ---------------- Rendered Page Cache ----------------
+# Whole rendered pages kept in memory per worker, least recently used first
+# out once the bodies add up to more than max_bytes. Callers build the key
+# from everything the page depends on (arguments, menu version, ...), so
+# entries never need invalidating: a new menu version simply stops matching
+# the old ones, and they age out.
+class PageCache:
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self._misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self._hits += 1
+            return page
+
+    def put(self, key, body):
+        page = Page(body, hashlib.sha256(body).hexdigest()[:32])
+        if len(body) > self.max_bytes:
+            return page
+        with self._lock:
+            old = self._pages.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._pages[key] = page
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._evictions += 1
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._pages),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+            }
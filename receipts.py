@@ -0,0 +1,227 @@
+import os
+import io
+import atexit
+import hashlib
+import logging
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Bump when the layout changes so cached receipts are re-rendered.
+RENDER_VERSION = 2
+
+
+# ---------------- PDF Layout ----------------
+# reportlab takes longer to import than the rest of the app together and
+# only matters once a receipt is rendered, so it is loaded on first use
+# (or by preload(), in a gunicorn master before it forks).
+def preload():
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+
+def _canvas(buffer, title):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.setTitle(title)
+    return pdf
+
+
+def _table_header(pdf, y):
+    # Drawn above the items on the first page and on every continuation page.
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Food")
+    pdf.drawString(250, y, "Qty")
+    pdf.drawString(350, y, "Price")
+    pdf.drawString(450, y, "Total")
+    pdf.setFont("Helvetica", 12)
+    return y - 20
+
+
+def _draw_receipt(pdf, order, items):
+    # Header
+    pdf.setFont("Helvetica-Bold", 18)
+    pdf.drawCentredString(300, 750, "✅ Payment Successful!")
+    pdf.setFont("Helvetica", 12)
+
+    y = 710
+    pdf.drawString(50, y, f"Order ID: {order['order_id']}")
+    y -= 20
+    pdf.drawString(50, y, f"Customer: {order['customer_name']}")
+    y -= 20
+    pdf.drawString(50, y, f"Phone: {order['phone']}")
+    y -= 20
+    pdf.drawString(50, y, f"Address: {order['address']}")
+    y -= 20
+    pdf.drawString(50, y, f"Delivery: {order['delivery_option']} via {order['delivery_service']}")
+
+    # Divider
+    y -= 30
+    pdf.line(50, y, 550, y)
+    y -= 30
+
+    # Table Content
+    y = _table_header(pdf, y)
+    for item in items:
+        if y < 160:
+            pdf.showPage()
+            y = _table_header(pdf, 750)
+        pdf.drawString(50, y, item['food_name'])
+        pdf.drawString(250, y, str(item['quantity']))
+        pdf.drawString(350, y, f"${item['unit_price']:.2f}")
+        pdf.drawString(450, y, f"${item['line_total']:.2f}")
+        y -= 20
+
+    # Payment Info
+    y -= 20
+    pdf.line(50, y, 550, y)
+    y -= 20
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(350, y, "Order Total")
+    pdf.drawString(450, y, f"${order['total_price']:.2f}")
+    pdf.setFont("Helvetica", 12)
+    y -= 30
+    pdf.drawString(50, y, f"Paid By: {order['payment_method']}")
+    y -= 20
+    pdf.drawString(50, y, f"Payment Date: {order['payment_date'].strftime('%Y-%m-%d %H:%M')}")
+
+    # Footer
+    pdf.setFont("Helvetica-Oblique", 12)
+    pdf.drawCentredString(300, 100, "Thank you for your payment! 🍕 Enjoy your meal!")
+    pdf.showPage()
+
+
+def render_receipt_pdf(order, items):
+    buffer = io.BytesIO()
+    pdf = _canvas(buffer, f"Payment Receipt #{order['order_id']}")
+    _draw_receipt(pdf, order, items)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_receipts_pdf(receipts, title):
+    # One document, one receipt per page, for accounting exports.
+    buffer = io.BytesIO()
+    pdf = _canvas(buffer, title)
+    for order, items in receipts:
+        _draw_receipt(pdf, order, items)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _render_to_file(order, items, path):
+    # Runs in a worker thread or process: write next to the target and
+    # rename so readers never see a half-written file.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as fh:
+        fh.write(render_receipt_pdf(order, items))
+    os.replace(tmp, path)
+    return path
+
+
+def _executor_class():
+    # Under serve_async.py threads are patched into greenlets, and a render
+    # in a greenlet would stall every other request on the loop: use gevent's
+    # pool of real OS threads instead.
+    try:
+        from gevent import monkey
+    except ImportError:
+        return ThreadPoolExecutor
+    if monkey.is_module_patched('threading'):
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+# ---------------- Receipt Cache ----------------
+# Rendered receipts are cached on disk keyed by order id and payment time:
+# paying again (a new payment_date) produces a new file, everything else is
+# immutable. Renders run on a small thread pool so pay_order_page can
+# pre-render right after payment without holding up the redirect. Bulk
+# exports render on a separate pool of `export_processes` processes, made on
+# the first export and shared by all of them (0: on the render threads).
+class ReceiptCache:
+    def __init__(self, directory, workers=2, export_processes=2):
+        self.directory = directory
+        self.workers = workers
+        self.export_processes = export_processes
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._export_pool = None
+        self._export_pid = None
+
+    @staticmethod
+    def key(order):
+        stamp = order['payment_date'].strftime('%Y%m%d%H%M%S')
+        return f"{order['order_id']}-{stamp}-v{RENDER_VERSION}"
+
+    def path(self, order):
+        return os.path.join(self.directory, f"receipt_{self.key(order)}.pdf")
+
+    def etag(self, order):
+        return hashlib.sha1(self.key(order).encode()).hexdigest()
+
+    def cached(self, order):
+        path = self.path(order)
+        return path if os.path.exists(path) else None
+
+    def _pool(self):
+        # Executors don't survive a fork; start a fresh one per worker.
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = _executor_class()(max_workers=self.workers, thread_name_prefix='receipt')
+            self._pid = os.getpid()
+            self._inflight = {}
+        return self._executor
+
+    def submit(self, order, items):
+        # Returns a future resolving to the cached file path. Concurrent
+        # requests for the same receipt share one render.
+        path = self.path(order)
+        with self._lock:
+            future = self._inflight.get(path)
+            if future is not None:
+                return future
+            os.makedirs(self.directory, exist_ok=True)
+            future = self._pool().submit(_render_to_file, order, items, path)
+            self._inflight[path] = future
+        # Outside the lock: a render that has already finished runs the
+        # callback right here, and _done takes the lock.
+        future.add_done_callback(lambda f, p=path: self._done(p, f))
+        return future
+
+    def _done(self, path, future):
+        with self._lock:
+            self._inflight.pop(path, None)
+        if future.exception():
+            logging.error("Receipt render failed for %s: %s", path, future.exception())
+
+    # ---------- Bulk Export ----------
+    def _export_executor(self):
+        # The layout code is CPU-bound and would serialise on the GIL, so
+        # exports render in processes. Like the thread pool, one per worker;
+        # it is shut down when the worker exits.
+        if not self.export_processes:
+            return self._pool()
+        with self._lock:
+            if self._export_pool is None or self._export_pid != os.getpid():
+                ctx = multiprocessing.get_context('spawn')
+                self._export_pool = ProcessPoolExecutor(max_workers=self.export_processes, mp_context=ctx)
+                self._export_pid = os.getpid()
+                atexit.register(self._export_pool.shutdown, cancel_futures=True)
+            return self._export_pool
+
+    def export_zip(self, receipts):
+        # Missing receipts are rendered on the export pool, then every file
+        # is zipped from the cache.
+        os.makedirs(self.directory, exist_ok=True)
+        missing = [(o, i, self.path(o)) for o, i in receipts if not self.cached(o)]
+        if missing:
+            list(self._export_executor().map(_render_to_file, *zip(*missing)))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for order, _ in receipts:
+                zf.write(self.path(order), f"payment_receipt_{order['order_id']}.pdf")
+        return buffer.getvalue()
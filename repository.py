@@ -0,0 +1,122 @@
+# ---------------- Repository ----------------
+# The order and user queries the routes share. Each function runs on the
+# caller's cursor (dict rows) inside the caller's transaction, and is written
+# in the SQL both engines accept (db_pool: DB_ENGINE=mysql|sqlite).
+
+# What the order pages, receipts and PDFs read; the food name and photo come
+# from the header's first dish.
+ORDER_COLUMNS = """
+    o.order_id, o.customer_name, o.phone, o.address, o.note, o.food_id, o.quantity,
+    o.total_price, o.delivery_option, o.delivery_service, o.order_date,
+    o.payment_method, o.payment_date, f.food_name, f.image_url
+"""
+ORDER_FROM = "FROM orders o JOIN food f ON o.food_id = f.food_id"
+
+# The same shape from the archive (archive.py); the dish name was copied in
+# when the order was archived, the photo only exists while the dish does.
+ARCHIVED_COLUMNS = ORDER_COLUMNS.replace("f.food_name", "o.food_name")
+ARCHIVED_FROM = "FROM orders_archive o LEFT JOIN food f ON o.food_id = f.food_id"
+
+
+def _in(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def select_orders(cur, where=(), params=(), order_by="o.order_date DESC, o.order_id DESC", limit=None):
+    # where is a list of conditions on o/f, ANDed together.
+    sql = f"SELECT {ORDER_COLUMNS} {ORDER_FROM}"
+    params = list(params)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_by}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    cur.execute(sql, params)
+    return list(cur.fetchall())
+
+
+def get_order(cur, order_id):
+    cur.execute(f"SELECT {ORDER_COLUMNS} {ORDER_FROM} WHERE o.order_id = %s", (order_id,))
+    return cur.fetchone()
+
+
+def find_order(cur, order_id):
+    # get_order(), falling back to the archive for old orders. Archived rows
+    # come back with archived=True; they are read only.
+    order = get_order(cur, order_id)
+    if order is None:
+        cur.execute(f"SELECT {ARCHIVED_COLUMNS} {ARCHIVED_FROM} WHERE o.order_id = %s", (order_id,))
+        order = cur.fetchone()
+        if order is not None:
+            order['archived'] = True
+    return order
+
+
+def open_orders(cur, limit):
+    # Kitchen board: everything not completed yet, newest first.
+    return select_orders(cur, ["o.delivery_option <> 'Completed'"], limit=limit)
+
+
+def paid_orders_between(cur, start, end):
+    return select_orders(cur, ["o.payment_date >= %s", "o.payment_date < %s"], (start, end),
+                         order_by="o.order_id")
+
+
+def recent_orders(cur, limit=5):
+    cur.execute("""
+        SELECT order_id, customer_name, total_price, order_date, delivery_option
+        FROM orders ORDER BY order_date DESC LIMIT %s
+    """, (limit,))
+    return cur.fetchall()
+
+
+def load_items_for_orders(cur, orders, table='order_items'):
+    # {order_id: [line, ...]} for many orders in one query.
+    if not orders:
+        return {}
+    ids = [o['order_id'] for o in orders]
+    cur.execute(f"""
+        SELECT order_id, food_id, food_name, quantity, unit_price, line_total
+        FROM {table} WHERE order_id IN ({_in(ids)})
+        ORDER BY order_id, order_item_id
+    """, ids)
+    items = {order_id: [] for order_id in ids}
+    for row in cur.fetchall():
+        items[row['order_id']].append(row)
+    for order in orders:
+        if not items[order['order_id']]:
+            # Orders placed before order_items existed are a single line.
+            items[order['order_id']] = [{
+                'food_id': order['food_id'],
+                'food_name': order['food_name'],
+                'quantity': order['quantity'],
+                'unit_price': order['total_price'] / order['quantity'],
+                'line_total': order['total_price'],
+            }]
+    return items
+
+
+def load_order_items(cur, order):
+    table = 'order_items_archive' if order.get('archived') else 'order_items'
+    return load_items_for_orders(cur, [order], table)[order['order_id']]
+
+
+# ---------------- Users ----------------
+def find_user(cur, username, login_type=None):
+    if login_type:
+        cur.execute("SELECT username, password, email, login_type FROM users "
+                    "WHERE username = %s AND login_type = %s", (username, login_type))
+    else:
+        cur.execute("SELECT username, password, email, login_type FROM users WHERE username = %s", (username,))
+    return cur.fetchone()
+
+
+def username_taken(cur, username):
+    cur.execute("SELECT 1 FROM users WHERE username = %s", (username,))
+    return cur.fetchone() is not None
+
+
+def create_user(cur, username, password_hash, email, login_type):
+    cur.execute("INSERT INTO users (username, password, email, login_type) VALUES (%s, %s, %s, %s)",
+                (username, password_hash, email, login_type))
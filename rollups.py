@@ -0,0 +1,188 @@
+import logging
+
+# ---------------- Order Rollups ----------------
+# order_rollup_hourly / order_rollup_daily hold order counts and revenue per
+# (bucket, food category, status). Every write to orders applies the matching
+# delta in the same transaction, so the dashboard never has to aggregate the
+# orders table itself.
+#
+# Rows with category TOTAL hold whole orders (header totals); the other
+# rows are built from the line items, so a multi-dish order counts once in
+# every category it has a dish in and each category gets its own lines'
+# revenue. Orders from before order_items count as their header's dish.
+BUCKETS = {
+    'order_rollup_hourly': "DATE_ADD(DATE(o.order_date), INTERVAL HOUR(o.order_date) HOUR)",
+    'order_rollup_daily': "DATE(o.order_date)",
+}
+
+RANGES = {
+    '24h': ('order_rollup_hourly', "bucket_start >= DATE_SUB(NOW(), INTERVAL 24 HOUR)"),
+    'today': ('order_rollup_daily', "bucket_start >= CURDATE()"),
+    '7d': ('order_rollup_daily', "bucket_start >= DATE_SUB(CURDATE(), INTERVAL 6 DAY)"),
+    '30d': ('order_rollup_daily', "bucket_start >= DATE_SUB(CURDATE(), INTERVAL 29 DAY)"),
+    'all': ('order_rollup_daily', "1 = 1"),
+}
+DEFAULT_RANGE = 'all'
+
+TOTAL = '*'
+ITEM_TABLES = {'orders': 'order_items', 'orders_archive': 'order_items_archive'}
+
+UPSERT = """
+    INSERT INTO {table}
+        (bucket_start, category, status, order_count, revenue, paid_count, paid_revenue)
+    {select}
+    GROUP BY b, c, s
+    ON DUPLICATE KEY UPDATE
+        order_count = order_count + VALUES(order_count),
+        revenue = revenue + VALUES(revenue),
+        paid_count = paid_count + VALUES(paid_count),
+        paid_revenue = paid_revenue + VALUES(paid_revenue)
+"""
+
+
+def apply(cur, where, params=(), count_sign=0, paid_sign=0, lock=False, source='orders'):
+    # Add (sign=1) or subtract (sign=-1) the orders matching `where` (alias
+    # o) from both rollup tables. With lock=True the rows are locked first
+    # so a concurrent writer can't slip in between the read and the
+    # matching UPDATE/DELETE.
+    items = ITEM_TABLES[source]
+    if lock:
+        cur.execute(f"SELECT o.order_id FROM {source} o WHERE {where} FOR UPDATE", params)
+    signs = (count_sign, count_sign, paid_sign, paid_sign)
+    for table, bucket in BUCKETS.items():
+        status = "COALESCE(o.delivery_option, '') AS s"
+        cur.execute(UPSERT.format(table=table, select=f"""
+            SELECT {bucket} AS b, '{TOTAL}' AS c, {status},
+                   %s * COUNT(*),
+                   %s * SUM(o.total_price),
+                   %s * SUM(o.payment_date IS NOT NULL),
+                   %s * SUM(CASE WHEN o.payment_date IS NULL THEN 0 ELSE o.total_price END)
+            FROM {source} o
+            WHERE {where}
+        """), signs + tuple(params))
+        cur.execute(UPSERT.format(table=table, select=f"""
+            SELECT {bucket} AS b, COALESCE(f.category, '') AS c, {status},
+                   %s * COUNT(DISTINCT o.order_id),
+                   %s * SUM(i.line_total),
+                   %s * COUNT(DISTINCT CASE WHEN o.payment_date IS NULL THEN NULL ELSE o.order_id END),
+                   %s * SUM(CASE WHEN o.payment_date IS NULL THEN 0 ELSE i.line_total END)
+            FROM {source} o
+            JOIN {items} i ON i.order_id = o.order_id
+            LEFT JOIN food f ON i.food_id = f.food_id
+            WHERE {where}
+        """), signs + tuple(params))
+        cur.execute(UPSERT.format(table=table, select=f"""
+            SELECT {bucket} AS b, COALESCE(f.category, '') AS c, {status},
+                   %s * COUNT(*),
+                   %s * SUM(o.total_price),
+                   %s * SUM(o.payment_date IS NOT NULL),
+                   %s * SUM(CASE WHEN o.payment_date IS NULL THEN 0 ELSE o.total_price END)
+            FROM {source} o
+            LEFT JOIN food f ON o.food_id = f.food_id
+            WHERE ({where}) AND NOT EXISTS (SELECT 1 FROM {items} i WHERE i.order_id = o.order_id)
+        """), signs + tuple(params))
+
+
+def _in(column, ids):
+    return f"{column} IN ({', '.join(['%s'] * len(ids))})", tuple(ids)
+
+
+# Call after the INSERT.
+def order_added(cur, order_id):
+    orders_added(cur, [order_id])
+
+
+# Call before the DELETE, or before an UPDATE that changes the status
+# (followed by order_added once the row is updated).
+def order_removed(cur, order_id):
+    orders_removed(cur, [order_id])
+
+
+# Call after the payment UPDATE, only when the order was not paid before.
+def order_paid(cur, order_id):
+    apply(cur, "o.order_id = %s", (order_id,), paid_sign=1)
+
+
+# Set-based variants for bulk admin actions: one statement per rollup table
+# however many orders are selected.
+def orders_added(cur, order_ids):
+    if order_ids:
+        apply(cur, *_in("o.order_id", order_ids), count_sign=1, paid_sign=1)
+
+
+def orders_removed(cur, order_ids):
+    if order_ids:
+        apply(cur, *_in("o.order_id", order_ids), count_sign=-1, paid_sign=-1, lock=True)
+
+
+# A category change moves a dish's orders to another rollup row: subtract
+# before the food write, re-add after it. Deleting a dish cascades to the
+# orders it is the first dish of, while the others keep their line (now
+# without a category): subtract before the DELETE, re-add after it.
+def food_removed(cur, food_id):
+    foods_removed(cur, [food_id])
+
+
+def food_added(cur, food_id):
+    foods_added(cur, [food_id])
+
+
+def _with_foods(food_ids):
+    # Orders with any of these dishes, as the header's dish or on a line.
+    header, ids = _in("o.food_id", food_ids)
+    lines, _ = _in("food_id", food_ids)
+    return f"({header} OR o.order_id IN (SELECT order_id FROM order_items WHERE {lines}))", ids + ids
+
+
+def foods_removed(cur, food_ids):
+    if food_ids:
+        apply(cur, *_with_foods(food_ids), count_sign=-1, paid_sign=-1, lock=True)
+
+
+def foods_added(cur, food_ids):
+    if food_ids:
+        apply(cur, *_with_foods(food_ids), count_sign=1, paid_sign=1)
+
+
+def backfill(conn):
+    # Rebuild both tables from orders and the archive (archive.py) in one
+    # transaction. Run it off-peak: it locks the orders it reads until the
+    # commit.
+    cur = conn.cursor()
+    try:
+        for table in BUCKETS:
+            cur.execute(f"DELETE FROM {table}")
+        apply(cur, "1 = 1", count_sign=1, paid_sign=1)
+        apply(cur, "1 = 1", count_sign=1, paid_sign=1, source='orders_archive')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        logging.exception("Rollup backfill failed")
+        raise
+    finally:
+        cur.close()
+
+
+# ---------------- Dashboard Reads ----------------
+def summary(cur, range_key=DEFAULT_RANGE):
+    table, where = RANGES.get(range_key, RANGES[DEFAULT_RANGE])
+    cur.execute(f"""
+        SELECT COALESCE(SUM(order_count), 0) AS total_orders,
+               COALESCE(SUM(revenue), 0) AS total_revenue,
+               COALESCE(SUM(CASE WHEN status = 'Pending' THEN order_count ELSE 0 END), 0) AS pending_orders,
+               COALESCE(SUM(paid_revenue), 0) AS paid_revenue
+        FROM {table} WHERE category = '{TOTAL}' AND {where}
+    """)
+    return cur.fetchone()
+
+
+def by_category(cur, range_key=DEFAULT_RANGE):
+    table, where = RANGES.get(range_key, RANGES[DEFAULT_RANGE])
+    cur.execute(f"""
+        SELECT category, SUM(order_count) AS order_count, SUM(revenue) AS revenue
+        FROM {table} WHERE category <> '{TOTAL}' AND {where}
+        GROUP BY category
+        HAVING SUM(order_count) > 0
+        ORDER BY revenue DESC
+    """)
+    return cur.fetchall()
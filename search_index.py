@@ -0,0 +1,147 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# Field weights: a hit in the dish name outranks one in its category, which
+# outranks one buried in the description.
+FIELDS = (('food_name', 3.0), ('category', 2.0), ('description', 1.0))
+
+EXACT, PREFIX = 1.0, 0.8
+FUZZY_WEIGHT = 0.6
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+def tokenize(text):
+    return TOKEN.findall((text or '').lower())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ---------------- Menu Search Index ----------------
+# Inverted index over food name, category and description. Query terms match
+# indexed terms exactly, by prefix (search-as-you-type) or, for typos, by
+# trigram similarity. sync() diffs against the catalog so a manage_menu edit
+# only re-indexes the rows that changed.
+class MenuSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}                        # food_id -> food row
+        self._fingerprints = {}                # food_id -> indexed field values
+        self._postings = defaultdict(dict)     # term -> {food_id: weight}
+        self._grams = defaultdict(set)         # trigram -> terms
+        self._terms = []                       # sorted, for prefix lookups
+
+    # ---------- Maintenance ----------
+    @staticmethod
+    def _fingerprint(food):
+        return tuple(food.get(field) for field, _ in FIELDS) + (food.get('available'),)
+
+    def _add(self, food):
+        food_id = food['food_id']
+        weights = {}
+        for field, weight in FIELDS:
+            for term in tokenize(food.get(field)):
+                weights[term] = max(weights.get(term, 0), weight)
+        for term, weight in weights.items():
+            if term not in self._postings:
+                for gram in trigrams(term):
+                    self._grams[gram].add(term)
+            self._postings[term][food_id] = weight
+        self._docs[food_id] = food
+        self._fingerprints[food_id] = self._fingerprint(food)
+
+    def _remove(self, food_id):
+        food = self._docs.pop(food_id, None)
+        self._fingerprints.pop(food_id, None)
+        if food is None:
+            return
+        for field, _ in FIELDS:
+            for term in tokenize(food.get(field)):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(food_id, None)
+                if not posting:
+                    del self._postings[term]
+                    for gram in trigrams(term):
+                        self._grams[gram].discard(term)
+                        if not self._grams[gram]:
+                            del self._grams[gram]
+
+    def sync(self, foods):
+        # Returns the number of documents added, changed or removed.
+        with self._lock:
+            seen = set()
+            changed = 0
+            for food in foods:
+                food_id = food['food_id']
+                seen.add(food_id)
+                if self._fingerprints.get(food_id) == self._fingerprint(food):
+                    self._docs[food_id] = food
+                    continue
+                self._remove(food_id)
+                self._add(food)
+                changed += 1
+            for food_id in set(self._docs) - seen:
+                self._remove(food_id)
+                changed += 1
+            if changed:
+                self._terms = sorted(self._postings)
+            return changed
+
+    # ---------- Queries ----------
+    def _expand(self, token):
+        # Indexed terms the query token may refer to, with match strength.
+        matches = {}
+        if token in self._postings:
+            matches[token] = EXACT
+        i = bisect_left(self._terms, token)
+        while i < len(self._terms) and self._terms[i].startswith(token):
+            matches.setdefault(self._terms[i], PREFIX)
+            i += 1
+        if len(token) >= 3 and not matches:
+            grams = trigrams(token)
+            counts = defaultdict(int)
+            for gram in grams:
+                for term in self._grams.get(gram, ()):
+                    counts[term] += 1
+            for term, shared in counts.items():
+                similarity = shared / len(grams | trigrams(term))
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches[term] = FUZZY_WEIGHT * similarity
+        return matches
+
+    def search(self, query, limit=None, available_only=True):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term, strength in self._expand(token).items():
+                    for food_id, weight in self._postings[term].items():
+                        token_scores[food_id] = max(token_scores[food_id], strength * weight)
+                # Every query word has to match something in the dish.
+                if scores is None:
+                    scores = dict(token_scores)
+                else:
+                    scores = {fid: s + token_scores[fid] for fid, s in scores.items() if fid in token_scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda kv: (-kv[1], self._docs[kv[0]].get('food_name') or ''))
+            results = []
+            for food_id, score in ranked:
+                food = self._docs[food_id]
+                if available_only and not food.get('available'):
+                    continue
+                results.append(dict(food))
+                if limit and len(results) >= limit:
+                    break
+            return results
@@ -0,0 +1,29 @@
+import os
+
+# ---------------- Async Serving Mode ----------------
+# Runs the app on a gevent event loop instead of one OS thread per request.
+# Sockets, locks and sleeps are patched to yield, and PyMySQL (pure Python,
+# so its socket I/O is patched too) stands in for mysqlclient, whose C
+# driver would block the loop. While one request waits on MySQL the others
+# keep running: menu, order, order_list, submit_feedback and the live order
+# streams all interleave on one loop per worker. The connection pool still
+# bounds how many queries are in flight (MYSQL_POOL_MAX).
+#
+#   gunicorn -k gevent -w 4 --worker-connections 1000 serve_async:app
+#   python serve_async.py                  # single process on PORT (8000)
+#
+# PDF renders are CPU work and go to real OS threads (see receipts.py). With
+# DB_ENGINE=sqlite the queries still block the loop; use MySQL here.
+from gevent import monkey
+monkey.patch_all()
+
+import pymysql
+pymysql.install_as_MySQLdb()
+
+from app import app  # noqa: E402  (must come after patching)
+
+if __name__ == '__main__':
+    from gevent.pywsgi import WSGIServer
+    port = int(os.environ.get('PORT', 8000))
+    print(f"Serving on http://0.0.0.0:{port} (gevent)")
+    WSGIServer(('0.0.0.0', port), app).serve_forever()
@@ -192,11 +192,12 @@ document.addEventListener('DOMContentLoaded', function () {
         const discRow = document.createElement('tr');
         const labelTd = document.createElement('td');
         labelTd.setAttribute('colspan', '4');
-        labelTd.innerHTML = `<em>Coupon: ${activeCoupon.code} (-${activeCoupon.discount * 100}%)</em>`;
+        labelTd.innerHTML = `<em>Coupon: ${activeCoupon.code} (${activeCoupon.label})</em>`;
         labelTd.style.textAlign = 'right';
         const amtTd = document.createElement('td');
         amtTd.setAttribute('colspan', '2');
-        amtTd.innerHTML = `<strong>-${formatCurrency(discount)}</strong>`;
+        // Fixed and category coupons (discount 0) are priced at checkout.
+        amtTd.innerHTML = activeCoupon.discount ? `<strong>-${formatCurrency(discount)}</strong>` : '<em>applied at checkout</em>';
         discRow.append(labelTd, amtTd);
         cartItemsList.appendChild(discRow);
       }
@@ -213,6 +214,39 @@ document.addEventListener('DOMContentLoaded', function () {
       totalTd.innerHTML = `<strong>${formatCurrency(total)}</strong>`;
       totalRow.append(labelTd, totalTd);
       cartItemsList.appendChild(totalRow);
+
+      // ---- Checkout row ----
+      const checkoutRow = document.createElement('tr');
+      const checkoutTd = document.createElement('td');
+      checkoutTd.setAttribute('colspan', '6');
+      checkoutTd.style.textAlign = 'right';
+      const checkoutBtn = document.createElement('button');
+      checkoutBtn.type = 'button';
+      checkoutBtn.className = 'checkout-btn';
+      checkoutBtn.textContent = 'Checkout';
+      checkoutTd.appendChild(checkoutBtn);
+      checkoutRow.appendChild(checkoutTd);
+      cartItemsList.appendChild(checkoutRow);
+    };
+
+    // Send the whole cart to the server, which prices it and takes the
+    // order in one transaction.
+    const checkout = async () => {
+      try {
+        const res = await fetch('/cart', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            replace: true,
+            items: cart.map(i => ({ food_id: i.food_id, quantity: i.quantity }))
+          })
+        });
+        if (!res.ok) throw new Error('Cart sync failed');
+        window.location.href = '/checkout';
+      } catch (err) {
+        console.error('Checkout error:', err);
+        showAlert('Could not start checkout. Please try again.', 'error');
+      }
     };
 
     // ------------------- Menu Toggle -------------------
@@ -295,6 +329,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const plus = e.target.closest('.qty-plus');
         const minus = e.target.closest('.qty-minus');
         const cancel = e.target.closest('.cancel-btn');
+        const checkoutBtn = e.target.closest('.checkout-btn');
 
         if (plus) {
           const id = plus.dataset.foodId;
@@ -312,6 +347,7 @@ document.addEventListener('DOMContentLoaded', function () {
           removeFromCart(cancel.dataset.foodId);
           renderCartRows();
         }
+        if (checkoutBtn) checkout();
       });
     }
 
@@ -346,13 +382,15 @@ document.addEventListener('DOMContentLoaded', function () {
         const payload = new URLSearchParams({ coupon_code: code });
         const res = await fetch('/apply_coupon', {
           method: 'POST',
-          headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+          headers: { 'Content-Type': 'application/x-www-form-urlencoded', 'Accept': 'application/json' },
           body: payload
         });
         const data = await res.json();
 
         if (data.success) {
-          showAlert(`Coupon "${code}" applied! 20% off.`, 'success');
+          showAlert(data.message, 'success');
+          promoMessage.textContent = `Coupon "${data.coupon.code}" applied! ${data.coupon.label}`;
+          repriceMenu(data.coupon);
         } else {
           showAlert(data.message || 'Invalid coupon.', 'error');
         }
@@ -370,6 +408,8 @@ document.addEventListener('DOMContentLoaded', function () {
       removeCouponBtn.addEventListener('click', async () => {
         await fetch('/remove_coupon', { method: 'POST' });
         showAlert('Coupon removed.', 'info');
+        if (promoMessage) promoMessage.textContent = '';
+        repriceMenu(null);
         if (cartPopup && cartPopup.style.display === 'block') {
           await renderCartRows();
         }
@@ -377,6 +417,9 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // ------------------- Feedback (Fixed & Safe) -------------------
+    // One idempotency key per message: a retried send is stored once.
+    const newFeedbackKey = () => Date.now().toString(36) + Math.random().toString(36).slice(2, 12);
+    let feedbackKey = newFeedbackKey();
     if (feedbackForm) {
       feedbackForm.addEventListener('submit', async e => {
         e.preventDefault();
@@ -395,9 +438,11 @@ document.addEventListener('DOMContentLoaded', function () {
         submitBtn.innerHTML = 'Sending...';
         submitBtn.disabled = true;
 
+        formData.append('idempotency_key', feedbackKey);
         try {
           const response = await fetch('/submit_feedback', {
             method: 'POST',
+            headers: { 'Accept': 'application/json' },
             body: formData
           });
 
@@ -408,6 +453,7 @@ document.addEventListener('DOMContentLoaded', function () {
 
           if (response.ok && result.success) {
             feedbackForm.reset();
+            feedbackKey = newFeedbackKey();
             showAlert('Thank you for your feedback!', 'success');
             if (feedbackPopup) feedbackPopup.style.display = 'block';
           } else {
@@ -445,6 +491,233 @@ document.addEventListener('DOMContentLoaded', function () {
       }
     });
 
+    // ------------------- Search Suggestions -------------------
+    const searchInput = document.querySelector('.filter-bar input[name="search"]');
+    if (searchInput) {
+      const suggestBox = document.createElement('ul');
+      suggestBox.className = 'search-suggestions';
+      suggestBox.style.display = 'none';
+      searchInput.setAttribute('autocomplete', 'off');
+      searchInput.insertAdjacentElement('afterend', suggestBox);
+
+      let suggestTimer = null;
+      let suggestSeq = 0;
+
+      const hideSuggestions = () => { suggestBox.style.display = 'none'; };
+
+      const renderSuggestions = results => {
+        suggestBox.innerHTML = '';
+        if (!results.length) { hideSuggestions(); return; }
+        results.forEach(item => {
+          const li = document.createElement('li');
+          const link = document.createElement('a');
+          link.href = `/order/${item.food_id}`;
+          const name = document.createElement('span');
+          name.textContent = item.food_name;
+          const meta = document.createElement('small');
+          meta.textContent = `${item.category || ''} · ${formatCurrency(item.price)}`;
+          link.append(name, meta);
+          li.appendChild(link);
+          suggestBox.appendChild(li);
+        });
+        suggestBox.style.display = 'block';
+      };
+
+      searchInput.addEventListener('input', () => {
+        clearTimeout(suggestTimer);
+        const q = searchInput.value.trim();
+        if (!q) { hideSuggestions(); return; }
+        suggestTimer = setTimeout(async () => {
+          const seq = ++suggestSeq;
+          try {
+            const r = await fetch(`/api/menu/suggest?q=${encodeURIComponent(q)}`);
+            const d = await r.json();
+            if (seq === suggestSeq) renderSuggestions(d.results || []);
+          } catch { hideSuggestions(); }
+        }, 150);
+      });
+
+      searchInput.addEventListener('blur', () => setTimeout(hideSuggestions, 200));
+    }
+
+    // ------------------- Menu Sync -------------------
+    // The menu page keeps a copy of /api/menu in localStorage and only asks
+    // for what changed since its version. Picking a category (with no search
+    // text) and applying or removing a coupon are then handled here instead
+    // of reloading the page. Prices follow the server's rule: the dish's own
+    // discount, then the coupon, rounded once; checkout prices it again.
+    const MENU_KEY = 'menu';
+    const CARD_SIZES = '(max-width: 600px) 100vw, 350px';  // images.CARD_SIZES
+    const menuContainer = document.querySelector('.menu-container');
+    const filterBar = document.querySelector('.filter-bar');
+    const categorySelect = filterBar ? filterBar.querySelector('select[name="category"]') : null;
+    const menuCards = new Map();
+    let menuState = null;
+
+    const loadMenuState = () => {
+      try { return JSON.parse(localStorage.getItem(MENU_KEY)); }
+      catch { return null; }
+    };
+
+    const syncMenu = async () => {
+      const stored = menuState || loadMenuState();
+      const since = stored && stored.version ? `?since=${encodeURIComponent(stored.version)}` : '';
+      const res = await fetch(`/api/menu${since}`, { headers: { 'Accept': 'application/json' } });
+      if (!res.ok) throw new Error('Menu sync failed');
+      const data = await res.json();
+      const foods = data.full || !stored ? {} : stored.foods;
+      data.foods.forEach(row => {
+        const food = {};
+        data.fields.forEach((name, i) => { food[name] = row[i]; });
+        foods[food.food_id] = food;
+      });
+      data.removed.forEach(id => { delete foods[id]; });
+      menuState = { version: data.version, coupon: data.coupon, categories: data.categories, foods };
+      try { localStorage.setItem(MENU_KEY, JSON.stringify(menuState)); } catch { /* storage full */ }
+      return menuState;
+    };
+
+    const priceFor = (food, coupon) => {
+      let price = food.price;
+      if (food.discount_percent > 0) price = price * (1 - food.discount_percent / 100);
+      if (coupon && (!coupon.category || coupon.category === food.category)) {
+        price = coupon.kind === 'percent' ? price * (1 - coupon.amount / 100) : Math.max(price - coupon.amount, 0);
+      }
+      return Math.round((price + Number.EPSILON) * 100) / 100;
+    };
+
+    const renderPrice = (el, food) => {
+      el.innerHTML = '';
+      if (food.final !== food.price) {
+        const original = document.createElement('span');
+        original.className = 'original-price';
+        original.style.textDecoration = 'line-through';
+        original.textContent = formatCurrency(food.price);
+        const discounted = document.createElement('span');
+        discounted.className = 'discounted-price';
+        discounted.textContent = formatCurrency(food.final);
+        el.append(original, ' ', discounted);
+      } else {
+        el.textContent = formatCurrency(food.price);
+      }
+    };
+
+    // The markup picture() renders on the server: WebP and JPEG derivatives
+    // by width, the original only while no derivatives exist.
+    const buildPhoto = food => {
+      const img = document.createElement('img');
+      img.loading = 'lazy';
+      img.alt = food.food_name;
+      img.src = food.image;
+      if (!food.srcset) return img;
+      img.srcset = food.srcset;
+      img.sizes = CARD_SIZES;
+      const picture = document.createElement('picture');
+      const webp = document.createElement('source');
+      webp.type = 'image/webp';
+      webp.srcset = food.webp_srcset;
+      webp.sizes = CARD_SIZES;
+      picture.append(webp, img);
+      return picture;
+    };
+
+    const buildCard = food => {
+      const card = document.createElement('div');
+      card.className = 'food-card';
+      card.dataset.foodId = food.food_id;
+      const info = document.createElement('div');
+      info.className = 'food-info';
+      const name = document.createElement('h2');
+      const category = document.createElement('p');
+      category.className = 'category';
+      const price = document.createElement('p');
+      price.className = 'price';
+      const link = document.createElement('a');
+      link.className = 'order-btn';
+      link.href = `/order/${food.food_id}`;
+      link.textContent = 'Order Now';
+      info.append(name, category, price, link);
+      card.append(buildPhoto(food), info);
+      return card;
+    };
+
+    const cardFor = food => {
+      let card = menuCards.get(String(food.food_id));
+      if (!card) {
+        card = buildCard(food);
+        menuCards.set(String(food.food_id), card);
+      }
+      card.querySelector('h2').textContent = food.food_name;
+      card.querySelector('.category').textContent = food.category;
+      renderPrice(card.querySelector('.price'), food);
+      return card;
+    };
+
+    const renderMenu = category => {
+      if (!menuState || !menuContainer) return;
+      const foods = Object.values(menuState.foods)
+        .filter(f => !category || f.category === category)
+        .sort((a, b) => a.food_id - b.food_id);
+      menuContainer.innerHTML = '';
+      foods.forEach(f => menuContainer.appendChild(cardFor(f)));
+      if (!foods.length) {
+        const empty = document.createElement('p');
+        empty.className = 'no-items';
+        empty.textContent = 'No food items found';
+        menuContainer.appendChild(empty);
+      }
+      if (categorySelect) {
+        const selected = categorySelect.value;
+        categorySelect.length = 1;
+        menuState.categories.forEach(c => categorySelect.add(new Option(c, c, false, c === selected)));
+      }
+    };
+
+    const repriceMenu = coupon => {
+      if (!menuState) return;
+      Object.values(menuState.foods).forEach(f => { f.final = priceFor(f, coupon); });
+      // The stored version's prices were for the old coupon: the next sync
+      // fetches a full copy.
+      menuState.version = null;
+      menuState.coupon = coupon;
+      menuContainer.querySelectorAll('.food-card[data-food-id]').forEach(card => {
+        const food = menuState.foods[card.dataset.foodId];
+        if (food) renderPrice(card.querySelector('.price'), food);
+      });
+    };
+
+    const searchText = () => (filterBar ? filterBar.querySelector('input[name="search"]').value.trim() : '');
+    const filterLocally = () => {
+      const category = categorySelect.value;
+      renderMenu(category);
+      history.replaceState(null, '', category ? `?category=${encodeURIComponent(category)}` : location.pathname);
+    };
+
+    if (menuContainer && filterBar && categorySelect) {
+      menuContainer.querySelectorAll('.food-card[data-food-id]').forEach(card => {
+        menuCards.set(card.dataset.foodId, card);
+      });
+      const refreshMenu = async () => {
+        try {
+          await syncMenu();
+          if (!new URLSearchParams(location.search).get('search')) renderMenu(categorySelect.value);
+        } catch (err) { console.error('Menu sync error:', err); }
+      };
+      categorySelect.addEventListener('change', () => {
+        if (menuState && !searchText()) filterLocally();
+      });
+      filterBar.addEventListener('submit', e => {
+        if (menuState && !searchText()) {
+          e.preventDefault();
+          filterLocally();
+        }
+      });
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') refreshMenu();
+      });
+      refreshMenu();
+    }
+
     // ------------------- Alert System -------------------
     function showAlert(message, type = 'info') {
       document.querySelectorAll('.custom-alert').forEach(el => el.remove());
@@ -0,0 +1,88 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as appmod
+
+KEY = 'k' * 16
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    # A testing app on its own SQLite file, migrated to the latest schema.
+    # Keyword arguments override single settings, as with create_app().
+    def make(**overrides):
+        instance = tmp_path / f'instance{next(count)}'
+        app = appmod.create_app(
+            'testing',
+            DB_ENGINE='sqlite',
+            SQLITE_PATH=str(instance / 'restaurant.db'),
+            MENU_VERSION_FILE=str(instance / 'menu_version'),
+            RECEIPT_CACHE_DIR=str(instance / 'receipts'),
+            INTAKE_JOURNAL=str(instance / 'intake.db'),
+            ORDER_CACHE_FILE=str(instance / 'order_generations'),
+            ORDER_EVENTS_JOURNAL=str(instance / 'order_events.db'),
+            INTAKE_ACK_WAIT=5.0,
+            **overrides)
+        result = app.test_cli_runner().invoke(args=['db', 'upgrade'])
+        assert result.exit_code == 0, result.output
+        return app
+
+    count = itertools.count()
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def add_food(app):
+    def add(name, category='Main', price=5, available=1, discount=0):
+        with app.app_context():
+            cur = appmod.get_cursor()
+            cur.execute("INSERT INTO food (food_name, category, price, available, discount_percent) "
+                        "VALUES (%s, %s, %s, %s, %s)", (name, category, price, available, discount))
+            food_id = cur.lastrowid
+            appmod.mysql.connection.commit()
+        app.extensions['menu_catalog'].bump_version()
+        return food_id
+    return add
+
+
+def login(client, username='alice', login_type='user'):
+    with client.session_transaction() as session:
+        session['username'] = username
+        session['login_type'] = login_type
+    return client
+
+
+def place_order(client, food_id, key=KEY, quantity=2):
+    # Posts the order form and follows the redirect to /order/received/<key>.
+    response = client.post(f'/order/{food_id}', data={
+        'customer_name': 'Alice', 'phone': '012345678', 'delivery_option': 'pickup',
+        'quantity': quantity, 'idempotency_key': key})
+    assert response.status_code == 302
+    return client.get(response.headers['Location'])
+
+
+def checkout(client, lines, key):
+    # Fills the cart with {food_id: quantity}, checks out and returns the order id.
+    client.post('/cart', json={'replace': True, 'items': [
+        {'food_id': food_id, 'quantity': qty} for food_id, qty in lines.items()]})
+    response = client.post('/checkout', data={
+        'customer_name': 'Alice', 'phone': '012345678', 'delivery_option': 'pickup',
+        'idempotency_key': key})
+    return int(client.get(response.headers['Location']).headers['Location'].rsplit('/', 1)[1])
+
+
+def finish_order(app, order_id, days_ago=0):
+    # Pays and completes an order placed `days_ago` days ago.
+    placed = datetime.now() - timedelta(days=days_ago)
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("UPDATE orders SET order_date = %s, payment_date = %s, payment_method = 'Cash', "
+                    "delivery_option = 'Completed' WHERE order_id = %s", (placed, placed, order_id))
+        appmod.mysql.connection.commit()
@@ -0,0 +1,38 @@
+import time
+
+from tests.conftest import login
+
+FEEDBACK = {'name': 'Alice', 'email': 'alice@example.com', 'message': 'Great food!'}
+
+
+def test_burst_past_the_rate_gets_429(make_app):
+    app = make_app(ADMISSION_RATE=0.01, ADMISSION_BURST=3)
+    client = login(app.test_client())
+    codes = [client.post('/submit_feedback', data=FEEDBACK, headers={'Accept': 'application/json'})
+             for _ in range(5)]
+    assert [r.status_code for r in codes] == [200, 200, 200, 429, 429]
+    assert int(codes[-1].headers['Retry-After']) >= 1
+    assert codes[-1].get_json()['success'] is False
+
+
+def test_rate_is_per_user(make_app):
+    app = make_app(ADMISSION_RATE=0.01, ADMISSION_BURST=1)
+    client = app.test_client()
+    assert login(client, 'alice').post('/submit_feedback', data=FEEDBACK).status_code == 200
+    assert login(client, 'alice').post('/submit_feedback', data=FEEDBACK).status_code == 429
+    assert login(client, 'bob').post('/submit_feedback', data=FEEDBACK).status_code == 200
+
+
+def test_request_queued_too_long_gets_503(make_app):
+    app = make_app(ADMISSION_MAX_WAIT=0.5)
+    client = login(app.test_client())
+    started = f't={time.time() - 5:.3f}'
+    response = client.post('/submit_feedback', data=FEEDBACK, headers={'X-Request-Start': started})
+    assert response.status_code == 503
+    assert app.extensions['admission'].stats()['lanes']['submit_feedback']['shed'] == {'queued_too_long': 1}
+
+
+def test_zero_rate_turns_the_limit_off(make_app):
+    app = make_app(ADMISSION_RATE=0)
+    client = login(app.test_client())
+    assert all(client.post('/submit_feedback', data=FEEDBACK).status_code == 200 for _ in range(30))
@@ -0,0 +1,60 @@
+import os
+import sys
+import runpy
+import subprocess
+
+import pytest
+
+import app as appmod
+from tests.conftest import login
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_profiles_and_overrides(tmp_path):
+    app = appmod.create_app('testing', INSTANCE_MARKER='x')
+    assert app.config['TESTING'] and app.config['DB_ENGINE'] == 'sqlite'
+    assert app.config['INSTANCE_MARKER'] == 'x'
+    assert app.config['ORDER_EVENTS_JOURNAL'] == os.path.join(app.instance_path, 'order_events.db')
+    assert appmod.create_app('development').debug
+    with pytest.raises(ValueError):
+        appmod.create_app('staging')
+
+
+def test_apps_in_one_process_keep_their_own_state(make_app, add_food):
+    other = make_app()
+    add_food('Soup')
+    with other.test_client() as client:
+        assert b'Soup' not in login(client).get('/menu').data
+    assert other.extensions['menu_catalog'] is not appmod.create_app('testing').extensions['menu_catalog']
+
+
+def test_warmup_loads_the_menu_and_closes_its_connections(app, add_food):
+    add_food('Soup')
+    appmod.warmup(app)
+    catalog = app.extensions['menu_catalog']
+    assert [f['food_name'] for f in catalog.all_foods()] == ['Soup']
+    assert app.extensions['mysql'].stats()['size'] == 0
+
+
+def test_import_builds_nothing_and_loads_no_pdf_renderer():
+    code = ("import sys, app; app.create_app('testing'); "
+            "print('reportlab' in sys.modules, 'PIL' in sys.modules, 'app' in vars(app))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ['False', 'False', 'False']
+
+
+@pytest.mark.parametrize('env, workers, threads, clients', [
+    ({}, os.cpu_count() * 2 + 1, 8, '4'),
+    ({'WEB_CONCURRENCY': '3', 'THREADS': '16'}, 3, 16, '8'),
+    ({'THREADS': '1', 'ORDER_EVENTS_MAX_CLIENTS': '50'}, None, 1, '50'),
+])
+def test_gunicorn_defaults(monkeypatch, env, workers, threads, clients):
+    for name in ('WEB_CONCURRENCY', 'THREADS', 'ORDER_EVENTS_MAX_CLIENTS'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    conf = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+    assert conf['threads'] == threads and conf['worker_class'] == 'gthread'
+    assert workers is None or conf['workers'] == workers
+    assert os.environ['ORDER_EVENTS_MAX_CLIENTS'] == clients
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import app as appmod
+import archive
+from tests.conftest import checkout, finish_order, login
+
+
+def rows(app, sql):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute(sql)
+        return [tuple(r.values()) for r in cur.fetchall()]
+
+
+def run(app, *args):
+    result = app.test_cli_runner().invoke(args=['archive', *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_only_old_finished_orders_move(app, client, add_food):
+    soup, tea = add_food('Soup', price=8), add_food('Tea', price=2)
+    login(client)
+    old = [checkout(client, {soup: 1, tea: 2}, f'{i}' * 16) for i in range(3)]
+    recent = checkout(client, {tea: 1}, 'r' * 16)
+    unpaid = checkout(client, {tea: 1}, 'u' * 16)
+    for order_id in old:
+        finish_order(app, order_id, days_ago=200)
+    finish_order(app, recent, days_ago=10)
+    rollup = rows(app, "SELECT * FROM order_rollup_daily ORDER BY bucket_start, category, status")
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("UPDATE orders SET order_date = '2020-01-01' WHERE order_id = %s", (unpaid,))
+        appmod.mysql.connection.commit()
+
+    assert run(app, 'run', '--dry-run').startswith('3 order(s) before')
+    assert run(app, 'run', '--batch-size', '2', '--pause', '0') == '3 order(s) archived.\n'
+    assert run(app, 'status').startswith('2 order(s) in orders (0 due for archiving), 3 archived.')
+
+    assert rows(app, "SELECT order_id FROM orders ORDER BY order_id") == [(recent,), (unpaid,)]
+    assert rows(app, "SELECT order_id, food_name FROM orders_archive ORDER BY order_id") == \
+        [(order_id, 'Soup') for order_id in old]
+    assert rows(app, "SELECT order_id, food_name, quantity FROM order_items_archive ORDER BY order_item_id") == \
+        [line for order_id in old for line in ((order_id, 'Soup', 1), (order_id, 'Tea', 2))]
+    assert rows(app, f"SELECT COUNT(*) FROM order_items WHERE order_id IN {tuple(old)}") == [(0,)]
+    # The dashboard keeps counting archived orders.
+    assert rows(app, "SELECT * FROM order_rollup_daily ORDER BY bucket_start, category, status") == rollup
+
+
+def test_archived_orders_are_read_only(app, client, add_food):
+    soup = add_food('Soup', price=8)
+    order_id = checkout(login(client), {soup: 2}, 'a' * 16)
+    finish_order(app, order_id, days_ago=400)
+    with app.app_context():
+        conn = appmod.mysql.connect()
+        try:
+            assert archive.run(conn, datetime.now(), pause=0) == 1
+        finally:
+            conn.close()
+    app.extensions['order_cache'].invalidate([order_id])
+    page = client.get(f'/payment_success/{order_id}')
+    assert page.status_code == 200 and b'Soup' in page.data
+    assert client.get(f'/order/{order_id}/pay').headers['Location'] == '/order-list'
@@ -0,0 +1,52 @@
+import gzip
+
+import pytest
+
+from assets import AssetManifest, ONE_YEAR
+
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'css' / 'style.css').write_text('body { color: red; }' * 50)
+    (tmp_path / 'js' / 'app.js').write_text('console.log(1);')
+    return AssetManifest(str(tmp_path))
+
+
+def test_build_fingerprints_and_precompresses(assets, tmp_path):
+    assert assets.build() == 2
+    manifest = assets.manifest()
+    hashed = manifest['css/style.css']
+    assert hashed.startswith('dist/css/style.') and hashed.endswith('.css')
+    assert gzip.decompress((tmp_path / (hashed + '.gz')).read_bytes()) == (tmp_path / 'css' / 'style.css').read_bytes()
+    assert assets.build() == 0 and assets.manifest() == manifest
+    (tmp_path / 'js' / 'app.js').write_text('console.log(2);')
+    assert assets.build() == 1
+    assert assets.manifest()['js/app.js'] != manifest['js/app.js']
+    assert assets.manifest()['css/style.css'] == hashed
+
+
+def test_a_rebuild_elsewhere_is_picked_up(assets, tmp_path):
+    reader = AssetManifest(str(tmp_path))
+    assert reader.manifest() == {}
+    assets.build()
+    assert reader.manifest() == assets.manifest() and reader.version is not None
+
+
+def test_hashed_files_are_served_immutable(app, client, assets):
+    app.extensions['static_assets'] = assets
+    with app.test_request_context():
+        assert assets.url('js/app.js') == '/static/js/app.js'
+        assets.build()
+        url = assets.url('js/app.js')
+    assert url.startswith('/static/dist/js/app.') and url.endswith('.js')
+
+    response = client.get(url)
+    assert response.data == b'console.log(1);' and response.content_encoding is None
+    assert response.cache_control.max_age == ONE_YEAR and response.cache_control.immutable
+    assert 'Accept-Encoding' in response.vary
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.content_encoding == 'gzip'
+    assert gzip.decompress(response.data) == b'console.log(1);'
+    assert client.get('/static/dist/js/missing.js').status_code == 404
@@ -0,0 +1,95 @@
+import io
+
+import pytest
+
+import app as appmod
+import menu_import
+from tests.conftest import checkout, login
+
+
+@pytest.fixture
+def admin(client):
+    return login(client, 'admin', 'admin')
+
+
+def statuses(app):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT order_id, delivery_option FROM orders ORDER BY order_id")
+        return {r['order_id']: r['delivery_option'] for r in cur.fetchall()}
+
+
+def foods(app):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT food_id, food_name, category, price, available FROM food ORDER BY food_id")
+        return [tuple(r.values()) for r in cur.fetchall()]
+
+
+@pytest.fixture
+def orders(admin, add_food):
+    soup = add_food('Soup')
+    return [checkout(admin, {soup: 1}, f'{i}' * 16) for i in range(3)]
+
+
+def test_parse_bulk_ids():
+    assert appmod.parse_bulk_ids(['3', 'x', '1', '3', None]) == [3, 1]
+    assert len(appmod.parse_bulk_ids(map(str, range(1000)))) == appmod.MAX_BULK_ORDERS
+
+
+def test_bulk_status_and_delete(app, admin, orders):
+    first, second, third = orders
+    sub = app.extensions['order_events'].subscribe()
+    admin.post('/manage-orders', data={'action': 'bulk_status', 'status': 'Preparing',
+                                       'order_ids': [first, third]})
+    assert statuses(app) == {first: 'Preparing', second: 'pickup', third: 'Preparing'}
+    admin.post('/manage-orders', data={'action': 'bulk_delete', 'order_ids': [second, third]})
+    assert statuses(app) == {first: 'Preparing'}
+    events, _ = sub.pop_all(2)
+    # (An order-created event from the fixture may still arrive late.)
+    assert [(e['type'], e['data']['order_id']) for e in events if e['type'] != 'order-created'] == \
+        [('status-changed', first), ('status-changed', third), ('deleted', second), ('deleted', third)]
+    sub.close()
+
+
+def test_bulk_status_needs_a_known_status(app, admin, orders):
+    admin.post('/manage-orders', data={'action': 'bulk_status', 'status': 'Lost', 'order_ids': orders})
+    with admin.session_transaction() as session:
+        assert ('warning', 'Choose a status for the selected orders.') in session['_flashes']
+    assert set(statuses(app).values()) == {'pickup'}
+
+
+def test_menu_import_reports_bad_rows(app, admin, add_food):
+    soup = add_food('Soup', price=5)
+    data = (f"food_id,food_name,category,price,available\n"
+            f"{soup},Broth,Soups,6.5,yes\n"
+            f",Tea,Drinks,2,no\n"
+            f",Cake,,3,yes\n"
+            f",Pie,Dessert,cheap,yes\n").encode()
+    response = admin.post('/manage-menu/import', data={'menu_file': (io.BytesIO(data), 'menu.csv')})
+    assert response.status_code == 200
+    assert foods(app) == [(soup, 'Broth', 'Soups', 6.5, 1), (soup + 1, 'Tea', 'Drinks', 2, 0)]
+    assert b'category is required' in response.data and b'price must be a number' in response.data
+    assert [f['food_name'] for f in app.extensions['menu_catalog'].all_foods()] == ['Broth', 'Tea']
+
+
+def test_menu_import_json(app, admin):
+    report = admin.post('/manage-menu/import', json=[
+        {'food_name': 'Tea', 'category': 'Drinks', 'price': 2, 'discount_percent': 10},
+        {'food_name': 'Cake', 'category': 'Dessert', 'price': 3, 'discount_percent': 150},
+        'nope']).get_json()
+    assert report == {'success': True, 'written': 1, 'errors': [
+        {'row': 2, 'error': 'discount_percent must be between 0 and 100'}, {'row': 3, 'error': 'not an object'}]}
+    assert foods(app) == [(1, 'Tea', 'Drinks', 2, 1)]
+    assert admin.post('/manage-menu/import', data=b'{"items": 1}',
+                      content_type='application/json').status_code == 400
+
+
+def test_import_file_limits():
+    with pytest.raises(ValueError, match='UTF-8'):
+        menu_import.parse('menu.csv', b'\xff\xfe')
+    with pytest.raises(ValueError, match='header row'):
+        menu_import.parse('menu.csv', b'name,price\nTea,2\n')
+    rows = 'food_name,category,price\n' + 'Tea,Drinks,2\n' * (menu_import.MAX_IMPORT_ROWS + 1)
+    with pytest.raises(ValueError, match='At most'):
+        menu_import.parse('menu.csv', rows.encode())
@@ -0,0 +1,51 @@
+import app as appmod
+from tests.conftest import checkout, login
+
+
+def order_rows(app):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT order_id, food_id, quantity, total_price FROM orders")
+        orders = [dict(r) for r in cur.fetchall()]
+        cur.execute("SELECT order_id, food_name, quantity, unit_price, line_total "
+                    "FROM order_items ORDER BY order_item_id")
+        items = [dict(r) for r in cur.fetchall()]
+    return orders, items
+
+
+def test_cart_is_priced_on_the_server(client, add_food):
+    soup, tea = add_food('Soup', price=8, discount=25), add_food('Tea', price=2)
+    hidden = add_food('Pie', price=3, available=0)
+    login(client).post('/cart', json={'food_id': soup, 'quantity': 1, 'price': 0.01})
+    data = client.post('/cart', json={'items': [{'food_id': tea, 'quantity': 3},
+                                                {'food_id': hidden, 'quantity': 1}]}).get_json()
+    assert [(l['food_name'], l['quantity'], l['unit_price'], l['line_total']) for l in data['items']] == \
+        [('Soup', 1, 6.0, 6.0), ('Tea', 3, 2.0, 6.0)]
+    assert data['total'] == 12.0
+    # Quantity 0 drops a line; replace starts over; quantities are capped.
+    data = client.post('/cart', json={'food_id': tea, 'quantity': 0}).get_json()
+    assert [l['food_name'] for l in data['items']] == ['Soup']
+    data = client.post('/cart', json={'replace': True, 'items': [{'food_id': tea, 'quantity': 500}]}).get_json()
+    assert [(l['food_name'], l['quantity']) for l in data['items']] == [('Tea', appmod.MAX_LINE_QUANTITY)]
+    assert client.post('/cart', json={'food_id': 'x'}).status_code == 400
+
+
+def test_checkout_writes_the_order_and_its_lines(app, client, add_food):
+    soup, tea = add_food('Soup', price=8), add_food('Tea', price=2)
+    order_id = checkout(login(client), {soup: 1, tea: 3}, 'a' * 16)
+    orders, items = order_rows(app)
+    assert orders == [{'order_id': order_id, 'food_id': soup, 'quantity': 4, 'total_price': 14}]
+    assert items == [{'order_id': order_id, 'food_name': 'Soup', 'quantity': 1, 'unit_price': 8, 'line_total': 8},
+                     {'order_id': order_id, 'food_name': 'Tea', 'quantity': 3, 'unit_price': 2, 'line_total': 6}]
+    assert client.get('/cart').get_json()['items'] == []
+    page = client.get(f'/order/{order_id}/pay').data
+    assert b'Soup' in page and b'Tea' in page
+
+
+def test_checkout_needs_a_cart_and_a_customer(app, client, add_food):
+    response = login(client).post('/checkout', data={'customer_name': 'Alice', 'phone': '1'})
+    assert response.headers['Location'] == '/menu'
+    client.post('/cart', json={'food_id': add_food('Soup'), 'quantity': 1})
+    response = client.post('/checkout', data={'customer_name': '', 'phone': ''})
+    assert response.status_code == 200 and b'Name and phone are required.' in response.data
+    assert order_rows(app) == ([], [])
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+import app as appmod
+from coupons import CouponBook, CouponRule, money, price_menu
+from tests.conftest import login, place_order
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+def rule(**row):
+    return CouponRule(dict({'code': 'x', 'kind': 'percent', 'amount': 10}, **row))
+
+
+def test_percent_fixed_and_category_pricing():
+    foods = [{'food_id': 1, 'price': '10.00', 'category': 'Main', 'discount_percent': 10},
+             {'food_id': 2, 'price': '3.00', 'category': 'Drinks'},
+             {'food_id': 3, 'price': '0.10', 'category': 'Drinks'}]
+    assert price_menu(foods) == {1: Decimal('9.00'), 2: Decimal('3.00'), 3: Decimal('0.10')}
+    # The dish's own discount comes first, then the coupon, rounded once.
+    assert price_menu(foods, rule(amount=15)) == {1: Decimal('7.65'), 2: Decimal('2.55'), 3: Decimal('0.09')}
+    # Fixed coupons never go below zero; a category limits them.
+    assert price_menu(foods, rule(kind='fixed', amount='2.5', category='Drinks')) == \
+        {1: Decimal('9.00'), 2: Decimal('0.50'), 3: Decimal('0.00')}
+
+
+def test_labels_and_session_data():
+    assert rule(amount=20).label == '20% off'
+    assert rule(kind='fixed', amount=1, category='Drinks').label == '$1.00 off Drinks'
+    assert rule(amount=20).session_data()['discount'] == 0.2
+    # The cart popup can't estimate scoped or fixed coupons.
+    assert rule(amount=20, category='Main').session_data()['discount'] == 0.0
+    with pytest.raises(ValueError):
+        rule(kind='bogo')
+    assert money(0.1 + 0.2) == Decimal('0.30')
+
+
+def test_book_applies_windows_and_reloads_on_new_version():
+    rows = [{'code': 'spring', 'kind': 'percent', 'amount': 10,
+             'starts_at': NOW, 'ends_at': NOW + timedelta(days=7)},
+            {'code': 'OFF', 'kind': 'percent', 'amount': 5, 'active': 0},
+            {'code': 'BAD', 'kind': 'bogo', 'amount': 5}]
+    version = [1]
+    book = CouponBook(lambda: rows, lambda: version[0])
+    assert book.get(' Spring ', NOW).code == 'SPRING'
+    assert book.get('SPRING', NOW - timedelta(seconds=1)) is None
+    assert book.get('SPRING', NOW + timedelta(days=7)) is None
+    assert book.get('OFF', NOW) is None and book.get('BAD', NOW) is None
+    rows.append({'code': 'NEW', 'kind': 'fixed', 'amount': 1})
+    assert book.get('NEW', NOW) is None
+    version[0] = 2
+    assert book.get('NEW', NOW).label == '$1.00 off'
+
+
+def add_coupon(app, *args):
+    result = app.test_cli_runner().invoke(args=['coupons', 'add', *args])
+    assert result.exit_code == 0, result.output
+
+
+def used_count(app, code):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT used_count FROM coupons WHERE code = %s", (code,))
+        return cur.fetchone()['used_count']
+
+
+def order_total(app, order_id):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT total_price FROM orders WHERE order_id = %s", (order_id,))
+        return money(cur.fetchone()['total_price'])
+
+
+def test_apply_coupon_returns_its_label(app, client, add_food):
+    add_food('Soup', price=8)
+    add_coupon(app, 'half', '--percent', '50')
+    data = login(client).post('/apply_coupon', data={'coupon_code': ' half'}).get_json()
+    assert (data['success'], data['message'], data['coupon']['label']) == (True, '50% off applied!', '50% off')
+    assert b'PNC' not in client.get('/menu').data
+    assert not client.post('/apply_coupon', data={'coupon_code': 'NOPE'}).get_json()['success']
+    assert client.get('/coupon').get_json() == {'coupon': None}
+
+
+def test_capped_coupon_honours_the_quoted_price(app, add_food):
+    soup = add_food('Soup', price=8)
+    add_coupon(app, 'ONCE', '--percent', '50', '--max-uses', '1')
+    alice, bob = login(app.test_client(), 'alice'), login(app.test_client(), 'bob')
+    for client in (alice, bob):
+        assert client.post('/apply_coupon', data={'coupon_code': 'ONCE'}).get_json()['success']
+
+    assert place_order(alice, soup, quantity=1).headers['Location'] == '/order_success/1'
+    assert used_count(app, 'ONCE') == 1
+    # Bob was quoted the discount before Alice used the last redemption.
+    assert place_order(bob, soup, quantity=1).headers['Location'] == '/order_success/2'
+    assert (order_total(app, 1), order_total(app, 2)) == (Decimal('4.00'), Decimal('4.00'))
+    assert used_count(app, 'ONCE') == 1
+
+    carol = login(app.test_client(), 'carol')
+    data = carol.post('/apply_coupon', data={'coupon_code': 'ONCE'}).get_json()
+    assert (data['success'], data['message']) == (False, 'Invalid coupon code.')
@@ -0,0 +1,57 @@
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def ping(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Server:
+    # connect() for the pool; fails while `down` is set.
+    def __init__(self):
+        self.down = False
+        self.opened = 0
+
+    def connect(self):
+        if self.down:
+            raise OSError("server down")
+        self.opened += 1
+        return FakeConnection()
+
+
+@pytest.mark.parametrize('min_size, max_size', [(-1, 5), (6, 5), (0, 0)])
+def test_bad_sizes_are_rejected(min_size, max_size):
+    with pytest.raises(ValueError):
+        ConnectionPool(Server().connect, min_size=min_size, max_size=max_size)
+
+
+def test_connections_are_reused_and_capped():
+    server = Server()
+    pool = ConnectionPool(server.connect, min_size=1, max_size=2, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert server.opened == 2
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_failed_fill_hands_back_its_slots():
+    server = Server()
+    pool = ConnectionPool(server.connect, min_size=3, max_size=3)
+    server.down = True
+    with pytest.raises(OSError):
+        pool.fill()
+    assert pool.stats()['size'] == 0
+    server.down = False
+    conns = [pool.acquire() for _ in range(3)]
+    assert len(set(map(id, conns))) == 3
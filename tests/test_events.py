@@ -0,0 +1,104 @@
+import pytest
+
+import events
+from events import EventBroker, BrokerFull
+from tests.conftest import login, place_order
+
+
+@pytest.fixture
+def journal(tmp_path):
+    # One journal, one broker per "worker".
+    def broker(**kwargs):
+        kwargs.setdefault('poll_interval', 0.05)
+        return EventBroker(str(tmp_path / 'order_events.db'), **kwargs)
+    return broker
+
+
+def received(sub, timeout=2):
+    events, overflowed = sub.pop_all(timeout)
+    return [(e['type'], e['data']) for e in events], overflowed
+
+
+def test_events_reach_streams_in_other_workers(journal):
+    kitchen, counter = journal(), journal()
+    sub = kitchen.subscribe()
+    counter.publish(events.ORDER_PAID, {'order_id': 7})
+    assert received(sub) == ([(events.ORDER_PAID, {'order_id': 7})], False)
+    assert kitchen.stats()['clients'] == 1 and counter.stats()['last_event_id'] == 1
+    sub.close()
+
+
+def test_reconnect_is_replayed_from_the_journal(journal):
+    counter = journal()
+    for order_id in (1, 2, 3):
+        counter.publish(events.ORDER_CREATED, {'order_id': order_id})
+    # A screen that saw event 1 reconnects to a worker it was never on.
+    sub = journal().subscribe(last_event_id=1)
+    assert received(sub, 0) == ([(events.ORDER_CREATED, {'order_id': 2}),
+                                 (events.ORDER_CREATED, {'order_id': 3})], False)
+    sub.close()
+
+
+@pytest.mark.parametrize('last_event_id', [1, 99])
+def test_unreplayable_reconnect_resyncs(journal, last_event_id):
+    # Event 2 was pruned; id 99 comes from a journal that has been reset.
+    counter = journal(history=1)
+    for order_id in (1, 2, 3):
+        counter.publish(events.ORDER_DELETED, {'order_id': order_id})
+    sub = journal().subscribe(last_event_id=last_event_id)
+    assert received(sub, 0) == ([], True)
+    sub.close()
+
+
+def test_new_screen_starts_at_the_end_of_the_journal(journal):
+    counter = journal()
+    counter.publish(events.ORDER_PAID, {'order_id': 1})
+    sub = journal().subscribe()
+    counter.publish(events.ORDER_PAID, {'order_id': 2})
+    assert received(sub) == ([(events.ORDER_PAID, {'order_id': 2})], False)
+    sub.close()
+
+
+def test_slow_screen_is_told_to_resync(journal):
+    broker = journal(buffer_size=2)
+    sub = broker.subscribe()
+    for order_id in range(3):
+        broker.publish(events.ORDER_PAID, {'order_id': order_id})
+    assert received(sub, 0) == ([], True)
+    assert broker.stats()['dropped'] == 1
+    sub.close()
+
+
+def test_max_clients(journal):
+    broker = journal(max_clients=1)
+    sub = broker.subscribe()
+    with pytest.raises(BrokerFull):
+        broker.subscribe()
+    sub.close()
+    broker.subscribe().close()
+
+
+def test_stream_framing(journal):
+    broker = journal()
+    sub = broker.subscribe()
+    stream = broker.stream(sub, heartbeat=0)
+    assert next(stream) == "retry: 3000\n\n"
+    assert next(stream).startswith(": ping ")
+    broker.publish(events.ORDER_PAID, {'order_id': 5})
+    assert next(stream) == 'id: 1\nevent: paid\ndata: {"order_id": 5}\n\n'
+    stream.close()
+    assert broker.stats()['clients'] == 0
+
+
+def test_placed_order_is_published(app, client, add_food):
+    food_id = add_food('Soup', price=4)
+    sub = app.extensions['order_events'].subscribe()
+    place_order(login(client), food_id)
+    (kind, data), = received(sub)[0]
+    assert kind == events.ORDER_CREATED
+    assert (data['items'], data['total_price']) == ([{'food_name': 'Soup', 'quantity': 2}], 8.0)
+    sub.close()
+
+
+def test_stream_needs_admin(client):
+    assert login(client).get('/orders/stream').status_code in (302, 403)
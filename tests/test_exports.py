@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import app as appmod
+from tests.conftest import checkout, finish_order, login
+
+
+@pytest.fixture
+def admin(client):
+    return login(client, 'admin', 'admin')
+
+
+def export(client, **args):
+    response = client.get('/admin/orders/export', query_string=args)
+    assert response.status_code == 200
+    if args.get('format') == 'ndjson':
+        return [json.loads(line) for line in response.data.decode().splitlines()]
+    return list(csv.DictReader(io.StringIO(response.data.decode())))
+
+
+def lines(rows):
+    return [(int(r['order_id']), r['food_name'], int(r['quantity']), float(r['line_total']),
+             float(r['total_price'])) for r in rows]
+
+
+def test_one_row_per_order_line(admin, add_food):
+    soup, tea = add_food('Soup', price=8), add_food('Tea', price=2)
+    order_id = checkout(admin, {soup: 1, tea: 3}, 'a' * 16)
+    expected = [(order_id, 'Soup', 1, 8.0, 14.0), (order_id, 'Tea', 3, 6.0, 14.0)]
+    assert lines(export(admin)) == expected
+    rows = export(admin, format='ndjson')
+    assert lines(rows) == expected and float(rows[1]['unit_price']) == 2.0
+
+
+def test_orders_without_lines_export_their_header(app, admin, add_food):
+    soup = add_food('Soup', price=8)
+    order_id = checkout(admin, {soup: 2}, 'a' * 16)
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("DELETE FROM order_items WHERE order_id = %s", (order_id,))
+        appmod.mysql.connection.commit()
+    (row,) = export(admin)
+    assert lines([row]) == [(order_id, 'Soup', 2, 16.0, 16.0)] and row['order_item_id'] == ''
+
+
+def test_archived_orders_are_exported_for_old_ranges(app, admin, add_food):
+    soup, tea = add_food('Soup', price=8), add_food('Tea', price=2)
+    old = checkout(admin, {soup: 1, tea: 1}, 'a' * 16)
+    new = checkout(admin, {tea: 2}, 'b' * 16)
+    finish_order(app, old, days_ago=400)
+    result = app.test_cli_runner().invoke(args=['archive', 'run', '--pause', '0'])
+    assert '1 order(s) archived' in result.output
+
+    assert [r[:2] for r in lines(export(admin))] == [(old, 'Soup'), (old, 'Tea'), (new, 'Tea')]
+    assert [r[:2] for r in lines(export(admin, date_from='2000-01-01'))] == \
+        [(old, 'Soup'), (old, 'Tea'), (new, 'Tea')]
+    since = (date.today() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'] - 1)).isoformat()
+    assert [r[:2] for r in lines(export(admin, date_from=since))] == [(new, 'Tea')]
+    assert lines(export(admin, status='Completed')) == [(old, 'Soup', 1, 8.0, 10.0), (old, 'Tea', 1, 2.0, 10.0)]
@@ -0,0 +1,56 @@
+import pytest
+
+import images
+from images import ImageDerivatives
+from tests.conftest import login
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+@pytest.fixture
+def derivatives(tmp_path):
+    (tmp_path / 'images').mkdir()
+    PIL.new('RGB', (1200, 800), (200, 80, 40)).save(tmp_path / 'images' / 'soup.jpg')
+    return ImageDerivatives(str(tmp_path))
+
+
+def test_derivatives_are_built_once(derivatives):
+    assert derivatives.build_all() == 1
+    entry = derivatives.manifest()['/static/images/soup.jpg']
+    assert sorted(map(int, entry['jpeg'])) == list(images.WIDTHS)
+    assert sorted(map(int, entry['webp'])) == list(images.WIDTHS)
+    assert derivatives.build_all() == 0
+
+
+def test_picture_uses_the_derivatives(derivatives):
+    assert derivatives.picture('/static/images/soup.jpg', 'Soup') == \
+        '<img src="/static/images/soup.jpg" alt="Soup" loading="lazy">'
+    derivatives.build_all()
+    html = derivatives.picture('/static/images/soup.jpg', 'Soup')
+    src, srcset, webp = derivatives.sources('/static/images/soup.jpg')
+    assert src.endswith('-960.jpg') and '320w' in srcset and '.webp 960w' in webp
+    assert html.startswith('<picture><source type="image/webp"')
+    assert f'srcset="{webp}"' in html and f'src="{src}"' in html and f'srcset="{srcset}"' in html
+    assert f'sizes="{images.CARD_SIZES}"' in html
+
+
+def test_menu_api_sends_derivative_urls(app, client, add_food, derivatives):
+    app.extensions['image_derivatives'] = derivatives
+    food_id = add_food('Soup')
+    with app.app_context():
+        import app as appmod
+        cur = appmod.get_cursor()
+        cur.execute("UPDATE food SET image_url = '/static/images/soup.jpg' WHERE food_id = %s", (food_id,))
+        appmod.mysql.connection.commit()
+    app.extensions['menu_catalog'].bump_version()
+
+    def soup(data):
+        return dict(zip(data['fields'], data['foods'][0]))
+
+    before = login(client).get('/api/menu').get_json()
+    assert soup(before)['image'] == '/static/images/soup.jpg' and soup(before)['srcset'] == ''
+    derivatives.build_all()
+    after = client.get(f"/api/menu?since={before['version']}").get_json()
+    assert after['full'] is True
+    assert (soup(after)['image'], soup(after)['srcset'], soup(after)['webp_srcset']) == \
+        derivatives.sources('/static/images/soup.jpg')
@@ -0,0 +1,78 @@
+import app as appmod
+from tests.conftest import KEY, login, place_order
+
+
+def count_orders(app):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM orders")
+        return cur.fetchone()['n']
+
+
+def test_resubmitted_order_is_placed_once(app, client, add_food):
+    food_id = add_food('Soup')
+    login(client)
+    first = place_order(client, food_id)
+    again = place_order(client, food_id)
+    assert first.headers['Location'] == again.headers['Location'] == '/order_success/1'
+    assert count_orders(app) == 1
+
+
+def test_same_key_from_another_user_is_another_order(app, client, add_food):
+    food_id = add_food('Soup')
+    assert place_order(login(client, 'alice'), food_id).headers['Location'] == '/order_success/1'
+    assert place_order(login(client, 'bob'), food_id).headers['Location'] == '/order_success/2'
+    assert count_orders(app) == 2
+
+
+def test_order_key_does_not_reach_other_users(app, client, add_food):
+    place_order(login(client, 'alice'), add_food('Soup'))
+    response = login(client, 'mallory').get(f'/order/received/{KEY}')
+    assert response.headers['Location'] == '/order-list'
+
+
+def test_feedback_is_deduped_by_key(app, client):
+    login(client)
+    for _ in range(2):
+        response = client.post('/submit_feedback', data={
+            'name': 'Alice', 'email': 'alice@example.com', 'message': 'Great food!',
+            'idempotency_key': KEY})
+        assert response.get_json()['success']
+    app.extensions['intake_queue'].drain_once()
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM feedback")
+        assert cur.fetchone()['n'] == 1
+
+
+def test_order_is_dated_when_it_was_submitted(app, add_food):
+    soup = add_food('Soup', price=4)
+    lines = [{'food_id': soup, 'food_name': 'Soup', 'quantity': 1, 'unit_price': 4, 'line_total': 4}]
+    customer = {'name': 'Alice', 'phone': '012345678', 'address': '', 'note': '',
+                'delivery': 'pickup', 'service': None}
+    queue = app.extensions['intake_queue']
+    queue.submit('order', 'q' * 16, {'customer': customer, 'lines': lines, 'total': 4,
+                                     'coupon': None, 'submitted_at': '2026-01-02 03:04:05'})
+    queue.drain_once()
+    assert queue.lookup('q' * 16)['status'] == 'done'
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT order_date FROM orders")
+        assert str(cur.fetchone()['order_date']) == '2026-01-02 03:04:05'
+
+
+def test_journal_failures_are_reported_not_raised(app, client, add_food, monkeypatch, caplog):
+    def down(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(app.extensions['intake_queue'], 'submit', down)
+    login(client)
+    response = client.post(f"/order/{add_food('Soup')}", data={
+        'customer_name': 'Alice', 'phone': '012345678', 'delivery_option': 'pickup',
+        'quantity': 1, 'idempotency_key': KEY})
+    assert response.status_code == 200 and b'Order failed, please try again.' in response.data
+    response = client.post('/submit_feedback', data={
+        'name': 'Alice', 'email': 'alice@example.com', 'message': 'Hi', 'idempotency_key': KEY})
+    assert response.status_code == 500
+    assert [r.getMessage() for r in caplog.records if r.exc_info] == \
+        ['Order error: disk full', 'Feedback error: disk full']
+    assert count_orders(app) == 0
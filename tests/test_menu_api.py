@@ -0,0 +1,54 @@
+import app as appmod
+from tests.conftest import login
+
+
+def update_food(app, sql, *params):
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute(sql, params)
+        appmod.mysql.connection.commit()
+    app.extensions['menu_catalog'].bump_version()
+
+
+def test_full_menu_then_not_modified(app, client, add_food):
+    add_food('Soup', price=5, discount=10)
+    add_food('Tea', category='Drinks', price=2)
+    response = login(client).get('/api/menu')
+    data = response.get_json()
+    assert data['full'] is True
+    assert sorted(data['categories']) == ['Drinks', 'Main']
+    soup = dict(zip(data['fields'], data['foods'][0]))
+    assert soup['food_name'] == 'Soup' and soup['final'] == 4.5
+    again = client.get('/api/menu', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_delta_has_changed_and_removed_dishes_only(app, client, add_food):
+    soup, rice, tea = add_food('Soup'), add_food('Rice'), add_food('Tea')
+    version = login(client).get('/api/menu').get_json()['version']
+
+    update_food(app, "UPDATE food SET price = 7 WHERE food_id = %s", rice)
+    update_food(app, "UPDATE food SET available = 0 WHERE food_id = %s", tea)
+    update_food(app, "DELETE FROM food WHERE food_id = %s", soup)
+
+    data = client.get(f'/api/menu?since={version}').get_json()
+    assert data['full'] is False
+    assert [row[0] for row in data['foods']] == [rice]
+    assert sorted(data['removed']) == [soup, tea]
+
+
+def test_unknown_version_or_new_coupon_gets_full_copy(app, client, add_food):
+    add_food('Soup')
+    version = login(client).get('/api/menu').get_json()['version']
+    assert client.get('/api/menu?since=0').get_json()['full'] is True
+    assert client.get('/api/menu?since=junk').get_json()['full'] is True
+    assert client.get(f'/api/menu?since={version}').get_json()['full'] is False
+
+    with app.app_context():
+        cur = appmod.get_cursor()
+        cur.execute("SELECT code FROM coupons LIMIT 1")
+        code = cur.fetchone()['code']
+    assert client.post('/apply_coupon', data={'coupon_code': code}).get_json()['success']
+    data = client.get(f'/api/menu?since={version}').get_json()
+    assert data['full'] is True
+    assert data['coupon']['code'] == code
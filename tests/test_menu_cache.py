@@ -0,0 +1,84 @@
+import logging
+
+from menu_cache import MenuCatalog
+from tests.conftest import login
+
+
+def food(food_id, name, category='Main', available=1):
+    return {'food_id': food_id, 'food_name': name, 'category': category, 'available': available}
+
+
+class Loader:
+    def __init__(self, *foods):
+        self.foods = list(foods)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [dict(f) for f in self.foods]
+
+
+def test_loads_once_per_version(tmp_path):
+    loader = Loader(food(2, 'Tea', 'Drinks'), food(1, 'Soup'), food(3, 'Pie', 'Dessert', available=0))
+    catalog = MenuCatalog(loader, str(tmp_path / 'menu_version'))
+    assert [f['food_name'] for f in catalog.all_foods()] == ['Soup', 'Tea', 'Pie']
+    assert [f['food_name'] for f in catalog.available_foods()] == ['Soup', 'Tea']
+    assert [f['food_name'] for f in catalog.available_foods('Drinks')] == ['Tea']
+    assert catalog.categories() == ['Main', 'Drinks']
+    assert catalog.get('2')['food_name'] == 'Tea' and catalog.get(9) is None
+    assert (catalog.version, loader.calls) == (0, 1)
+
+
+def test_a_bump_reaches_every_worker(tmp_path):
+    path = str(tmp_path / 'menu_version')
+    loader = Loader(food(1, 'Soup'))
+    writer, reader = MenuCatalog(loader, path), MenuCatalog(loader, path)
+    assert reader.get(1)['food_name'] == 'Soup'
+    loader.foods[0]['food_name'] = 'Broth'
+    assert reader.get(1)['food_name'] == 'Soup'
+    assert writer.bump_version() == 1
+    assert reader.get(1)['food_name'] == 'Broth' and reader.version == 1
+
+
+def test_rows_handed_out_are_copies(tmp_path):
+    catalog = MenuCatalog(Loader(food(1, 'Soup')), str(tmp_path / 'menu_version'))
+    catalog.get(1)['food_name'] = 'changed'
+    catalog.available_foods()[0]['discounted_price'] = 1
+    assert catalog.get(1) == food(1, 'Soup')
+
+
+def test_changes_since(tmp_path):
+    loader = Loader(food(1, 'Soup'), food(2, 'Tea'), food(3, 'Pie'))
+    catalog = MenuCatalog(loader, str(tmp_path / 'menu_version'))
+    catalog.bump_version()
+    assert catalog.changes_since(1) == (1, [], [])
+    loader.foods[0]['food_name'] = 'Broth'
+    del loader.foods[1]
+    catalog.bump_version()
+    catalog.refresh()
+    loader.foods.append(food(4, 'Cake'))
+    catalog.bump_version()
+    assert catalog.changes_since(1) == (3, [food(1, 'Broth'), food(4, 'Cake')], [2])
+    assert catalog.changes_since(2) == (3, [food(4, 'Cake')], [])
+    # Older than this worker's first load, or newer than it knows.
+    assert catalog.changes_since(0) is None and catalog.changes_since(4) is None
+
+
+def test_listener_failures_are_logged(tmp_path, caplog):
+    catalog = MenuCatalog(Loader(food(1, 'Soup')), str(tmp_path / 'menu_version'))
+    seen = []
+    catalog.on_reload(lambda foods: 1 / 0)
+    catalog.on_reload(lambda foods: seen.append([f['food_id'] for f in foods]))
+    with caplog.at_level(logging.ERROR):
+        catalog.refresh()
+    assert seen == [[1]] and 'Menu catalog listener failed' in caplog.text
+
+
+def test_manage_menu_edits_show_on_the_menu(client, add_food):
+    food_id = add_food('Soup')
+    assert b'Soup' in login(client).get('/menu').data
+    login(client, 'admin', 'admin').post('/manage-menu', data={
+        'action': 'edit', 'food_id': food_id, 'food_name': 'Broth', 'category': 'Main',
+        'price': 5, 'available': '1'})
+    page = login(client).get('/menu').data
+    assert b'Broth' in page and b'Soup' not in page
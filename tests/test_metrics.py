@@ -0,0 +1,56 @@
+import logging
+import sqlite3
+
+import metrics
+from metrics import Counter, Histogram, InstrumentedCursor
+from tests.conftest import login
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram('t_seconds', 'Test.', ('route',), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value, '/a"b')
+    assert h.render() == [
+        '# HELP t_seconds Test.', '# TYPE t_seconds histogram',
+        't_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        't_seconds_bucket{route="/a\\"b",le="1.0"} 2',
+        't_seconds_bucket{route="/a\\"b",le="+Inf"} 3',
+        't_seconds_sum{route="/a\\"b"} 5.550000',
+        't_seconds_count{route="/a\\"b"} 3']
+    c = Counter('t_total', 'Test.', ('route',))
+    c.inc('/x')
+    c.inc('/x', amount=2)
+    assert c.render()[-1] == 't_total{route="/x"} 3'
+
+
+def test_slow_statements_are_logged_without_parameters(caplog):
+    cur = InstrumentedCursor(sqlite3.connect(':memory:').cursor(), slow_query_seconds=0)
+    with caplog.at_level(logging.WARNING, logger='slow_query'):
+        cur.execute("SELECT 1 WHERE 'secret' IN (?, ?)", ('secret', 'other'))
+    assert 'other' not in caplog.text and '(2 params redacted)' in caplog.text
+    assert metrics.redact("SELECT *\n  FROM t WHERE id IN (%s, %s,%s)") == "SELECT * FROM t WHERE id IN (%s, ...)"
+
+
+def test_requests_carry_server_timing(client, add_food):
+    add_food('Soup')
+    response = login(client).get('/menu?search=soup')
+    timing = response.headers.getlist('Server-Timing')
+    assert timing[0].startswith('db;dur=') and 'queries"' in timing[0]
+    assert timing[1].startswith('app;dur=')
+
+
+def test_metrics_page(app, client):
+    assert login(client).get('/metrics').status_code == 403
+    client.get('/order/7')
+    body = login(client, 'admin', 'admin').get('/metrics').data.decode()
+    assert 'http_request_duration_seconds_count{route="/order/<int:food_id>",method="GET",status="302"}' in body
+    assert 'http_request_sql_queries_bucket{route="/order/<int:food_id>",le="0"}' in body
+    assert '# TYPE order_stream_clients gauge' in body
+
+
+def test_metrics_token(make_app):
+    app = make_app(METRICS_TOKEN='s3cret')
+    client = app.test_client()
+    assert login(client, 'admin', 'admin').get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
@@ -0,0 +1,35 @@
+from order_cache import OrderCache
+from tests.conftest import login, place_order
+
+
+def test_checkout_pages_reuse_the_cached_order(app, client, add_food):
+    place_order(login(client), add_food('Soup'))
+    cache = app.extensions['order_cache']
+    assert client.get('/order_success/1').status_code == 200
+    misses = cache.stats()['misses']
+    assert client.get('/order/1/pay').status_code == 200
+    assert client.get('/order_success/1').status_code == 200
+    assert cache.stats()['misses'] == misses
+    assert cache.stats()['hits'] >= 2
+
+
+def test_payment_and_status_change_invalidate(app, client, add_food):
+    place_order(login(client), add_food('Soup'))
+    assert client.get('/order_success/1').status_code == 200  # cached unpaid
+
+    client.post('/order/1/pay', data={'payment_method': 'Card'})
+    assert b'Card' in client.get('/payment_success/1').data
+
+    login(client, 'admin', 'admin').post('/manage-orders', data={'order_id': '1', 'status': 'Completed'})
+    assert b'Completed' in login(client).get('/order/1/receipt').data
+    assert app.extensions['order_cache'].stats()['invalidations'] == 2
+
+
+def test_invalidation_reaches_other_workers(app):
+    # Two caches on one generation file stand in for two worker processes.
+    path = app.config['ORDER_CACHE_FILE']
+    mine, theirs = OrderCache(path), OrderCache(path)
+    assert theirs.get(7, lambda: 'v1') == 'v1'
+    assert theirs.get(7, lambda: 'v2') == 'v1'
+    mine.invalidate([7])
+    assert theirs.get(7, lambda: 'v3') == 'v3'
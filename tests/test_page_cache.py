@@ -0,0 +1,57 @@
+from page_cache import PageCache
+from tests.conftest import login
+
+
+def test_least_recently_used_pages_go_first():
+    cache = PageCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a').body == b'aaaa'
+    cache.put('c', b'cccc')
+    assert cache.get('b') is None and cache.get('a') and cache.get('c')
+    # Too big to keep, but still rendered with an ETag.
+    assert cache.put('d', b'd' * 11).etag and cache.get('d') is None
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'max_bytes': 10,
+                             'hits': 3, 'misses': 2, 'evictions': 1}
+
+
+def test_menu_is_served_from_the_cache_with_an_etag(app, client, add_food):
+    add_food('Soup')
+    first = login(client).get('/menu')
+    etag = first.headers['ETag']
+    assert first.cache_control.no_cache and first.cache_control.private and 'Cookie' in first.vary
+    again = client.get('/menu', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert app.extensions['page_cache'].stats()['hits'] == 1
+    # The search is part of the key.
+    assert client.get('/menu?search=tea', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_a_menu_edit_changes_the_page(client, add_food):
+    add_food('Soup')
+    etag = login(client).get('/menu').headers['ETag']
+    add_food('Tea')
+    response = client.get('/menu', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and b'Tea' in response.data and response.headers['ETag'] != etag
+
+
+def test_coupon_and_login_state_are_part_of_the_key(client, add_food):
+    add_food('Soup', price=10)
+    home = client.get('/').headers['ETag']
+    menu = login(client).get('/menu')
+    assert client.get('/').headers['ETag'] != home
+    assert client.post('/apply_coupon', data={'coupon_code': 'PNC'}).get_json()['success']
+    discounted = client.get('/menu')
+    assert discounted.headers['ETag'] != menu.headers['ETag'] and b'8.00' in discounted.data
+
+
+def test_pages_with_flash_messages_are_not_cached(app, client):
+    with login(client).session_transaction() as session:
+        session['_flashes'] = [('error', 'Something went wrong.')]
+    assert 'ETag' not in client.get('/menu').headers
+    assert app.extensions['page_cache'].stats()['entries'] == 0
+
+
+def test_page_cache_can_be_turned_off(make_app):
+    client = login(make_app(PAGE_CACHE_MAX_BYTES=0).test_client())
+    assert 'ETag' not in client.get('/menu').headers
@@ -0,0 +1,48 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import app as appmod
+import migrate
+
+
+class PlanCursor:
+    # Runs EXPLAIN QUERY PLAN on every statement before executing it, so a
+    # test can check the index the app's own query would use.
+    def __init__(self, cursor, plain):
+        self.cursor = cursor
+        self.plain = plain  # explain() reads rows by position
+        self.plans = []
+
+    def execute(self, sql, params=()):
+        self.plans.append(migrate.explain(self.plain, sql, params, 'sqlite'))
+        return self.cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def indexes(plan):
+    return {row['key'] for row in plan}
+
+
+@pytest.mark.parametrize('label', [q[0] for q in migrate.HOT_QUERIES])
+def test_hot_queries_use_their_index(app, label):
+    with app.app_context():
+        results = {r[0]: r for r in migrate.check_plans(appmod.mysql.connection)}
+    _, index, plan, ok = results[label]
+    assert ok, f"{label}: expected {index}, got {[row['detail'] for row in plan]}"
+
+
+@pytest.mark.parametrize('args, index', [
+    ({}, 'idx_orders_date_id'),
+    ({'after': '2026-01-02T10:00:00.000000_42'}, 'idx_orders_date_id'),
+    ({'before': '2026-01-02T10:00:00.000000_42'}, 'idx_orders_date_id'),
+    ({'status': 'Pending'}, 'idx_orders_status_date'),
+    ({'status': 'Pending', 'after': '2026-01-02T10:00:00.000000_42'}, 'idx_orders_status_date'),
+    ({'status': 'Completed', 'date_from': '2026-01-01', 'date_to': '2026-01-31'}, 'idx_orders_status_date'),
+])
+def test_order_pages_use_keyset_indexes(app, args, index):
+    with app.app_context():
+        cur = PlanCursor(appmod.get_cursor(), appmod.get_cursor(dict_cursor=False))
+        appmod.fetch_orders_page(cur, MultiDict(args))
+    assert index in indexes(cur.plans[0])
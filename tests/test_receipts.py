@@ -0,0 +1,69 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+
+import receipts
+from receipts import ReceiptCache
+from tests.conftest import login, place_order
+
+
+class RecordingCanvas:
+    # Stands in for a reportlab canvas: the strings drawn, page by page.
+    def __init__(self):
+        self.pages = [[]]
+
+    def drawString(self, x, y, text):
+        self.pages[-1].append(text)
+
+    drawCentredString = drawString
+
+    def showPage(self):
+        self.pages.append([])
+
+    def setFont(self, *args):
+        pass
+
+    def line(self, *args):
+        pass
+
+
+def receipt(order_id, lines=1):
+    order = {'order_id': order_id, 'customer_name': 'Alice', 'phone': '1', 'address': '',
+             'delivery_option': 'pickup', 'delivery_service': '', 'total_price': 5.0 * lines,
+             'payment_method': 'Card', 'payment_date': datetime(2026, 1, 2, 10, 0)}
+    items = [{'food_name': f'Dish {n}', 'quantity': 1, 'unit_price': 5.0, 'line_total': 5.0}
+             for n in range(lines)]
+    return order, items
+
+
+def test_long_receipt_repeats_the_table_header():
+    pdf = RecordingCanvas()
+    receipts._draw_receipt(pdf, *receipt(1, lines=60))
+    pages = [p for p in pdf.pages if p]
+    assert len(pages) > 1
+    for page in pages:
+        assert page[page.index('Food'):page.index('Food') + 4] == ['Food', 'Qty', 'Price', 'Total']
+
+
+@pytest.mark.parametrize('processes', [0, 1])
+def test_export_zip_renders_missing_receipts_on_one_pool(tmp_path, processes):
+    cache = ReceiptCache(str(tmp_path), workers=1, export_processes=processes)
+    batch = [receipt(1), receipt(2, lines=3)]
+    cache.submit(*batch[0]).result(timeout=30)
+    with zipfile.ZipFile(io.BytesIO(cache.export_zip(batch))) as zf:
+        assert zf.namelist() == ['payment_receipt_1.pdf', 'payment_receipt_2.pdf']
+        assert all(zf.read(name).startswith(b'%PDF') for name in zf.namelist())
+    pool = cache._export_executor()
+    cache.export_zip([receipt(3)])
+    assert cache._export_executor() is pool
+
+
+def test_receipt_download_is_cached_with_etag(app, client, add_food):
+    place_order(login(client), add_food('Soup'))
+    client.post('/order/1/pay', data={'payment_method': 'Card'})
+    first = client.get('/order/1/payment/pdf')
+    assert first.status_code == 200 and first.data.startswith(b'%PDF')
+    again = client.get('/order/1/payment/pdf', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
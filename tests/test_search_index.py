@@ -0,0 +1,63 @@
+import pytest
+
+from search_index import MenuSearchIndex
+from tests.conftest import login
+
+MENU = [
+    {'food_id': 1, 'food_name': 'Chicken Soup', 'category': 'Soups', 'description': 'Clear broth', 'available': 1},
+    {'food_id': 2, 'food_name': 'Beef Noodles', 'category': 'Noodles', 'description': 'With chicken stock', 'available': 1},
+    {'food_id': 3, 'food_name': 'Noodle Soup', 'category': 'Soups', 'description': '', 'available': 1},
+    {'food_id': 4, 'food_name': 'Chicken Wings', 'category': 'Starters', 'description': '', 'available': 0},
+]
+
+
+@pytest.fixture
+def index():
+    index = MenuSearchIndex()
+    assert index.sync([dict(f) for f in MENU]) == 4
+    return index
+
+
+def names(foods):
+    return [f['food_name'] for f in foods]
+
+
+def test_name_outranks_description(index):
+    # Name hits first (alphabetical on ties), then the description hit;
+    # unavailable dishes only when asked for.
+    assert names(index.search('chicken')) == ['Chicken Soup', 'Beef Noodles']
+    assert names(index.search('chicken', available_only=False)) == \
+        ['Chicken Soup', 'Chicken Wings', 'Beef Noodles']
+
+
+def test_prefix_and_every_word(index):
+    assert names(index.search('nood')) == ['Beef Noodles', 'Noodle Soup']
+    assert names(index.search('noodle soup')) == ['Noodle Soup']
+    assert names(index.search('soup', limit=1)) == ['Chicken Soup']
+    assert index.search('pizza') == [] and index.search('  ') == []
+
+
+def test_typos_match_by_trigrams(index):
+    assert names(index.search('chiken')) == ['Chicken Soup', 'Beef Noodles']
+    assert names(index.search('noodels')) == ['Noodle Soup', 'Beef Noodles']
+    # Short tokens only match exactly or by prefix.
+    assert index.search('sx') == []
+
+
+def test_sync_reindexes_only_what_changed(index):
+    foods = [dict(f) for f in MENU]
+    foods[0]['food_name'] = 'Tomato Soup'
+    del foods[1]
+    assert index.sync(foods) == 2
+    assert names(index.search('chicken')) == []
+    assert names(index.search('tomato')) == ['Tomato Soup']
+    assert index.sync(foods) == 0
+
+
+def test_suggest_endpoint(client, add_food):
+    add_food('Chicken Soup', 'Soups', price=6)
+    add_food('Chicken Wings', 'Starters', price=4, available=0)
+    results = login(client).get('/api/menu/suggest?q=chik').get_json()['results']
+    assert [(r['food_name'], r['price']) for r in results] == [('Chicken Soup', 6.0)]
+    assert client.get('/api/menu/suggest?q=').get_json() == {'results': []}
+    assert b'Chicken Soup' in client.get('/menu?search=chiken').data